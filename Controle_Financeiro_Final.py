@@ -1,13 +1,39 @@
 import sys
+from datetime import date, datetime
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import chain, groupby, islice
+from types import GeneratorType
+import atexit
+import os
+import threading
+import time
+import ledger
+import query_stats
+from ledger import (MONTH_RANGE_SQL, MONTH_ROWS_SQL, MOVIMENTACOES_NOMES_SQL, PENDING_OCCURRENCE_SQL,
+                    RULE_OCCURRENCES_SQL, add_months, add_to_person, month_bounds)
+
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QPushButton, 
                            QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
-                           QMessageBox, QDialog, QTableWidget, QTableWidgetItem,
-                           QScrollArea, QFrame, QTabWidget, QGridLayout)
-from PyQt6.QtCore import Qt
+                           QMessageBox, QDialog, QTableView, QHeaderView,
+                           QProgressBar, QScrollArea, QFrame, QTabWidget, QGridLayout)
+from PyQt6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QObject, QRunnable,
+                          QThreadPool, QTimer, pyqtSignal)
 from PyQt6.QtGui import QFont, QPalette, QColor
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
-import psycopg2
+
+# Fim de cada fase da inicialização, relatado com --profile-startup. O tempo
+# de CPU gasto até aqui cobre o Python, a compilação do script e as importações
+_startup_cpu = time.process_time()
+_startup_marks = [("início", time.perf_counter())]
+
+def mark_startup(fase):
+    _startup_marks.append((fase, time.perf_counter()))
+
+# psycopg2, dateutil e uuid são importados no primeiro uso, e sqlite3, json e
+# select por quem os usa, para a janela principal abrir antes; prewarm()
+# carrega os do banco em segundo plano logo depois
 
 # Configurações do banco PostgreSQL
 DB_NAME = "finance"
@@ -16,182 +42,702 @@ DB_PASSWORD = "senha"
 DB_HOST = "localhost"
 DB_PORT = "5432"
 
+# Configurações do pool de conexões
+DB_POOL_MIN = 1
+DB_POOL_MAX = 10
+DB_POOL_TIMEOUT = 30  # segundos aguardando uma conexão livre
+DB_POOL_HEALTH_CHECK_INTERVAL = 60  # segundos ociosa antes de revalidar a conexão
+
+# Quantidade máxima de abas de meses mantidas construídas na visualização
+VISUALIZATION_MAX_BUILT_TABS = 12
+
+# Linhas buscadas por ida ao servidor nos cursores nomeados
+MOVIMENTACOES_BATCH_SIZE = 2000
+
+# Linhas entregues de cada vez à tabela de uma aba da visualização
+VISUALIZATION_ROW_BATCH = 500
+
+# Fila local de gravações dos formulários: arquivo SQLite ao lado do programa,
+# máximo de registros por transação, espera para juntar registros em sequência
+# (segundos) e intervalo entre tentativas com o banco indisponível (dobra a
+# cada falha, até o máximo)
+WRITE_QUEUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fila_gravacoes.sqlite3")
+WRITE_QUEUE_BATCH = 50
+WRITE_QUEUE_LINGER = 0.2
+WRITE_QUEUE_RETRY = 2
+WRITE_QUEUE_MAX_RETRY = 120
+WRITE_QUEUE_CLOSE_TIMEOUT = 5  # segundos tentando esvaziar a fila ao fechar o programa
+
+# Meses com movimentações guardados no cache de meses (os totais de todos os
+# meses ficam sempre em memória)
+MONTH_CACHE_MAX_ROW_MONTHS = 36
+
+# Canal de LISTEN/NOTIFY dos gatilhos de alteração e espera (segundos) antes
+# de reconectar o ouvinte após uma falha
+CHANGE_NOTIFY_CHANNEL = "movimentacoes_alteradas"
+CHANGE_LISTENER_RETRY = 10
+
+class Centavos(int):
+    """
+    Valor monetário em centavos inteiros. Os valores são gravados como BIGINT,
+    lidos como int e somados sem arredondamento; só viram "R$" na exibição.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_reais(cls, valor):
+        """
+        Converte um valor em reais (texto digitado, float, Decimal ou int) em
+        centavos, arredondando meio centavo para cima. Aceita "1234.56",
+        "1234,56", "1.234,56", "1,234.56" e "1.234"; veja parse_reais.
+        """
+        if isinstance(valor, str):
+            valor = cls.parse_reais(valor)
+        # str() evita carregar o erro binário de um float para o Decimal
+        reais = Decimal(str(valor))
+        return cls(reais.scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+    @staticmethod
+    def parse_reais(texto):
+        """
+        Converte um valor digitado em Decimal. Com "." e "," presentes, o
+        último é o separador decimal e o outro separa milhares. Com um só
+        tipo de separador, ele separa milhares se aparece mais de uma vez ou
+        se é um "." seguido de exatamente três dígitos; senão, é o decimal.
+        Formas que não dá para distinguir, como "1,234", grupos de milhar
+        malformados e mais de duas casas decimais levantam ValueError.
+        """
+        numero = texto.replace("R$", "").strip()
+        sinal = "-" if numero.startswith("-") else ""
+        numero = numero.lstrip("+-").strip()
+
+        tipos = {c for c in numero if c in ".,"}
+        decimal = milhar = None
+        if len(tipos) == 2:
+            decimal = numero[max(numero.rfind("."), numero.rfind(","))]
+        elif tipos:
+            separador = tipos.pop()
+            digitos_depois = len(numero) - numero.rfind(separador) - 1
+            if numero.count(separador) == 1 and digitos_depois != 3:
+                decimal = separador
+            elif numero.count(separador) == 1 and separador == ",":
+                raise ValueError(f"Valor ambíguo: {texto!r} (use 1.234 para milhares ou 1,23 para centavos)")
+            else:
+                milhar = separador
+
+        if decimal is None:
+            inteiro, fracao = numero, ""
+        else:
+            inteiro, _, fracao = numero.rpartition(decimal)
+            milhar = "," if decimal == "." else "."
+
+        grupos = inteiro.split(milhar) if milhar else [inteiro]
+        milhares_ok = len(grupos) == 1 or (
+            1 <= len(grupos[0]) <= 3 and not grupos[0].startswith("0")
+            and all(len(grupo) == 3 for grupo in grupos[1:])
+        )
+        digitos = "".join(grupos)
+        if (not milhares_ok or not (digitos or fracao)
+                or not all(parte.isdecimal() and parte.isascii() for parte in (digitos, fracao) if parte)):
+            raise ValueError(f"Valor inválido: {texto!r}")
+        if len(fracao) > 2:
+            raise ValueError(f"Valor inválido: {texto!r} (use no máximo duas casas decimais)")
+        return Decimal(f"{sinal}{digitos or 0}.{fracao or 0}")
+
+    @property
+    def reais(self):
+        return Decimal(int(self)).scaleb(-2)
+
+def format_centavos(centavos):
+    """
+    Formata um valor em centavos como "R$ 1,234.56", apenas para exibição.
+    """
+    reais, resto = divmod(abs(int(centavos)), 100)
+    return f"R$ {'-' if centavos < 0 else ''}{reais:,}.{resto:02d}"
+
 def connect_to_database():
     """
     Estabelece conexão com o banco de dados PostgreSQL.
     """
+    import psycopg2
     try:
+        inicio = time.perf_counter()
         connection = psycopg2.connect(
             dbname=DB_NAME,
             user=DB_USER,
             password=DB_PASSWORD,
             host=DB_HOST,
-            port=DB_PORT
+            port=DB_PORT,
+            cursor_factory=query_stats.cursor_factory()
         )
+        query_stats.record("<conexão>", time.perf_counter() - inicio)
         return connection
     except Exception as e:
         print("Erro ao conectar ao banco de dados:", e)
         raise
 
-def save_compra(descricao, valor_parcela, pessoa, pagamento, total_parcelas):
+class PoolTimeoutError(Exception):
     """
-    Salva uma compra no banco de dados.
+    Nenhuma conexão ficou livre dentro do tempo limite do pool.
     """
-    try:
-        data = datetime.now()
-        if pagamento == "Crédito":
-            if pessoa == "Yuri":
-                data = data.replace(day=14) if data.day < 14 else data.replace(day=14) + relativedelta(months=1)
-            elif pessoa == "Marcos":
-                data = data.replace(day=26) if data.day < 26 else data.replace(day=26) + relativedelta(months=1)
 
-        conn = connect_to_database()
-        cursor = conn.cursor()
+class ConnectionPool:
+    """
+    Pool de conexões thread-safe com tamanhos mínimo e máximo, verificação
+    de saúde das conexões ociosas e estatísticas de uso.
+    """
+    def __init__(self, minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX, timeout=DB_POOL_TIMEOUT,
+                 health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL, connect=connect_to_database):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Tamanhos de pool inválidos")
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._connect = connect
+        self._condition = threading.Condition()
+        self._idle = []  # pilha de (conexão, instante da última devolução)
+        self._size = 0
+        self._backend_pids = {}  # id da conexão -> pid do processo servidor
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "wait_time": 0.0,
+            "max_wait_time": 0.0,
+            "connections_created": 0,
+            "health_check_failures": 0,
+            "timeouts": 0
+        }
 
-        for parcela in range(1, total_parcelas + 1):
-            valor = -abs(valor_parcela)
-            cursor.execute("""
-                INSERT INTO Movimentacoes (data, descricao, valor, tipo, pessoa, pagamento, parcela_atual, total_parcelas)
-                VALUES (%s, %s, %s, 'Compra', %s, %s, %s, %s)
-            """, (data, descricao, valor, pessoa, pagamento, parcela, total_parcelas))
+        for _ in range(minconn):
+            self._idle.append((self._create_connection(), time.monotonic()))
+            self._size += 1
+
+    def _create_connection(self):
+        conn = self._connect()
+        with self._condition:
+            self._stats["connections_created"] += 1
+            self._backend_pids[id(conn)] = conn.get_backend_pid()
+        return conn
+
+    def _is_healthy(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._condition:
+            self._backend_pids.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
 
-            data += relativedelta(months=1)
-            replicate_recurring_entries(data.month, data.year)
+    def backend_pids(self):
+        """
+        Retorna os pids, no servidor, das conexões abertas pelo pool.
+        """
+        with self._condition:
+            return set(self._backend_pids.values())
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+    def getconn(self):
+        """
+        Retira uma conexão do pool, aguardando até o tempo limite se todas estiverem em uso.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            conn = None
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise PoolTimeoutError("O pool de conexões foi fechado")
+                    if self._idle:
+                        conn, idle_since = self._idle.pop()
+                        break
+                    if self._size < self.maxconn:
+                        self._size += 1
+                        idle_since = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Nenhuma conexão livre após {self.timeout} segundos"
+                        )
+                    self._condition.wait(remaining)
+
+            if conn is None:
+                try:
+                    conn = self._create_connection()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+            elif not self._is_healthy(conn, idle_since):
+                # Conexão quebrada: substitui e tenta de novo
+                self._discard(conn)
+                with self._condition:
+                    self._stats["health_check_failures"] += 1
+                    self._size -= 1
+                continue
+
+            waited = time.monotonic() - start
+            with self._condition:
+                self._stats["checkouts"] += 1
+                self._stats["wait_time"] += waited
+                self._stats["max_wait_time"] = max(self._stats["max_wait_time"], waited)
+            query_stats.record("<empréstimo do pool>", waited)
+            return conn
+
+    def putconn(self, conn, discard=False):
+        """
+        Devolve uma conexão ao pool, descartando-a se estiver fechada ou com erro.
+        """
+        if not discard and not conn.closed:
+            from psycopg2 import extensions
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        else:
+            discard = True
+
+        with self._condition:
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+        if discard or self._closed:
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Empresta uma conexão dentro de uma transação: confirma ao sair
+        normalmente e desfaz se ocorrer uma exceção.
+        """
+        conn = self.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            broken = conn.closed
+            if not broken:
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            self.putconn(conn, discard=broken)
+            raise
+        else:
+            self.putconn(conn)
+
+    def stats(self):
+        """
+        Retorna as estatísticas de uso do pool.
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._size - len(self._idle)
+        stats["avg_wait_time"] = stats["wait_time"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+    def closeall(self):
+        """
+        Fecha todas as conexões ociosas e impede novos empréstimos.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Retorna o pool de conexões compartilhado, criando-o no primeiro uso.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+                atexit.register(_pool.closeall)
+    return _pool
+
+def get_connection():
+    """
+    Empresta uma conexão do pool compartilhado como gerenciador de contexto.
+    """
+    return get_pool().connection()
+
+def get_pool_stats():
+    """
+    Retorna as estatísticas do pool: empréstimos, tempo de espera e conexões criadas.
+    """
+    return get_pool().stats()
+
+class DimensionCache:
+    """
+    Cache em memória dos ids das tabelas de dimensão (Pessoas, Pagamentos e
+    Tipos), nos dois sentidos. Os nomes são internados, de modo que cada nome
+    existe uma única vez na memória. Pessoas e pagamentos novos são
+    cadastrados na primeira vez em que aparecem; os tipos são fixos.
+
+    Quem grava passa o próprio cursor a get_id: um nome fora do cache é
+    resolvido (e cadastrado) na transação de quem chamou, sem emprestar outra
+    conexão do pool. Esse id não entra no cache, pois a transação ainda pode
+    ser desfeita; o cache só guarda linhas já confirmadas e é marcado para
+    recarregar na próxima leitura sem cursor.
+    """
+    TABELAS = ("Pessoas", "Pagamentos", "Tipos")
+    CADASTRAVEIS = ("Pessoas", "Pagamentos")
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ids = {}  # tabela -> {nome: id}
+        self._nomes = {}  # tabela -> {id: nome}, em ordem de id
+        self._stale = False
+
+    def _load(self):
+        self._stale = False
+        with get_connection() as conn, conn.cursor() as cursor:
+            for tabela in self.TABELAS:
+                cursor.execute(f"SELECT id, nome FROM {tabela} ORDER BY id")
+                self._ids[tabela] = {}
+                self._nomes[tabela] = {}
+                self._store(tabela, cursor.fetchall())
+
+    def _store(self, tabela, rows):
+        for id_, nome in rows:
+            nome = sys.intern(nome)
+            self._ids[tabela][nome] = id_
+            self._nomes[tabela][id_] = nome
+
+    def _fetch_id(self, cursor, tabela, nome):
+        if tabela in self.CADASTRAVEIS:
+            cursor.execute(f"INSERT INTO {tabela} (nome) VALUES (%s) ON CONFLICT (nome) DO NOTHING", (nome,))
+        cursor.execute(f"SELECT id FROM {tabela} WHERE nome = %s", (nome,))
+        row = cursor.fetchone()
+        if row is None:
+            raise ValueError(f"Valor desconhecido em {tabela}: {nome}")
+        return row[0]
+
+    def get_id(self, tabela, nome, cursor=None):
+        """
+        Retorna o id de um nome na tabela de dimensão (None para nome vazio).
+        Sem cursor, um nome novo é cadastrado em transação própria.
+        """
+        if not nome:
+            return None
+        if cursor is not None:
+            # Fora do lock: quem o segura pode estar esperando uma conexão do pool
+            with self._lock:
+                id_ = self._ids.get(tabela, {}).get(nome)
+            if id_ is None:
+                id_ = self._fetch_id(cursor, tabela, nome)
+                self._stale = True
+            return id_
+
+        with self._lock:
+            if not self._nomes:
+                self._load()
+            id_ = self._ids[tabela].get(nome)
+            if id_ is None and self._stale:
+                self._load()
+                id_ = self._ids[tabela].get(nome)
+            if id_ is None:
+                with get_connection() as conn, conn.cursor() as cursor:
+                    id_ = self._fetch_id(cursor, tabela, nome)
+                self._store(tabela, [(id_, nome)])
+            return id_
+
+    def get_nome(self, tabela, id_):
+        if id_ is None:
+            return None
+        with self._lock:
+            if id_ not in self._nomes.get(tabela, {}):
+                self._load()
+            return self._nomes[tabela].get(id_)
+
+    def nomes(self, tabela):
+        """
+        Retorna os nomes cadastrados na tabela, em ordem de cadastro.
+        """
+        with self._lock:
+            if not self._nomes or self._stale:
+                self._load()
+            return list(self._nomes[tabela].values())
+
+    def nomes_por_id(self):
+        """
+        Retorna {tabela: {id: nome}} de todas as tabelas de dimensão, no
+        formato usado por ledger.iter_totals_by_id.
+        """
+        with self._lock:
+            if not self._nomes or self._stale:
+                self._load()
+            return {tabela: dict(nomes) for tabela, nomes in self._nomes.items()}
+
+    def invalidate(self):
+        with self._lock:
+            self._ids.clear()
+            self._nomes.clear()
+
+dimensions = DimensionCache()
+
+def get_pessoas():
+    """
+    Retorna as pessoas cadastradas, na ordem em que aparecem nos resumos.
+    """
+    return dimensions.nomes("Pessoas")
+
+_data_change_listeners = []
+
+def add_data_change_listener(callback):
+    """
+    Registra uma função chamada após cada gravação confirmada com a lista
+    ordenada dos meses alterados (datas no dia 1), ou None quando a alteração
+    pode afetar qualquer mês, como uma nova regra de recorrência sem início.
+    Os meses seguintes ao primeiro da lista também devem ser tratados como
+    alterados: os saldos passam de um mês para o outro, e regras iniciadas
+    ou encerradas mudam todos os meses dali em diante.
+    """
+    _data_change_listeners.append(callback)
+
+def remove_data_change_listener(callback):
+    if callback in _data_change_listeners:
+        _data_change_listeners.remove(callback)
+
+def _notify_data_changed(dates=None):
+    """
+    Avisa os ouvintes que os meses das datas informadas mudaram.
+    """
+    months = None if dates is None else sorted({date(d.year, d.month, 1) for d in dates})
+    for listener in list(_data_change_listeners):
+        try:
+            listener(months)
+        except Exception as e:
+            print(f"Erro ao notificar alteração de dados: {str(e)}")
+
+def get_opening_balance(month, year):
+    """
+    Retorna o saldo (total, poupança) carregado do mês anterior, usando o
+    cache de meses.
+    """
+    return month_cache.opening_balance(month, year)
+
+def _write_compra(cursor, descricao, valor_parcela, pessoa, pagamento, total_parcelas, hoje=None):
+    """
+    Grava as parcelas de uma compra no cursor informado e retorna as datas alteradas.
+    """
+    data = hoje or datetime.now()
+    if pagamento == "Crédito":
+        if pessoa == "Yuri":
+            data = data.replace(day=14) if data.day < 14 else add_months(data.replace(day=14), 1)
+        elif pessoa == "Marcos":
+            data = data.replace(day=26) if data.day < 26 else add_months(data.replace(day=26), 1)
+
+    valor = -abs(valor_parcela)
+    tipo_id = dimensions.get_id("Tipos", "Compra", cursor)
+    pessoa_id = dimensions.get_id("Pessoas", pessoa, cursor)
+    pagamento_id = dimensions.get_id("Pagamentos", pagamento, cursor)
+    parcelas = [
+        (add_months(data, parcela - 1), descricao, valor, tipo_id, pessoa_id, pagamento_id,
+         parcela, total_parcelas)
+        for parcela in range(1, total_parcelas + 1)
+    ]
+    if parcelas:
+        from psycopg2.extras import execute_values
+        execute_values(cursor, """
+            INSERT INTO Movimentacoes (data, descricao, valor, tipo_id, pessoa_id, pagamento_id, parcela_atual, total_parcelas)
+            VALUES %s
+        """, parcelas, page_size=len(parcelas))
+    return [parcela[0] for parcela in parcelas]
+
+def save_compra(descricao, valor_parcela, pessoa, pagamento, total_parcelas):
+    """
+    Salva uma compra no banco de dados, com o valor da parcela em centavos.
+
+    Todas as parcelas são gravadas em um único INSERT de várias linhas, em uma
+    só transação: uma falha não deixa a série de parcelas pela metade.
+    """
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            datas = _write_compra(cursor, descricao, valor_parcela, pessoa, pagamento, total_parcelas)
+
+        if datas:
+            _notify_data_changed(datas)
         return True
 
     except Exception as e:
         print(f"Erro ao registrar a compra: {str(e)}")
         return False
 
-def save_conta(descricao, pessoa, dia_vencimento, valor, frequencia, pagamento):
+def _write_conta(cursor, descricao, pessoa, dia_vencimento, valor, frequencia, pagamento, hoje=None):
     """
-    Salva uma conta no banco de dados.
+    Grava uma conta no cursor informado e retorna as datas alteradas (None
+    para uma regra recorrente, que alcança todos os meses).
     """
-    try:
-        hoje = datetime.now()
-        vencimento = hoje.replace(day=dia_vencimento)
-        if hoje.day > dia_vencimento:
-            vencimento += relativedelta(months=1)
+    hoje = hoje or datetime.now()
+    vencimento = hoje.replace(day=dia_vencimento)
+    if hoje.day > dia_vencimento:
+        vencimento = add_months(vencimento, 1)
 
-        conn = connect_to_database()
-        cursor = conn.cursor()
+    tipo_id = dimensions.get_id("Tipos", "Conta", cursor)
+    pessoa_id = dimensions.get_id("Pessoas", pessoa, cursor)
+    pagamento_id = dimensions.get_id("Pagamentos", pagamento, cursor)
 
+    recorrencia_id = None
+    if frequencia == 0:
         cursor.execute("""
-            INSERT INTO Movimentacoes (data, descricao, valor, tipo, pessoa, pagamento, total_parcelas)
-            VALUES (%s, %s, %s, 'Conta', %s, %s, %s)
-        """, (vencimento, descricao, -abs(valor), pessoa, pagamento, frequencia))
+            INSERT INTO Recorrencias (descricao, pessoa_id, valor, tipo_id, pagamento_id, dia)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            RETURNING id
+        """, (descricao, pessoa_id, -abs(valor), tipo_id, pagamento_id, dia_vencimento))
+        recorrencia_id = cursor.fetchone()[0]
 
-        if frequencia == 0:
-            cursor.execute("""
-                SELECT DISTINCT EXTRACT(MONTH FROM data) AS mes, EXTRACT(YEAR FROM data) AS ano
-                FROM Movimentacoes
-                ORDER BY ano, mes
-            """)
-            meses_anos = cursor.fetchall()
-
-            for mes, ano in meses_anos:
-                data_conta = datetime(int(ano), int(mes), dia_vencimento)
-                cursor.execute("""
-                    SELECT 1 FROM Movimentacoes
-                    WHERE data = %s AND descricao = %s AND pessoa = %s
-                """, (data_conta, descricao, pessoa))
-                if not cursor.fetchone():
-                    cursor.execute("""
-                        INSERT INTO Movimentacoes (data, descricao, valor, tipo, pessoa, pagamento, total_parcelas)
-                        VALUES (%s, %s, %s, 'Conta', %s, %s, 0)
-                    """, (data_conta, descricao, -abs(valor), pessoa, pagamento))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+    cursor.execute("""
+        INSERT INTO Movimentacoes (data, descricao, valor, tipo_id, pessoa_id, pagamento_id, total_parcelas, recorrencia_id)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, (vencimento, descricao, -abs(valor), tipo_id, pessoa_id, pagamento_id, frequencia, recorrencia_id))
+
+    # Uma regra nova sem início definido alcança todos os meses
+    return None if frequencia == 0 else [vencimento]
+
+def save_conta(descricao, pessoa, dia_vencimento, valor, frequencia, pagamento):
+    """
+    Salva uma conta no banco de dados, com o valor em centavos.
+
+    Contas recorrentes (frequência 0) viram uma regra em Recorrencias; apenas o
+    primeiro vencimento é gravado em Movimentacoes e os demais meses são
+    expandidos na leitura.
+    """
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            datas = _write_conta(cursor, descricao, pessoa, dia_vencimento, valor, frequencia, pagamento)
+
+        _notify_data_changed(datas)
         return True
 
     except Exception as e:
         print(f"Erro ao registrar a conta: {str(e)}")
         return False
 
+def _write_salario(cursor, valor, dia, pessoa):
+    """
+    Grava a regra mensal de um salário no cursor informado, se ainda não
+    existir uma igual em vigor. Não retorna datas: a regra, sem início,
+    alcança todos os meses.
+    """
+    parametros = {
+        "pessoa_id": dimensions.get_id("Pessoas", pessoa, cursor),
+        "tipo_id": dimensions.get_id("Tipos", "Recebimento", cursor),
+        "valor": valor,
+        "dia": dia,
+    }
+    cursor.execute("""
+        INSERT INTO Recorrencias (descricao, pessoa_id, valor, tipo_id, dia)
+        SELECT 'Salário', %(pessoa_id)s, %(valor)s, %(tipo_id)s, %(dia)s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM Recorrencias
+            WHERE descricao = 'Salário' AND tipo_id = %(tipo_id)s AND pessoa_id = %(pessoa_id)s
+              AND valor = %(valor)s AND dia = %(dia)s AND fim IS NULL
+        )
+    """, parametros)
+
 def save_salario(valor, dia, pessoa):
     """
-    Salva um salário no banco de dados.
+    Salva um salário (em centavos) no banco de dados como regra de recorrência mensal.
     """
     try:
-        conn = connect_to_database()
-        cursor = conn.cursor()
+        with get_connection() as conn, conn.cursor() as cursor:
+            _write_salario(cursor, valor, dia, pessoa)
 
-        cursor.execute("""
-            SELECT DISTINCT EXTRACT(MONTH FROM data) AS mes, EXTRACT(YEAR FROM data) AS ano
-            FROM Movimentacoes
-            ORDER BY ano, mes
-        """)
-        meses_existentes = cursor.fetchall()
-
-        for mes, ano in meses_existentes:
-            data_salario = datetime(int(ano), int(mes), dia)
-            cursor.execute("""
-                SELECT 1 FROM Movimentacoes
-                WHERE data = %s AND descricao = 'Salário' AND pessoa = %s
-            """, (data_salario, pessoa))
-            if not cursor.fetchone():
-                cursor.execute("""
-                    INSERT INTO Movimentacoes (data, descricao, valor, tipo, pessoa)
-                    VALUES (%s, 'Salário', %s, 'Recebimento', %s)
-                """, (data_salario, valor, pessoa))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+        _notify_data_changed(None)
         return True
 
     except Exception as e:
         print(f"Erro ao registrar o salário: {str(e)}")
         return False
 
+def _write_recebimento(cursor, valor, dia, descricao, frequencia, pessoa, hoje=None):
+    """
+    Grava um recebimento e suas repetições mensais no cursor informado e
+    retorna as datas alteradas.
+    """
+    data_inicial = (hoje or datetime.now()).replace(day=dia)
+    datas = [add_months(data_inicial, i) for i in range(0, frequencia)]
+    tipo_id = dimensions.get_id("Tipos", "Recebimento", cursor)
+    pessoa_id = dimensions.get_id("Pessoas", pessoa, cursor)
+
+    for data in datas:
+        cursor.execute("""
+            INSERT INTO Movimentacoes (data, descricao, valor, tipo_id, pessoa_id)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (data, descricao, valor, tipo_id, pessoa_id))
+    return datas
+
 def save_recebimento(valor, dia, descricao, frequencia, pessoa):
     """
-    Salva um recebimento no banco de dados.
+    Salva um recebimento no banco de dados, com o valor em centavos.
     """
     try:
-        data_inicial = datetime.now().replace(day=dia)
-        
-        conn = connect_to_database()
-        cursor = conn.cursor()
+        with get_connection() as conn, conn.cursor() as cursor:
+            datas = _write_recebimento(cursor, valor, dia, descricao, frequencia, pessoa)
 
-        for i in range(0, frequencia):
-            data = data_inicial + relativedelta(months=i)
-            cursor.execute("""
-                INSERT INTO Movimentacoes (data, descricao, valor, tipo, pessoa)
-                VALUES (%s, %s, %s, 'Recebimento', %s)
-            """, (data, descricao, valor, pessoa))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+        _notify_data_changed(datas)
         return True
 
     except Exception as e:
         print(f"Erro ao registrar o recebimento: {str(e)}")
         return False
 
+def _write_savings(cursor, tipo, valor, descricao, hoje=None):
+    """
+    Grava um lançamento de poupança ou retirada na data informada (hoje, por
+    padrão) e retorna a data alterada.
+    """
+    data = (hoje or datetime.now()).date()
+    cursor.execute("""
+        INSERT INTO Movimentacoes (data, descricao, valor, tipo_id)
+        VALUES (%s, %s, %s, %s)
+    """, (data, descricao, valor, dimensions.get_id("Tipos", tipo, cursor)))
+    return [data]
+
+def _write_poupanca(cursor, valor, descricao, hoje=None):
+    return _write_savings(cursor, "Poupança", valor, descricao, hoje)
+
+def _write_retirada(cursor, valor, descricao, hoje=None):
+    return _write_savings(cursor, "Retirada", valor, descricao, hoje)
+
 def save_poupanca(valor, descricao):
     """
-    Salva um registro de poupança no banco de dados.
+    Salva um registro de poupança (em centavos) no banco de dados.
     """
     try:
-        conn = connect_to_database()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO Movimentacoes (data, descricao, valor, tipo)
-            VALUES (CURRENT_DATE, %s, %s, 'Poupança')
-        """, (descricao, valor))
+        with get_connection() as conn, conn.cursor() as cursor:
+            datas = _write_poupanca(cursor, valor, descricao)
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+        _notify_data_changed(datas)
         return True
 
     except Exception as e:
@@ -200,176 +746,948 @@ def save_poupanca(valor, descricao):
 
 def save_retirada(valor, descricao):
     """
-    Registra uma retirada da poupança no banco de dados.
+    Registra uma retirada da poupança (em centavos) no banco de dados.
     """
     try:
-        conn = connect_to_database()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO Movimentacoes (data, descricao, valor, tipo)
-            VALUES (CURRENT_DATE, %s, %s, 'Retirada')
-        """, (descricao, valor))
+        with get_connection() as conn, conn.cursor() as cursor:
+            datas = _write_retirada(cursor, valor, descricao)
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+        _notify_data_changed(datas)
         return True
 
     except Exception as e:
         print(f"Erro ao salvar a retirada: {str(e)}")
         return False
 
+def parse_mes_ano(mes_ano):
+    """
+    Converte um texto "MM/AAAA" no primeiro dia do mês.
+    """
+    mes, ano = map(int, mes_ano.split("/"))
+    return datetime(ano, mes, 1)
+
+def parse_dia(texto, hoje=None):
+    """
+    Converte o dia do mês informado no cadastro, entre 1 e 31. Com hoje, o dia
+    também precisa existir no mês de hoje, onde cai o primeiro lançamento.
+    """
+    dia = int(texto)
+    if not 1 <= dia <= 31:
+        raise ValueError(f"Dia inválido: {dia} (use de 1 a 31)")
+    if hoje is not None:
+        from calendar import monthrange
+        ultimo = monthrange(hoje.year, hoje.month)[1]
+        if dia > ultimo:
+            raise ValueError(f"Dia inválido: {hoje.month:02d}/{hoje.year} tem {ultimo} dias")
+    return dia
+
+def _write_limite(cursor, pessoa, mes_ano, valor):
+    """
+    Grava o limite de uma pessoa no mês no cursor informado. Limites não
+    alteram os meses visualizados.
+    """
+    cursor.execute("""
+        INSERT INTO Limites (data, pessoa, valor)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (data, pessoa) DO UPDATE SET valor = EXCLUDED.valor
+    """, (parse_mes_ano(mes_ano), pessoa, valor))
+    return []
+
 def save_limite(pessoa, mes_ano, valor):
     """
-    Define o limite de gastos para uma pessoa em um determinado mês.
+    Define o limite de gastos (em centavos) para uma pessoa em um determinado mês.
     """
     try:
-        mes, ano = map(int, mes_ano.split("/"))
-        data_limite = datetime(ano, mes, 1)
-
-        conn = connect_to_database()
-        cursor = conn.cursor()
+        with get_connection() as conn, conn.cursor() as cursor:
+            _write_limite(cursor, pessoa, mes_ano, valor)
 
-        cursor.execute("""
-            INSERT INTO Limites (data, pessoa, valor)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (data, pessoa) DO UPDATE SET valor = EXCLUDED.valor
-        """, (data_limite, pessoa, valor))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
         return True
 
     except Exception as e:
         print(f"Erro ao definir o limite: {str(e)}")
         return False
 
+# Gravações que podem passar pela fila: nome -> (função de gravação, rótulo,
+# se a função recebe em hoje a data em que o registro foi feito)
+_QUEUED_WRITES = {
+    "compra": (_write_compra, "Compra", True),
+    "conta": (_write_conta, "Conta", True),
+    "salario": (_write_salario, "Salário", False),
+    "recebimento": (_write_recebimento, "Recebimento", True),
+    "poupanca": (_write_poupanca, "Poupança", True),
+    "retirada": (_write_retirada, "Retirada", True),
+    "limite": (_write_limite, "Limite", False),
+}
+
+def _transient_errors():
+    """
+    Erros em que o banco está inacessível: a gravação fica na fila e é repetida.
+    """
+    import psycopg2
+    return (psycopg2.OperationalError, psycopg2.InterfaceError, PoolTimeoutError)
+
+_WRITE_QUEUE_SQL = """
+    CREATE TABLE IF NOT EXISTS fila (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        chave TEXT NOT NULL UNIQUE,
+        operacao TEXT NOT NULL,
+        argumentos TEXT NOT NULL,
+        criado TEXT NOT NULL,
+        tentativas INTEGER NOT NULL DEFAULT 0,
+        proxima_tentativa REAL NOT NULL DEFAULT 0,
+        erro TEXT,
+        falhou INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+class WriteQueue:
+    """
+    Fila persistente das gravações feitas pelos formulários. Cada registro é
+    guardado em um arquivo SQLite local e uma thread em segundo plano o grava
+    no PostgreSQL, juntando os registros pendentes em transações
+    compartilhadas.
+
+    Com o banco inacessível, os registros continuam na fila (inclusive entre
+    execuções do programa) e são repetidos com intervalo crescente. Um
+    registro rejeitado pelo banco fica marcado como falho até ser repetido
+    ou descartado. A chave de cada registro é gravada em GravacoesAplicadas
+    na mesma transação, de modo que uma repetição nunca o grava duas vezes.
+    """
+    def __init__(self, caminho=WRITE_QUEUE_PATH, batch_size=WRITE_QUEUE_BATCH, linger=WRITE_QUEUE_LINGER):
+        self.batch_size = batch_size
+        self.linger = linger
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._listeners = []
+        self._connection_error = None
+        import sqlite3
+        self._db = sqlite3.connect(caminho, check_same_thread=False)
+        with self._db:
+            self._db.execute(_WRITE_QUEUE_SQL)
+
+    def enqueue(self, operacao, *args):
+        """
+        Guarda uma gravação na fila e retorna seu id. A data do registro é a
+        de agora, mesmo que ele só chegue ao banco mais tarde.
+        """
+        if operacao not in _QUEUED_WRITES:
+            raise ValueError(f"Gravação desconhecida: {operacao}")
+        import json
+        import uuid
+        with self._lock, self._db:
+            id_ = self._db.execute(
+                "INSERT INTO fila (chave, operacao, argumentos, criado) VALUES (?, ?, ?, ?)",
+                (uuid.uuid4().hex, operacao, json.dumps(args), datetime.now().isoformat())
+            ).lastrowid
+        self._wake.set()
+        self._notify()
+        return id_
+
+    def status(self):
+        """
+        Retorna o estado da fila: registros pendentes, registros falhos como
+        (id, rótulo, criado, erro) e o último erro de conexão (None se o
+        banco respondeu na última tentativa).
+        """
+        with self._lock:
+            pendentes = self._db.execute("SELECT COUNT(*) FROM fila WHERE falhou = 0").fetchone()[0]
+            falhas = [
+                (id_, _QUEUED_WRITES[operacao][1], datetime.fromisoformat(criado), erro)
+                for id_, operacao, criado, erro in self._db.execute(
+                    "SELECT id, operacao, criado, erro FROM fila WHERE falhou = 1 ORDER BY id"
+                )
+            ]
+        return {"pendentes": pendentes, "falhas": falhas, "erro_conexao": self._connection_error}
+
+    def add_listener(self, callback):
+        """
+        Registra uma função chamada com status() sempre que a fila muda. Ela
+        pode ser chamada na thread da fila.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self):
+        estado = self.status()
+        for listener in list(self._listeners):
+            try:
+                listener(estado)
+            except Exception as e:
+                print(f"Erro ao notificar a fila de gravações: {str(e)}")
+
+    def retry(self, ids=None):
+        """
+        Devolve à fila os registros falhos informados (todos, por padrão) e
+        antecipa a próxima tentativa dos pendentes.
+        """
+        with self._lock, self._db:
+            if ids is None:
+                self._db.execute("UPDATE fila SET falhou = 0, proxima_tentativa = 0")
+            else:
+                self._db.executemany("UPDATE fila SET falhou = 0, proxima_tentativa = 0 WHERE id = ?",
+                                     [(id_,) for id_ in ids])
+        self._wake.set()
+        self._notify()
+
+    def discard(self, ids):
+        """
+        Remove da fila os registros falhos informados.
+        """
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM fila WHERE id = ? AND falhou = 1", [(id_,) for id_ in ids])
+        self._notify()
+
+    def _due(self):
+        with self._lock:
+            return self._db.execute("""
+                SELECT id, chave, operacao, argumentos, criado, tentativas FROM fila
+                WHERE falhou = 0 AND proxima_tentativa <= ?
+                ORDER BY id LIMIT ?
+            """, (time.time(), self.batch_size)).fetchall()
+
+    def _next_attempt(self):
+        with self._lock:
+            proxima = self._db.execute("SELECT MIN(proxima_tentativa) FROM fila WHERE falhou = 0").fetchone()[0]
+        return None if proxima is None else max(0.0, proxima - time.time())
+
+    def drain_batch(self):
+        """
+        Grava em uma única transação até batch_size registros pendentes e
+        retorna quantos saíram da fila (gravados ou marcados como falhos).
+
+        Cada registro roda em seu próprio savepoint: um registro rejeitado
+        não desfaz os demais. Se o banco estiver inacessível, todo o lote
+        volta para a fila com a próxima tentativa adiada.
+        """
+        lote = self._due()
+        if not lote:
+            return 0
+
+        import json
+        transitorios = _transient_errors()
+        gravados, falhas, datas = [], [], []
+        try:
+            with get_connection() as conn, conn.cursor() as cursor:
+                for id_, chave, operacao, argumentos, criado, _ in lote:
+                    cursor.execute("SAVEPOINT gravacao")
+                    try:
+                        cursor.execute("INSERT INTO GravacoesAplicadas (chave) VALUES (%s) ON CONFLICT DO NOTHING",
+                                       (chave,))
+                        if cursor.rowcount:
+                            gravar, _, datada = _QUEUED_WRITES[operacao]
+                            extras = {"hoje": datetime.fromisoformat(criado)} if datada else {}
+                            alteradas = gravar(cursor, *json.loads(argumentos), **extras)
+                            datas = None if datas is None or alteradas is None else datas + alteradas
+                        cursor.execute("RELEASE SAVEPOINT gravacao")
+                        gravados.append(id_)
+                    except transitorios:
+                        raise
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO SAVEPOINT gravacao")
+                        falhas.append((str(e).strip(), id_))
+
+        except transitorios as e:
+            self._connection_error = str(e).strip() or type(e).__name__
+            agora = time.time()
+            with self._lock, self._db:
+                self._db.executemany("""
+                    UPDATE fila SET tentativas = tentativas + 1, erro = ?, proxima_tentativa = ?
+                    WHERE id = ?
+                """, [
+                    (self._connection_error, agora + min(WRITE_QUEUE_MAX_RETRY, WRITE_QUEUE_RETRY * 2 ** tentativas), id_)
+                    for id_, *_, tentativas in lote
+                ])
+            print(f"Banco indisponível, {len(lote)} gravações continuam na fila: {self._connection_error}")
+            self._notify()
+            return 0
+
+        self._connection_error = None
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM fila WHERE id = ?", [(id_,) for id_ in gravados])
+            self._db.executemany("UPDATE fila SET falhou = 1, tentativas = tentativas + 1, erro = ? WHERE id = ?",
+                                 falhas)
+        for erro, _ in falhas:
+            print(f"Erro ao gravar registro da fila: {erro}")
+
+        if datas is None or datas:
+            _notify_data_changed(datas)
+        self._notify()
+        return len(lote)
+
+    def _run(self):
+        while True:
+            if not self._stopping.is_set():
+                self._wake.wait(self._next_attempt())
+                # Espera um pouco para que registros feitos em sequência dividam a transação
+                self._stopping.wait(self.linger)
+            self._wake.clear()
+            try:
+                while self.drain_batch():
+                    pass
+            except Exception as e:
+                print(f"Erro na fila de gravações: {str(e)}")
+            if self._stopping.is_set():
+                return
+
+    def start(self):
+        """
+        Inicia a thread que esvazia a fila, inclusive com o que sobrou de
+        execuções anteriores.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="fila_gravacoes", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=WRITE_QUEUE_CLOSE_TIMEOUT):
+        """
+        Faz uma última tentativa de esvaziar a fila e encerra a thread. O que
+        não for gravado fica no arquivo para a próxima execução.
+        """
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join(timeout)
+            self._thread = None
+
+_write_queue = None
+
+def get_write_queue():
+    """
+    Retorna a fila de gravações compartilhada, criando-a no primeiro uso.
+    """
+    global _write_queue
+    if _write_queue is None:
+        _write_queue = WriteQueue()
+    return _write_queue
+
+def _replicate_recurring(cursor, months_sql, params):
+    """
+    Materializa as ocorrências pendentes das regras de recorrência nos meses
+    selecionados com um único INSERT ... SELECT ... WHERE NOT EXISTS executado
+    no servidor. Retorna a quantidade de linhas inseridas.
+    """
+    cursor.execute(f"""
+        WITH meses (mes) AS ({months_sql}),
+        ocorrencias AS ({RULE_OCCURRENCES_SQL})
+        INSERT INTO Movimentacoes (data, descricao, valor, tipo_id, pessoa_id, pagamento_id, total_parcelas, recorrencia_id)
+        SELECT o.data, o.descricao, o.valor, o.tipo_id, o.pessoa_id, o.pagamento_id, o.total_parcelas, o.recorrencia_id
+        FROM ocorrencias o
+        WHERE {PENDING_OCCURRENCE_SQL}
+    """, params)
+    return cursor.rowcount
+
+def _replicate_recurring_range(cursor, start, end):
+    """
+    Materializa lançamentos recorrentes para todos os meses entre start e end
+    (inclusive) usando o cursor informado, sem abrir nova transação.
+    Retorna a quantidade de linhas inseridas.
+    """
+    return _replicate_recurring(cursor, MONTH_RANGE_SQL, {"inicio": start, "fim": end})
+
 def replicate_recurring_entries(month, year):
     """
-    Replica lançamentos recorrentes para um determinado mês.
+    Materializa os lançamentos recorrentes de um determinado mês.
+    Retorna a quantidade de linhas inseridas.
     """
     try:
-        conn = connect_to_database()
-        cursor = conn.cursor()
-
         start_date = datetime(year, month, 1)
+        with get_connection() as conn, conn.cursor() as cursor:
+            inseridas = _replicate_recurring_range(cursor, start_date, start_date)
 
-        # Recupera salários recorrentes
-        cursor.execute("""
-            SELECT descricao, valor, pessoa, EXTRACT(DAY FROM data) AS dia
-            FROM Movimentacoes
-            WHERE tipo = 'Recebimento' AND descricao = 'Salário'
-            GROUP BY descricao, valor, pessoa, dia
-        """)
-        salarios = cursor.fetchall()
-
-        # Recupera contas com frequência zero
-        cursor.execute("""
-            SELECT descricao, valor, pessoa, pagamento, EXTRACT(DAY FROM data) AS dia_vencimento
-            FROM Movimentacoes
-            WHERE tipo = 'Conta' AND total_parcelas = 0
-            GROUP BY descricao, valor, pessoa, pagamento, dia_vencimento
-        """)
-        contas = cursor.fetchall()
-
-        for descricao, valor, pessoa, dia in salarios:
-            data_salario = start_date.replace(day=int(dia))
-            cursor.execute("""
-                SELECT 1 FROM Movimentacoes
-                WHERE data = %s AND descricao = %s AND pessoa = %s
-            """, (data_salario, descricao, pessoa))
-            if not cursor.fetchone():
-                cursor.execute("""
-                    INSERT INTO Movimentacoes (data, descricao, valor, tipo, pessoa)
-                    VALUES (%s, %s, %s, 'Recebimento', %s)
-                """, (data_salario, descricao, valor, pessoa))
-
-        for descricao, valor, pessoa, pagamento, dia_vencimento in contas:
-            data_conta = start_date.replace(day=int(dia_vencimento))
-            cursor.execute("""
-                SELECT 1 FROM Movimentacoes
-                WHERE data = %s AND descricao = %s AND pessoa = %s
-            """, (data_conta, descricao, pessoa))
-            if not cursor.fetchone():
-                cursor.execute("""
-                    INSERT INTO Movimentacoes (data, descricao, valor, tipo, pessoa, pagamento, total_parcelas)
-                    VALUES (%s, %s, %s, 'Conta', %s, %s, 0)
-                """, (data_conta, descricao, -abs(valor), pessoa, pagamento))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+        if inseridas:
+            _notify_data_changed([start_date])
+        return inseridas
 
     except Exception as e:
         print(f"Erro ao replicar lançamentos recorrentes: {str(e)}")
+        return 0
 
-def get_month_data(month, year):
+def end_recurring_rule(recorrencia_id, fim):
     """
-    Retorna os dados de movimentações de um determinado mês.
+    Encerra uma regra de recorrência: ela deixa de gerar lançamentos após a data fim.
     """
     try:
-        conn = connect_to_database()
-        cursor = conn.cursor()
+        with get_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE Recorrencias SET fim = %s WHERE id = %s
+            """, (fim, recorrencia_id))
 
-        cursor.execute("""
-            SELECT data, descricao, valor, tipo, pessoa, pagamento, parcela_atual, total_parcelas
-            FROM Movimentacoes
-            WHERE EXTRACT(MONTH FROM data) = %s AND EXTRACT(YEAR FROM data) = %s
-            ORDER BY data
-        """, (month, year))
-        
-        data = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        return data
+        _notify_data_changed([fim])
+        return True
+
+    except Exception as e:
+        print(f"Erro ao encerrar a recorrência: {str(e)}")
+        return False
+
+def _fetch_month_rows(cursor, month, year):
+    """
+    Retorna as movimentações gravadas do mês junto com as ocorrências virtuais
+    das regras de recorrência que ainda não foram materializadas.
+    """
+    inicio, fim = month_bounds(month, year)
+    cursor.execute(MONTH_ROWS_SQL, {"inicio": inicio, "fim": fim})
+    return cursor.fetchall()
+
+# Filtros aceitos por iter_movimentacoes sobre as colunas de dimensão: (coluna, tabela)
+_DIMENSION_FILTERS = {
+    "tipo": ("tipo_id", "Tipos"),
+    "pessoa": ("pessoa_id", "Pessoas"),
+    "pagamento": ("pagamento_id", "Pagamentos"),
+}
+
+def _filter_conditions(filtros, prefixo=""):
+    """
+    Converte os filtros de iter_movimentacoes em condições SQL sobre as
+    colunas com o prefixo dado e nos parâmetros correspondentes. Tipo, pessoa
+    e pagamento aceitam um nome ou uma lista de nomes; descricao filtra por
+    trecho, sem diferenciar maiúsculas.
+    """
+    condicoes = []
+    params = {}
+    for chave, valor in (filtros or {}).items():
+        if chave in _DIMENSION_FILTERS:
+            coluna, tabela = _DIMENSION_FILTERS[chave]
+            condicoes.append(f"{prefixo}{coluna} IN (SELECT id FROM {tabela} WHERE nome = ANY(%(filtro_{chave})s))")
+            params[f"filtro_{chave}"] = [valor] if isinstance(valor, str) else list(valor)
+        elif chave == "descricao":
+            condicoes.append(f"{prefixo}descricao ILIKE %(filtro_descricao)s")
+            params["filtro_descricao"] = f"%{valor}%"
+        else:
+            raise ValueError(f"Filtro desconhecido: {chave}")
+    return condicoes, params
+
+def _fetch_range_rows(cursor, inicio=None, fim=None, filtros=None):
+    """
+    Executa no cursor a consulta de todas as movimentações do intervalo
+    [inicio, fim), ordenadas por data, com as ocorrências das regras de
+    recorrência expandidas em cada mês que possui lançamentos. Os filtros
+    valem tanto para as linhas gravadas quanto para as ocorrências.
+    """
+    periodo = []
+    if inicio is not None:
+        periodo.append("data >= %(inicio)s")
+    if fim is not None:
+        periodo.append("data < %(fim)s")
+    where_periodo = f"WHERE {' AND '.join(periodo)}" if periodo else ""
+
+    condicoes, params = _filter_conditions(filtros)
+    condicoes_ocorrencias, _ = _filter_conditions(filtros, "o.")
+    where = f"WHERE {' AND '.join(periodo + condicoes)}" if periodo or condicoes else ""
+
+    linhas = f"""
+        SELECT data, descricao, valor, tipo_id, pessoa_id, pagamento_id, parcela_atual, total_parcelas
+        FROM Movimentacoes
+        {where}
+        UNION ALL
+        SELECT o.data, o.descricao, o.valor, o.tipo_id, o.pessoa_id, o.pagamento_id, NULL, o.total_parcelas
+        FROM ocorrencias o
+        WHERE {' AND '.join([PENDING_OCCURRENCE_SQL] + condicoes_ocorrencias)}
+    """
+    cursor.execute(f"""
+        WITH meses (mes) AS (
+            SELECT DISTINCT date_trunc('month', data)::date FROM Movimentacoes {where_periodo}
+        ),
+        ocorrencias AS ({RULE_OCCURRENCES_SQL})
+        {MOVIMENTACOES_NOMES_SQL.format(linhas=linhas)}
+    """, {"inicio": inicio, "fim": fim, **params})
+
+def iter_movimentacoes(inicio=None, fim=None, filtros=None, batch_size=MOVIMENTACOES_BATCH_SIZE):
+    """
+    Gera, uma a uma e em ordem de data, as movimentações do intervalo
+    [inicio, fim) no formato de get_month_data, incluindo as ocorrências de
+    recorrência. As linhas vêm de um cursor do lado do servidor, batch_size
+    por vez, e a conexão fica reservada até o gerador terminar ou ser fechado.
+    filtros aceita tipo, pessoa, pagamento e descricao (veja _filter_conditions).
+    """
+    with get_connection() as conn, conn.cursor(name="movimentacoes_stream") as cursor:
+        cursor.itersize = batch_size
+        _fetch_range_rows(cursor, inicio, fim, filtros)
+        yield from cursor
+
+def _row_month(row):
+    return row[0].year, row[0].month
+
+def iter_months_data(inicio=None, fim=None, itersize=MOVIMENTACOES_BATCH_SIZE):
+    """
+    Percorre as movimentações do intervalo [inicio, fim) em uma única consulta
+    com cursor do lado do servidor, gerando (mês, ano, linhas) para cada mês
+    que possui lançamentos, em ordem cronológica.
+    """
+    for (year, month), rows in groupby(iter_movimentacoes(inicio, fim, batch_size=itersize), key=_row_month):
+        yield month, year, list(rows)
+
+def iter_month_row_batches(month, year, batch_size=VISUALIZATION_ROW_BATCH):
+    """
+    Gera as movimentações de um mês em listas de até batch_size linhas, para
+    que a interface mostre as primeiras sem esperar o mês inteiro.
+    """
+    inicio, fim = month_bounds(month, year)
+    rows = iter_movimentacoes(inicio, fim, batch_size=max(batch_size, MOVIMENTACOES_BATCH_SIZE))
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def load_month_rows(month, year):
+    """
+    Busca as movimentações de um mês, propagando erros de banco ao chamador.
+    """
+    with get_connection() as conn, conn.cursor() as cursor:
+        return _fetch_month_rows(cursor, month, year)
+
+def get_month_data(month, year):
+    """
+    Retorna os dados de movimentações de um determinado mês, incluindo os
+    lançamentos recorrentes expandidos a partir das regras. Passa pelo cache
+    de meses.
+    """
+    try:
+        return month_cache.month_rows(month, year)
 
     except Exception as e:
         print(f"Erro ao recuperar dados do mês: {str(e)}")
         return []
 
-def get_month_totals(data, previous_month_total=0, previous_savings=0):
+def _import_deferred_modules():
+    import uuid
+    import dateutil.relativedelta
+    import psycopg2.extras
+
+def prewarm(hoje=None):
     """
-    Calcula os totais do mês a partir dos dados fornecidos.
+    Prepara em segundo plano o que o primeiro registro e a primeira
+    visualização usam: os módulos do banco, o pool de conexões, os cadastros,
+    os totais dos meses e as movimentações do mês atual. Retorna o tempo de
+    cada fase; se uma falhar, as seguintes ficam para o primeiro uso.
     """
-    totals = {
-        "Poupança": {"Total": previous_savings},
-        "Entradas": {"Yuri": 0, "Marcos": 0, "Total": 0},
-        "Saídas": {"Yuri": 0, "Marcos": 0, "Total": 0},
-        "Crédito": {"Yuri": 0, "Marcos": 0},
-        "Total do Mês": 0
-    }
+    hoje = hoje or date.today()
+    fases = [
+        ("importar psycopg2 e dateutil", _import_deferred_modules),
+        ("abrir o pool de conexões", get_pool),
+        ("carregar os cadastros", lambda: dimensions.nomes("Pessoas")),
+        ("carregar os totais dos meses", lambda: list(month_cache.iter_monthly_totals())),
+        ("carregar o mês atual", lambda: month_cache.month_rows(hoje.month, hoje.year)),
+    ]
+    tempos = []
+    for fase, preparar in fases:
+        inicio = time.perf_counter()
+        try:
+            preparar()
+        except Exception as e:
+            print(f"Erro ao preparar o aplicativo ({fase}): {e}")
+            break
+        tempos.append((fase, time.perf_counter() - inicio))
+    return tempos
+
+def startup_report(tempos_prewarm):
+    """
+    Formata o tempo de cada fase da inicialização até a janela aparecer e do
+    pré-aquecimento feito depois, em segundo plano.
+    """
+    linhas = [
+        "Inicialização (ms):",
+        f"  {'Python e importações (CPU)':<32} {_startup_cpu * 1000:8.1f}"
+    ]
+    for (_, anterior), (fase, instante) in zip(_startup_marks, _startup_marks[1:]):
+        linhas.append(f"  {fase:<32} {(instante - anterior) * 1000:8.1f}")
+    linhas.append(f"  {'total até a janela':<32} {(_startup_marks[-1][1] - _startup_marks[0][1]) * 1000:8.1f}")
+    linhas.append("Pré-aquecimento em segundo plano (ms):")
+    for fase, segundos in tempos_prewarm:
+        linhas.append(f"  {fase:<32} {segundos * 1000:8.1f}")
+    return "\n".join(linhas)
+
+def _fetch_monthly_summaries(cursor, inicio=None, fim=None, meses=None):
+    """
+    Executa no cursor a consulta dos totais mensais de ResumoMensal, somados às
+    ocorrências de recorrência ainda não materializadas em cada mês. Cada linha
+    traz (mes, pessoa_id, tipo_id, pagamento_id, valor_total, valor_abs), com 0
+    para pessoa e pagamento ausentes, ordenada por mês. meses restringe a
+    consulta a uma lista de meses (datas no dia 1).
+    """
+    filtros = ["quantidade > 0"]
+    if inicio is not None:
+        filtros.append("mes >= date_trunc('month', %(inicio)s::date)")
+    if fim is not None:
+        filtros.append("mes < %(fim)s")
+    if meses is not None:
+        filtros.append("mes = ANY(%(meses)s::date[])")
+
+    cursor.execute(f"""
+        WITH resumo AS (
+            SELECT mes, pessoa_id, tipo_id, pagamento_id, valor_total, valor_abs
+            FROM ResumoMensal
+            WHERE {' AND '.join(filtros)}
+        ),
+        meses (mes) AS (SELECT DISTINCT mes FROM resumo),
+        ocorrencias AS ({RULE_OCCURRENCES_SQL})
+        SELECT m.mes, m.pessoa_id, m.tipo_id, m.pagamento_id, SUM(m.valor_total)::bigint, SUM(m.valor_abs)::bigint
+        FROM (
+            SELECT mes, pessoa_id, tipo_id, pagamento_id, valor_total, valor_abs
+            FROM resumo
+            UNION ALL
+            SELECT o.mes, COALESCE(o.pessoa_id, 0), o.tipo_id, COALESCE(o.pagamento_id, 0), o.valor, ABS(o.valor)
+            FROM ocorrencias o
+            WHERE {PENDING_OCCURRENCE_SQL}
+        ) m
+        GROUP BY m.mes, m.pessoa_id, m.tipo_id, m.pagamento_id
+        ORDER BY m.mes
+    """, {"inicio": inicio, "fim": fim, "meses": meses})
+
+def iter_monthly_totals(inicio=None, fim=None, previous_month_total=0, previous_savings=0):
+    """
+    Gera (mês, ano, totais, total do mês anterior) para cada mês com
+    lançamentos, lendo os totais agregados de ResumoMensal em vez das
+    movimentações linha a linha. Os saldos iniciais são os do mês anterior a inicio.
+    """
+    with get_connection() as conn, conn.cursor() as cursor:
+        _fetch_monthly_summaries(cursor, inicio, fim)
+        summaries = cursor.fetchall()
+
+    for mes, totals, previous in ledger.iter_totals_by_id(summaries, dimensions.nomes_por_id(),
+                                                          previous_month_total, previous_savings):
+        yield mes.month, mes.year, totals, previous
+
+def iter_rows_totals(rows, previous_month_total=0, previous_savings=0):
+    """
+    Calcula os totais mês a mês a partir de um fluxo de movimentações em ordem
+    de data, como o de iter_movimentacoes, sem guardar as linhas de um mês.
+    Gera (mês, ano, totais, total do mês anterior), como iter_monthly_totals;
+    serve para totais filtrados, que ResumoMensal não agrega.
+    """
+    for (year, month), month_rows in groupby(rows, key=_row_month):
+        totals = VisualizationDialog.calculate_totals(month_rows, previous_month_total, previous_savings)
+        yield month, year, totals, previous_month_total
+
+        previous_month_total = totals["Total do Mês"]
+        previous_savings = totals["Poupança"]["Total"]
+
+class MonthCache:
+    """
+    Cache de leitura por mês na frente de get_month_data e do carregamento da
+    visualização. Guarda as linhas de ResumoMensal e os totais de todos os
+    meses e as movimentações dos meses abertos por último.
+
+    Uma alteração descarta os meses a partir do primeiro mês avisado: na
+    leitura seguinte, apenas eles voltam ao banco, e os totais são refeitos
+    em memória a partir desse mês, pois cada mês parte do saldo do anterior.
+    """
+    def __init__(self, max_row_months=MONTH_CACHE_MAX_ROW_MONTHS):
+        self.max_row_months = max_row_months
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dirty_from = None  # primeiro mês alterado desde a última leitura dos totais
+        self._summaries = {}  # mês -> linhas de resumo (mes, pessoa_id, tipo_id, pagamento_id, valor_total, valor_abs)
+        self._totals = []  # (mês, totais, total do mês anterior), em ordem cronológica
+        self._months = []  # os meses de _totals, na mesma ordem
+        self._positions = {}  # mês -> posição em _totals
+        self._rows = OrderedDict()  # mês -> movimentações, do uso mais antigo ao mais recente
+        self._generation = 0  # número de invalidações, para descartar leituras concorrentes
+        self._stats = {"row_hits": 0, "row_misses": 0, "summary_months_fetched": 0}
+
+    def _refresh(self):
+        if self._loaded and self._dirty_from is None:
+            return
+
+        inicio = self._dirty_from if self._loaded else None
+        with get_connection() as conn, conn.cursor() as cursor:
+            _fetch_monthly_summaries(cursor, inicio=inicio)
+            rows = cursor.fetchall()
+
+        for mes in [mes for mes in self._summaries if inicio is None or mes >= inicio]:
+            del self._summaries[mes]
+        meses = 0
+        for mes, linhas in groupby(rows, key=lambda row: row[0]):
+            self._summaries[mes] = list(linhas)
+            meses += 1
+        self._stats["summary_months_fetched"] += meses
+        self._loaded = True
+        self._dirty_from = None
+
+        # Os totais anteriores ao primeiro mês alterado continuam valendo
+        position = 0 if inicio is None else self._position(inicio)
+        for mes in self._months[position:]:
+            del self._positions[mes]
+        del self._months[position:]
+        del self._totals[position:]
+        if self._totals:
+            _, totals, _ = self._totals[-1]
+            previous_month_total, previous_savings = totals["Total do Mês"], totals["Poupança"]["Total"]
+        else:
+            previous_month_total, previous_savings = 0, 0
+
+        summaries = chain.from_iterable(
+            self._summaries[mes] for mes in sorted(mes for mes in self._summaries if inicio is None or mes >= inicio)
+        )
+        for mes, totals, previous_month_total in ledger.iter_totals_by_id(
+            summaries, dimensions.nomes_por_id(), previous_month_total, previous_savings
+        ):
+            self._positions[mes] = len(self._totals)
+            self._months.append(mes)
+            self._totals.append((mes, totals, previous_month_total))
+
+    def _position(self, mes):
+        # Posição do primeiro mês >= mes em _totals: direta para um mês com
+        # lançamentos, por busca binária para os demais
+        position = self._positions.get(mes)
+        return position if position is not None else bisect_left(self._months, mes)
+
+    def iter_monthly_totals(self, inicio=None):
+        """
+        Gera (mês, ano, totais, total do mês anterior) para cada mês com
+        lançamentos a partir de inicio, como iter_monthly_totals, consultando
+        só os meses alterados desde a última chamada.
+        """
+        with self._lock:
+            self._refresh()
+            position = 0 if inicio is None else self._position(inicio)
+            totals = self._totals[position:]
+        for mes, month_totals, previous_month_total in totals:
+            yield mes.month, mes.year, month_totals, previous_month_total
+
+    def opening_balance(self, month, year):
+        """
+        Retorna (total do mês anterior, poupança anterior) com que o mês abre:
+        o fechamento do último mês com lançamentos antes dele. Com o cache em
+        dia, um mês com lançamentos é achado em O(1).
+        """
+        mes = date(int(year), int(month), 1)
+        with self._lock:
+            self._refresh()
+            position = self._position(mes)
+            if position == 0:
+                return 0, 0
+            _, totals, _ = self._totals[position - 1]
+            return totals["Total do Mês"], totals["Poupança"]["Total"]
+
+    def _cached_rows(self, mes):
+        with self._lock:
+            rows = self._rows.get(mes)
+            if rows is None:
+                self._stats["row_misses"] += 1
+                return None, self._generation
+            self._rows.move_to_end(mes)
+            self._stats["row_hits"] += 1
+            return rows, None
+
+    def _store_rows(self, mes, version, rows):
+        with self._lock:
+            # Uma leitura feita enquanto os dados mudavam não é guardada
+            if version != self._generation:
+                return
+            self._rows[mes] = rows
+            self._rows.move_to_end(mes)
+            while len(self._rows) > self.max_row_months:
+                self._rows.popitem(last=False)
+
+    def iter_row_batches(self, month, year, batch_size=VISUALIZATION_ROW_BATCH):
+        """
+        Gera as movimentações do mês em listas de até batch_size linhas, como
+        iter_month_row_batches, guardando o mês no cache quando a leitura
+        chega ao fim.
+        """
+        mes = date(int(year), int(month), 1)
+        rows, version = self._cached_rows(mes)
+        if rows is not None:
+            for inicio in range(0, len(rows), batch_size):
+                yield rows[inicio:inicio + batch_size]
+            return
+
+        rows = []
+        for batch in iter_month_row_batches(month, year, batch_size):
+            rows.extend(batch)
+            yield batch
+        self._store_rows(mes, version, rows)
+
+    def month_rows(self, month, year):
+        """
+        Retorna uma cópia das movimentações do mês.
+        """
+        return [row for batch in self.iter_row_batches(month, year, MOVIMENTACOES_BATCH_SIZE) for row in batch]
+
+    def invalidate(self, months=None):
+        """
+        Descarta os meses a partir do primeiro mês informado (todos, se None).
+        """
+        if months is not None and not months:
+            return
+        with self._lock:
+            self._generation += 1
+            if months is None:
+                self._loaded = False
+                self._dirty_from = None
+                self._summaries.clear()
+                self._totals.clear()
+                self._months.clear()
+                self._positions.clear()
+                self._rows.clear()
+                return
+            inicio = months[0]
+            for mes in [mes for mes in self._rows if mes >= inicio]:
+                del self._rows[mes]
+            if self._loaded and (self._dirty_from is None or inicio < self._dirty_from):
+                self._dirty_from = inicio
+
+    def stats(self):
+        """
+        Retorna os acertos e faltas das movimentações e quantos meses de
+        resumo foram consultados no banco.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["row_months"] = len(self._rows)
+            stats["summary_months"] = len(self._summaries)
+        return stats
+
+month_cache = MonthCache()
+add_data_change_listener(month_cache.invalidate)
+
+class DatabaseChangeListener:
+    """
+    Escuta (LISTEN) as notificações dos gatilhos de Movimentacoes e
+    Recorrencias e repassa aos ouvintes de alteração de dados o que outros
+    processos gravaram, como uma importação de extrato ou outra instância do
+    programa. As gravações das conexões deste processo já avisam pelo
+    caminho de gravação e são ignoradas.
+    """
+    def __init__(self, channel=CHANGE_NOTIFY_CHANNEL):
+        self.channel = channel
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def _listen(self):
+        conn = connect_to_database()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.channel}")
+        return conn
+
+    def _dispatch(self, notifies):
+        pids = get_pool().backend_pids()
+        meses = set()
+        for notify in notifies:
+            if notify.pid in pids:
+                continue
+            if notify.payload == "*":
+                _notify_data_changed(None)
+                return
+            meses.update(datetime.strptime(mes, "%Y-%m").date() for mes in notify.payload.split(","))
+        if meses:
+            _notify_data_changed(meses)
+
+    def _run(self):
+        import select
+        conn = None
+        connected_before = False
+        while not self._stopping.is_set():
+            try:
+                if conn is None:
+                    conn = self._listen()
+                    # Avisos perdidos enquanto a conexão esteve fora: qualquer mês pode ter mudado
+                    if connected_before:
+                        _notify_data_changed(None)
+                    connected_before = True
+
+                if select.select([conn], [], [], 1.0) == ([], [], []):
+                    continue
+                conn.poll()
+                notifies = list(conn.notifies)
+                del conn.notifies[:]
+                self._dispatch(notifies)
+
+            except Exception as e:
+                print(f"Erro ao escutar alterações do banco: {str(e)}")
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+                self._stopping.wait(CHANGE_LISTENER_RETRY)
+
+        if conn is not None:
+            conn.close()
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="ouvinte_alteracoes", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=2):
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join(timeout)
+            self._thread = None
+
+change_listener = DatabaseChangeListener()
+
+def empty_totals(previous_month_total=0, previous_savings=0, pessoas=None):
+    """
+    Retorna a estrutura de totais de um mês zerada, com uma entrada para
+    cada pessoa informada (por padrão, as cadastradas).
+    """
+    return ledger.empty_totals(previous_month_total, previous_savings, get_pessoas() if pessoas is None else pessoas)
+
+def get_month_totals(data, previous_month_total=None, previous_savings=None):
+    """
+    Calcula os totais do mês a partir dos dados fornecidos, que podem ser uma
+    lista ou um fluxo de linhas. Saldos anteriores não informados são obtidos
+    do cache de meses pelo mês das linhas.
+    """
+    data = iter(data)
+    first = next(data, None)
+    if first is not None:
+        data = chain((first,), data)
+
+    if (previous_month_total is None or previous_savings is None) and first is not None:
+        cached_total, cached_savings = get_opening_balance(first[0].month, first[0].year)
+        previous_month_total = cached_total if previous_month_total is None else previous_month_total
+        previous_savings = cached_savings if previous_savings is None else previous_savings
+    previous_month_total = previous_month_total or 0
+    previous_savings = previous_savings or 0
+
+    totals = empty_totals(0, previous_savings)
 
     for record in data:
         _, _, valor, tipo, pessoa, pagamento, _, _ = record
 
         if tipo in ["Recebimento", "Salário"]:
             totals["Entradas"]["Total"] += valor
-            if pessoa in ["Yuri", "Marcos"]:
-                totals["Entradas"][pessoa] += valor
+            add_to_person(totals["Entradas"], pessoa, valor)
 
         elif tipo in ["Conta", "Compra"]:
             totals["Saídas"]["Total"] += valor
-            if pessoa in ["Yuri", "Marcos"]:
-                totals["Saídas"][pessoa] += valor
+            add_to_person(totals["Saídas"], pessoa, valor)
 
         elif tipo == "Poupança":
             totals["Poupança"]["Total"] += valor
 
-        if pagamento == "Crédito" and pessoa in ["Yuri", "Marcos"]:
-            totals["Crédito"][pessoa] += valor
+        if pagamento == "Crédito":
+            add_to_person(totals["Crédito"], pessoa, valor)
 
     totals["Total do Mês"] = previous_month_total + totals["Entradas"]["Total"] + totals["Saídas"]["Total"]
 
     return totals
 
 class StyleHelper:
+    """
+    Folha de estilos do aplicativo, aplicada uma única vez na aplicação
+    inteira. Os widgets não recebem folhas próprias (o Qt analisaria o CSS a
+    cada chamada); eles são escolhidos pelos seletores, em geral pela
+    propriedade "class".
+    """
+    _styled_app = None
+
     @staticmethod
     def get_button_style():
         return """
-            QPushButton {
+            QPushButton[class="principal"] {
                 background-color: purple;
                 color: black;
                 border-radius: 5px;
@@ -377,7 +1695,7 @@ class StyleHelper:
                 font-size: 14px;
                 font-weight: bold;
             }
-            QPushButton:hover {
+            QPushButton[class="principal"]:hover {
                 background-color: #E0B0FF;
             }
         """
@@ -399,50 +1717,170 @@ class StyleHelper:
     @staticmethod
     def get_table_style():
         return """
-            QTableWidget {
+            QTableView {
                 border: 2px solid purple;
                 gridline-color: purple;
                 alternate-background-color: #E6D5F2;  /* Tom mais forte de roxo claro */
                 background-color: white;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
                 border-bottom: 1px solid #D8BFD8;  /* Linha mais visível entre as células */
             }
-            QHeaderView::section {
+            QTableView QHeaderView::section {
                 background-color: purple;
                 color: white;
                 padding: 8px;
                 border: 1px solid #E0B0FF;
                 font-weight: bold;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #D8BFD8;
                 color: black;
             }
         """
 
+    @staticmethod
+    def get_tab_style():
+        return """
+            QTabWidget::pane {
+                border: 1px solid purple;
+            }
+            QTabBar::tab {
+                background: purple;
+                color: white;
+                padding: 8px;
+                margin: 2px;
+            }
+            QTabBar::tab:selected {
+                background: #E0B0FF;
+                color: black;
+            }
+        """
+
     @staticmethod
     def get_summary_style():
         return """
-            QFrame {
+            QFrame[class="resumo"], QFrame[class="resumo"] QLabel {
                 background-color: white;
                 border: 2px solid purple;
                 border-radius: 5px;
                 margin: 5px;
                 padding: 10px;
             }
-            QLabel {
+            QFrame[class="resumo"] QLabel {
                 color: black;
                 padding: 5px;
                 font-size: 12px;
             }
-            QLabel[class="title"] {
+            QFrame[class="resumo"] QLabel[class="title"] {
                 font-weight: bold;
                 font-size: 14px;
                 color: purple;
             }
+            QFrame[class="resumo"] QLabel[sinal="positivo"] {
+                color: green;
+                font-weight: bold;
+            }
+            QFrame[class="resumo"] QLabel[sinal="negativo"] {
+                color: red;
+                font-weight: bold;
+            }
+            QFrame[class="resumo"] QLabel[sinal="neutro"] {
+                color: black;
+                font-weight: bold;
+            }
+        """
+
+    @staticmethod
+    def get_status_style():
+        return """
+            QLabel[class="erro"] {
+                color: red;
+                font-weight: bold;
+            }
+        """
+
+    @staticmethod
+    def get_application_style():
+        return "".join([
+            StyleHelper.get_button_style(),
+            StyleHelper.get_input_style(),
+            StyleHelper.get_table_style(),
+            StyleHelper.get_tab_style(),
+            StyleHelper.get_summary_style(),
+            StyleHelper.get_status_style(),
+        ])
+
+    @staticmethod
+    def apply_application_style():
+        """
+        Aplica a folha de estilos na QApplication atual, se ainda não aplicada.
         """
+        app = QApplication.instance()
+        if app is not None and StyleHelper._styled_app is not app:
+            app.setStyleSheet(StyleHelper.get_application_style())
+            StyleHelper._styled_app = app
+
+    @staticmethod
+    def set_class(widget, classe):
+        """
+        Troca a propriedade "class" de um widget já exibido, reaplicando a
+        folha de estilos da aplicação a ele.
+        """
+        widget.setProperty("class", classe)
+        widget.style().unpolish(widget)
+        widget.style().polish(widget)
+
+class WorkerSignals(QObject):
+    """
+    Sinais emitidos por um Worker. Como o objeto pertence à thread da
+    interface, os slots conectados rodam nela, e não na thread do pool.
+    """
+    result = pyqtSignal(object)
+    progress = pyqtSignal(object)
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+class ChangeSignals(QObject):
+    """
+    Repassa à thread da interface avisos de mudança (da fila de gravações ou
+    dos dados) que podem chegar de outras threads.
+    """
+    changed = pyqtSignal(object)
+
+class Worker(QRunnable):
+    """
+    Executa uma função em uma thread do QThreadPool. Se a função for um
+    gerador, cada item produzido é emitido em progress assim que fica pronto.
+    """
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+            if isinstance(result, GeneratorType):
+                for item in result:
+                    if self.cancelled:
+                        result.close()
+                        break
+                    self.signals.progress.emit(item)
+                result = None
+            if not self.cancelled:
+                self.signals.result.emit(result)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        finally:
+            self.signals.finished.emit()
 
 class RegisterDialog(QDialog):
     def __init__(self, title, fields, save_function, parent=None):
@@ -462,7 +1900,6 @@ class RegisterDialog(QDialog):
             label.setFont(QFont("Arial", 12))
             input_field = QLineEdit()
             input_field.setPlaceholderText(placeholder)
-            input_field.setStyleSheet(StyleHelper.get_input_style())
             
             field_layout.addWidget(label)
             field_layout.addWidget(input_field)
@@ -470,28 +1907,62 @@ class RegisterDialog(QDialog):
             
             self.fields[field_name] = input_field
 
-        save_button = QPushButton("Salvar")
-        save_button.setStyleSheet(StyleHelper.get_button_style())
-        save_button.clicked.connect(self.save)
-        layout.addWidget(save_button)
+        self.save_button = QPushButton("Salvar")
+        self.save_button.setProperty("class", "principal")
+        self.save_button.clicked.connect(self.save)
+        layout.addWidget(self.save_button)
 
         self.setLayout(layout)
 
     def save(self):
+        # Os campos são validados aqui; a gravação vai para a fila local e
+        # segue para o banco em segundo plano, então a janela fecha na hora
+        field_values = {name: field.text() for name, field in self.fields.items()}
         try:
-            field_values = {name: field.text() for name, field in self.fields.items()}
             self.save_function(field_values)
-            QMessageBox.information(self, "Sucesso", "Registro salvo com sucesso!")
-            self.accept()
         except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao salvar: {str(e)}")
+            self.on_save_error(str(e))
+            return
+        self.accept()
+
+    def on_save_error(self, message):
+        QMessageBox.critical(self, "Erro", f"Erro ao salvar: {message}")
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, write_queue=None, profile_startup=False):
         super().__init__()
         self.setWindowTitle("Controle Financeiro")
+        StyleHelper.apply_application_style()
+        self.write_queue = write_queue or get_write_queue()
+        self.failures_seen = set()
         self.setup_ui()
 
+        self.queue_signals = ChangeSignals()
+        self.queue_signals.changed.connect(self.on_write_queue_changed)
+        self.emit_queue_change = self.queue_signals.changed.emit
+        self.write_queue.add_listener(self.emit_queue_change)
+        self.on_write_queue_changed(self.write_queue.status())
+
+        # A fila, o ouvinte e o pré-aquecimento só começam com a janela na tela
+        self.profile_startup = profile_startup
+        self.closed = False
+        QTimer.singleShot(0, self.start_background_tasks)
+
+    def start_background_tasks(self):
+        if self.closed:
+            return
+        if self.profile_startup:
+            mark_startup("exibir a janela")
+        self.write_queue.start()
+        change_listener.start()
+        self.prewarm_worker = Worker(prewarm)
+        self.prewarm_worker.signals.result.connect(self.on_prewarmed)
+        QThreadPool.globalInstance().start(self.prewarm_worker)
+
+    def on_prewarmed(self, tempos):
+        if self.profile_startup:
+            print(startup_report(tempos))
+
     def setup_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -517,10 +1988,68 @@ class MainWindow(QMainWindow):
 
         for text, callback in buttons_data:
             button = QPushButton(text)
-            button.setStyleSheet(StyleHelper.get_button_style())
+            button.setProperty("class", "principal")
             button.clicked.connect(callback)
             layout.addWidget(button)
 
+        # Situação da fila de gravações
+        self.queue_label = QLabel()
+        self.queue_errors_button = QPushButton("Ver erros")
+        self.queue_errors_button.clicked.connect(self.show_write_failures)
+        self.queue_retry_button = QPushButton("Tentar novamente")
+        self.queue_retry_button.clicked.connect(lambda: self.write_queue.retry())
+        self.statusBar().addWidget(self.queue_label, 1)
+        self.statusBar().addPermanentWidget(self.queue_errors_button)
+        self.statusBar().addPermanentWidget(self.queue_retry_button)
+
+    def on_write_queue_changed(self, estado):
+        pendentes, falhas, erro_conexao = estado["pendentes"], estado["falhas"], estado["erro_conexao"]
+        if falhas:
+            texto = f"{len(falhas)} registro(s) não gravado(s)"
+        elif pendentes and erro_conexao:
+            texto = f"{pendentes} registro(s) aguardando o banco de dados"
+        elif pendentes:
+            texto = f"Gravando {pendentes} registro(s)..."
+        else:
+            texto = ""
+        self.queue_label.setText(texto)
+        self.queue_label.setToolTip(erro_conexao or "")
+        self.queue_errors_button.setVisible(bool(falhas))
+        self.queue_retry_button.setVisible(bool(falhas) or bool(pendentes and erro_conexao))
+
+        # Avisa uma única vez de cada registro recusado pelo banco
+        novas = {falha[0] for falha in falhas} - self.failures_seen
+        self.failures_seen = {falha[0] for falha in falhas}
+        if novas:
+            self.show_write_failures()
+
+    def show_write_failures(self):
+        falhas = self.write_queue.status()["falhas"]
+        if not falhas:
+            return
+        detalhes = "\n".join(f"{rotulo} de {criado:%d/%m/%Y %H:%M}: {erro}" for _, rotulo, criado, erro in falhas)
+        box = QMessageBox(QMessageBox.Icon.Warning, "Registros não gravados",
+                          f"{len(falhas)} registro(s) foram recusados pelo banco de dados.", parent=self)
+        box.setInformativeText(detalhes)
+        retry = box.addButton("Tentar novamente", QMessageBox.ButtonRole.AcceptRole)
+        discard = box.addButton("Descartar", QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton("Fechar", QMessageBox.ButtonRole.RejectRole)
+        box.exec()
+
+        ids = [falha[0] for falha in falhas]
+        if box.clickedButton() is retry:
+            self.write_queue.retry(ids)
+        elif box.clickedButton() is discard:
+            self.write_queue.discard(ids)
+
+    def closeEvent(self, event):
+        # O que não for gravado agora fica na fila para a próxima execução
+        self.closed = True
+        self.write_queue.remove_listener(self.emit_queue_change)
+        self.write_queue.stop()
+        change_listener.stop()
+        super().closeEvent(event)
+
     def open_register_compra(self):
         fields = [
             ("Descrição", "Digite a descrição"),
@@ -591,90 +2120,84 @@ class MainWindow(QMainWindow):
 
     def save_compra(self, field_values):
         try:
-            result = save_compra(
+            self.write_queue.enqueue(
+                "compra",
                 field_values["Descrição"],
-                float(field_values["Valor"]),
+                Centavos.from_reais(field_values["Valor"]),
                 field_values["Pessoa"].capitalize(),
                 field_values["Pagamento"].capitalize(),
                 int(field_values["Parcelas"]) if field_values["Pagamento"].capitalize() == "Crédito" else 1
             )
-            if not result:
-                raise Exception("Erro ao salvar compra")
         except Exception as e:
             raise Exception(f"Erro ao registrar a compra: {str(e)}")
 
     def save_conta(self, field_values):
         try:
-            result = save_conta(
+            self.write_queue.enqueue(
+                "conta",
                 field_values["Descrição"],
                 field_values["Pessoa"].capitalize(),
-                int(field_values["Dia Vencimento"]),
-                float(field_values["Valor"]),
+                parse_dia(field_values["Dia Vencimento"], datetime.now()),
+                Centavos.from_reais(field_values["Valor"]),
                 int(field_values["Frequência"]),
                 field_values["Pagamento"].capitalize()
             )
-            if not result:
-                raise Exception("Erro ao salvar conta")
         except Exception as e:
             raise Exception(f"Erro ao registrar a conta: {str(e)}")
 
     def save_salario(self, field_values):
         try:
-            result = save_salario(
-                float(field_values["Valor"]),
-                int(field_values["Dia"]),
+            self.write_queue.enqueue(
+                "salario",
+                Centavos.from_reais(field_values["Valor"]),
+                parse_dia(field_values["Dia"]),
                 field_values["Pessoa"].capitalize()
             )
-            if not result:
-                raise Exception("Erro ao salvar salário")
         except Exception as e:
             raise Exception(f"Erro ao registrar o salário: {str(e)}")
 
     def save_recebimento(self, field_values):
         try:
-            result = save_recebimento(
-                float(field_values["Valor"]),
-                int(field_values["Dia"]),
+            self.write_queue.enqueue(
+                "recebimento",
+                Centavos.from_reais(field_values["Valor"]),
+                parse_dia(field_values["Dia"], datetime.now()),
                 field_values["Descrição"],
                 int(field_values["Frequência"]),
                 field_values["Pessoa"].capitalize()
             )
-            if not result:
-                raise Exception("Erro ao registrar o recebimento")
         except Exception as e:
             raise Exception(f"Erro ao registrar o recebimento: {str(e)}")
 
     def save_poupanca(self, field_values):
         try:
-            result = save_poupanca(
-                float(field_values["Valor"]),
+            self.write_queue.enqueue(
+                "poupanca",
+                Centavos.from_reais(field_values["Valor"]),
                 field_values["Descrição"]
             )
-            if not result:
-                raise Exception("Erro ao registrar a poupança")
         except Exception as e:
             raise Exception(f"Erro ao registrar a poupança: {str(e)}")
 
     def save_retirada(self, field_values):
         try:
-            result = save_retirada(
-                float(field_values["Valor"]),
+            self.write_queue.enqueue(
+                "retirada",
+                Centavos.from_reais(field_values["Valor"]),
                 field_values["Descrição"]
             )
-            if not result:
-                raise Exception("Erro ao registrar a retirada")
         except Exception as e:
             raise Exception(f"Erro ao registrar a retirada: {str(e)}")
 
     def save_limite(self, field_values):
         try:
-            result = save_limite(
+            parse_mes_ano(field_values["Mês/Ano"])
+            self.write_queue.enqueue(
+                "limite",
                 field_values["Pessoa"].capitalize(),
                 field_values["Mês/Ano"],
-                float(field_values["Valor"])
+                Centavos.from_reais(field_values["Valor"])
             )
-            if not result:
-                raise Exception("Erro ao definir o limite")
         except Exception as e:
             raise Exception(f"Erro ao definir o limite: {str(e)}")
 
@@ -682,218 +2205,597 @@ class MainWindow(QMainWindow):
         dialog = VisualizationDialog(self)
         dialog.exec()
 
-class VisualizationDialog(QDialog):
+class MovimentacoesTableModel(QAbstractTableModel):
+    """
+    Modelo de tabela sobre as linhas de movimentações de um mês. Os valores
+    são formatados apenas quando a view pede uma célula visível.
+    """
+    HEADERS = ["Data", "Descrição", "Valor", "Tipo", "Pessoa", "Pagamento", "Parcela", "Total Parcelas"]
+    VALUE_COLUMN = 2
+    TYPE_COLUMN = 3
+    ROW_HEIGHT = 30
+    SAMPLE_SIZE = 50
+
+    ROW_COLORS = {
+        "Poupança": QColor("#E6F3FF"),  # Azul claro
+        "Retirada": QColor("#FFF3E6")  # Laranja claro
+    }
+    POSITIVE_COLOR = QColor("green")
+    NEGATIVE_COLOR = QColor("red")
+
+    def __init__(self, rows, parent=None):
+        super().__init__(parent)
+        self.rows = rows
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def replace_rows(self, rows):
+        """
+        Troca todas as linhas da tabela, mantendo a view e suas configurações.
+        """
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """
+        Acrescenta ao fim da tabela as linhas que chegaram depois da construção.
+        """
+        if not rows:
+            return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.rows[index.row()]
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.format_value(record[column], column)
+        if role == Qt.ItemDataRole.ForegroundRole and column == self.VALUE_COLUMN and record[column] is not None:
+            return self.NEGATIVE_COLOR if record[column] < 0 else self.POSITIVE_COLOR
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return self.ROW_COLORS.get(record[self.TYPE_COLUMN])
+        return None
+
+    def format_value(self, value, column):
+        if value is None:
+            return ""
+        if isinstance(value, (date, datetime)):
+            return value.strftime("%d/%m/%Y")
+        if column == self.VALUE_COLUMN:
+            return format_centavos(value)
+        return str(value)
+
+    def resize_columns_from_sample(self, view):
+        """
+        Ajusta a largura das colunas medindo o cabeçalho e as primeiras linhas,
+        em vez de todas as células.
+        """
+        metrics = view.fontMetrics()
+        header = view.horizontalHeader()
+        sample = self.rows[:self.SAMPLE_SIZE]
+        for column, title in enumerate(self.HEADERS):
+            texts = [title] + [self.format_value(record[column], column) for record in sample]
+            width = max(metrics.horizontalAdvance(text) for text in texts)
+            header.resizeSection(column, width + 32)
+
+class SummaryPanel(QWidget):
+    """
+    Resumo financeiro de um mês em cinco quadros com rótulos fixos, criados
+    uma única vez e atualizados com setText. Cada pessoa ganha sua linha na
+    primeira vez em que aparece; as linhas de pessoas ausentes no mês ficam
+    ocultas. As cores vêm da folha de estilos da aplicação, pela propriedade
+    "sinal" de cada rótulo.
+    """
+    FRAMES = [
+        ("Poupança", ["Total"]),
+        ("Entradas", ["Total"]),
+        ("Saídas", ["Total"]),
+        ("Crédito", []),
+        ("Total", ["Mês Anterior", "Mês Atual"])
+    ]
+    PERSON_GROUPS = ("Entradas", "Saídas", "Crédito")
+    NEGATIVE_GROUPS = ("Saídas", "Crédito")  # sempre exibidos como negativos
+
     def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        self.frames = {}
+        self.labels = {}  # (quadro, chave) -> rótulo do valor
+
+        for title, keys in self.FRAMES:
+            frame = QFrame()
+            frame.setProperty("class", "resumo")
+            frame_layout = QVBoxLayout(frame)
+
+            title_label = QLabel(title)
+            title_label.setProperty("class", "title")
+            title_label.setFont(QFont("Arial", 12, QFont.Weight.Bold))
+            frame_layout.addWidget(title_label)
+
+            self.frames[title] = frame
+            for key in keys:
+                self.add_label(title, key)
+            layout.addWidget(frame)
+
+    def add_label(self, title, key):
+        label = QLabel()
+        label.setProperty("sinal", "neutro")
+        frame_layout = self.frames[title].layout()
+        # Linhas de pessoas ficam antes da linha de total do quadro
+        if (title, "Total") in self.labels:
+            frame_layout.insertWidget(frame_layout.count() - 1, label)
+        else:
+            frame_layout.addWidget(label)
+        self.labels[(title, key)] = label
+        return label
+
+    def set_value(self, title, key, value):
+        label = self.labels.get((title, key)) or self.add_label(title, key)
+        if title in self.NEGATIVE_GROUPS:
+            texto, sinal = f"{key}: {format_centavos(-abs(value))}", "negativo"
+        else:
+            texto = f"{key}: {format_centavos(abs(value))}"
+            sinal = "positivo" if value > 0 else "negativo" if value < 0 else "neutro"
+
+        label.setText(texto)
+        if label.property("sinal") != sinal:
+            label.setProperty("sinal", sinal)
+            label.style().unpolish(label)
+            label.style().polish(label)
+        label.setVisible(True)
+
+    def set_totals(self, totals, previous_month_total):
+        """
+        Mostra os totais de um mês, com uma linha por pessoa presente em
+        qualquer grupo.
+        """
+        pessoas = [
+            pessoa for pessoa in dict.fromkeys([*totals["Entradas"], *totals["Saídas"], *totals["Crédito"]])
+            if pessoa != "Total"
+        ]
+        for (title, key), label in self.labels.items():
+            if title in self.PERSON_GROUPS and key != "Total" and key not in pessoas:
+                label.setVisible(False)
+
+        self.set_value("Poupança", "Total", totals["Poupança"]["Total"])
+        for title in self.PERSON_GROUPS:
+            for pessoa in pessoas:
+                self.set_value(title, pessoa, totals[title].get(pessoa, 0))
+        self.set_value("Entradas", "Total", totals["Entradas"]["Total"])
+        self.set_value("Saídas", "Total", totals["Saídas"]["Total"])
+        self.set_value("Total", "Mês Anterior", previous_month_total)
+        self.set_value("Total", "Mês Atual", totals["Total do Mês"])
+
+class VisualizationDialog(QDialog):
+    def __init__(self, parent=None, max_built_tabs=VISUALIZATION_MAX_BUILT_TABS):
         super().__init__(parent)
         self.setWindowTitle("Visualizar Dados")
         self.setMinimumSize(1200, 800)
+        StyleHelper.apply_application_style()
+        self.max_built_tabs = max(1, max_built_tabs)
+        self.months = []  # em ordem cronológica, na mesma ordem das abas
+        self.months_by_key = {}  # mês (data no dia 1) -> informações do mês
+        self.built_tabs = OrderedDict()  # meses das abas construídas, do uso mais antigo ao mais recente
+        self.row_loaders = {}  # mês -> worker buscando as movimentações da aba
+        self.refresher = None
+        self.pending_changes = []  # meses alterados ainda não atualizados (None: todos)
         self.setup_ui()
+
+        # Gravações feitas com o diálogo aberto atualizam só os meses afetados
+        # (o mesmo objeto emit é guardado: cada acesso a changed.emit cria outro)
+        self.change_signals = ChangeSignals()
+        self.change_signals.changed.connect(self.on_data_changed)
+        self.emit_change = self.change_signals.changed.emit
+        add_data_change_listener(self.emit_change)
         self.load_data()
 
     def setup_ui(self):
         layout = QVBoxLayout()
+
+        # Resumo do mês da aba atual, único para todas as abas
+        self.summary_panel = SummaryPanel()
+        self.summary_panel.hide()
+        layout.addWidget(self.summary_panel)
+
         self.tab_widget = QTabWidget()
-        self.tab_widget.setStyleSheet("""
-            QTabWidget::pane {
-                border: 1px solid purple;
-            }
-            QTabBar::tab {
-                background: purple;
-                color: white;
-                padding: 8px;
-                margin: 2px;
-            }
-            QTabBar::tab:selected {
-                background: #E0B0FF;
-                color: black;
-            }
-        """)
         layout.addWidget(self.tab_widget)
+
+        # Indicador de progresso do carregamento em segundo plano
+        status_layout = QHBoxLayout()
+        self.status_label = QLabel("Carregando meses...")
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setMaximumWidth(200)
+        status_layout.addWidget(self.status_label)
+        status_layout.addStretch()
+        status_layout.addWidget(self.progress_bar)
+        layout.addLayout(status_layout)
+
         self.setLayout(layout)
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
 
-    def load_data(self):
-        try:
-            conn = connect_to_database()
-            cursor = conn.cursor()
+    @staticmethod
+    def load_months():
+        """
+        Lê os totais de todos os meses pelo cache de meses, gerando (mês, ano,
+        totais, total do mês anterior). Roda fora da thread da interface; as
+        movimentações de cada mês só são buscadas quando a aba é aberta.
+        """
+        yield from month_cache.iter_monthly_totals()
 
-            cursor.execute("""
-                SELECT DISTINCT EXTRACT(MONTH FROM data), EXTRACT(YEAR FROM data)
-                FROM Movimentacoes
-                ORDER BY 2, 1
-            """)
-            months_years = cursor.fetchall()
-
-            previous_month_total = 0
-            previous_savings = 0
-
-            for month, year in months_years:
-                tab = QWidget()
-                tab_layout = QVBoxLayout()
-                
-                # Resumo financeiro no topo
-                totals_widget = QWidget()
-                totals_layout = QHBoxLayout()
-                
-                # Dados do mês
-                cursor.execute("""
-                    SELECT data, descricao, valor, tipo, pessoa, pagamento, parcela_atual, total_parcelas
-                    FROM Movimentacoes
-                    WHERE EXTRACT(MONTH FROM data) = %s AND EXTRACT(YEAR FROM data) = %s
-                    ORDER BY data
-                """, (month, year))
-                data = cursor.fetchall()
-                
-                # Cálculo dos totais
-                totals = self.calculate_totals(data, previous_month_total, previous_savings)
-                
-                # Criação dos frames de totais
-                frames_data = [
-                    ("Poupança", {"Total": totals["Poupança"]["Total"]}),
-                    ("Entradas", {
-                        "Yuri": totals["Entradas"]["Yuri"],
-                        "Marcos": totals["Entradas"]["Marcos"],
-                        "Total": totals["Entradas"]["Total"]
-                    }),
-                    ("Saídas", {
-                        "Yuri": totals["Saídas"]["Yuri"],
-                        "Marcos": totals["Saídas"]["Marcos"],
-                        "Total": totals["Saídas"]["Total"]
-                    }),
-                    ("Crédito", {
-                        "Yuri": totals["Crédito"]["Yuri"],
-                        "Marcos": totals["Crédito"]["Marcos"]
-                    }),
-                    ("Total", {
-                        "Mês Anterior": previous_month_total,
-                        "Mês Atual": totals["Total do Mês"]
-                    })
-                ]
-                
-                for title, values in frames_data:
-                    frame = QFrame()
-                    frame.setStyleSheet(StyleHelper.get_summary_style())
-                    frame_layout = QVBoxLayout()
-                    
-                    title_label = QLabel(title)
-                    title_label.setProperty("class", "title")
-                    title_label.setFont(QFont("Arial", 12, QFont.Weight.Bold))
-                    frame_layout.addWidget(title_label)
-                    
-                    for key, value in values.items():
-                        if title in ["Saídas", "Crédito"]:
-                            # Para saídas e crédito, mostra o valor como negativo
-                            color = "red"
-                            value_label = QLabel(f"{key}: R$ -{abs(value):,.2f}")
-                        else:
-                            # Para outros valores, mantém a lógica anterior
-                            color = "green" if value > 0 else "red" if value < 0 else "black"
-                            value_label = QLabel(f"{key}: R$ {abs(value):,.2f}")
-                        value_label.setStyleSheet(f"color: {color}; font-weight: bold;")
-                        frame_layout.addWidget(value_label)
-                    
-                    frame.setLayout(frame_layout)
-                    totals_layout.addWidget(frame)
-                
-                totals_widget.setLayout(totals_layout)
-                tab_layout.addWidget(totals_widget)
-                
-                # Tabela de movimentações
-                table = QTableWidget()
-                table.setStyleSheet(StyleHelper.get_table_style())
-                table.setAlternatingRowColors(True)
-                headers = ["Data", "Descrição", "Valor", "Tipo", "Pessoa", "Pagamento", "Parcela", "Total Parcelas"]
-                table.setColumnCount(len(headers))
-                table.setHorizontalHeaderLabels(headers)
-                table.setRowCount(len(data))
-                
-                for row, record in enumerate(data):
-                    # Define a cor de fundo baseada no tipo de movimentação
-                    row_color = None
-                    if record[3] == "Poupança":
-                        row_color = QColor("#E6F3FF")  # Azul claro
-                    elif record[3] == "Retirada":
-                        row_color = QColor("#FFF3E6")  # Laranja claro
-                    
-                    for col, value in enumerate(record):
-                        if isinstance(value, datetime):
-                            value = value.strftime("%d/%m/%Y")
-                            item = QTableWidgetItem(value)
-                        elif isinstance(value, float):
-                            value = f"R$ {value:,.2f}"
-                            item = QTableWidgetItem(value)
-                            if value.startswith("-"):
-                                item.setForeground(QColor("red"))
-                            else:
-                                item.setForeground(QColor("green"))
-                        else:
-                            item = QTableWidgetItem(str(value) if value is not None else "")
-                        
-                        if row_color:
-                            item.setBackground(row_color)
-                        
-                        table.setItem(row, col, item)
-                
-                # Ajusta o tamanho das colunas e linhas
-                table.resizeColumnsToContents()
-                table.resizeRowsToContents()
-                table.setShowGrid(True)
-                
-                # Define altura mínima para as linhas
-                for i in range(table.rowCount()):
-                    table.setRowHeight(i, 30)
-                
-                tab_layout.addWidget(table)
-                
-                tab.setLayout(tab_layout)
-                self.tab_widget.addTab(tab, f"{int(month):02d}/{int(year)}")
-                
-                previous_month_total = totals["Total do Mês"]
-                previous_savings = totals["Poupança"]["Total"]
-
-            cursor.close()
-            conn.close()
+    def load_data(self):
+        self.loader = Worker(self.load_months)
+        self.loader.signals.progress.connect(self.on_month_loaded)
+        self.loader.signals.error.connect(self.on_load_error)
+        self.loader.signals.finished.connect(self.on_load_finished)
+        QThreadPool.globalInstance().start(self.loader)
 
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao carregar dados: {str(e)}")
-
-    def calculate_totals(self, data, previous_month_total, previous_savings):
-        totals = {
-            "Poupança": {"Total": previous_savings},
-            "Entradas": {"Yuri": 0, "Marcos": 0, "Total": 0},
-            "Saídas": {"Yuri": 0, "Marcos": 0, "Total": 0},
-            "Crédito": {"Yuri": 0, "Marcos": 0},
-            "Total do Mês": previous_month_total
+    def add_month(self, month, year, totals, previous_month_total):
+        """
+        Cria a aba leve de um mês, preenchida apenas quando for selecionada,
+        na posição cronológica.
+        """
+        key = date(int(year), int(month), 1)
+        month_info = {
+            "key": key,
+            "month": month,
+            "year": year,
+            "data": None,
+            "model": None,
+            "table": None,
+            "tab": QWidget(),
+            "totals": totals,
+            "previous_month_total": previous_month_total
         }
+        month_info["tab"].setLayout(QVBoxLayout())
+
+        position = bisect_left([info["key"] for info in self.months], key)
+        self.months.insert(position, month_info)
+        self.months_by_key[key] = month_info
+        self.tab_widget.insertTab(position, month_info["tab"], f"{int(month):02d}/{int(year)}")
+
+    def remove_month(self, month_info):
+        key = month_info["key"]
+        worker = self.row_loaders.pop(key, None)
+        if worker is not None:
+            worker.cancel()
+        self.built_tabs.pop(key, None)
+        self.months.remove(month_info)
+        del self.months_by_key[key]
+        self.tab_widget.removeTab(self.tab_widget.indexOf(month_info["tab"]))
+        month_info["tab"].deleteLater()
+
+    def on_month_loaded(self, month_data):
+        self.add_month(*month_data)
+        self.status_label.setText(f"Carregando meses... {len(self.months)} carregados")
+
+    def on_load_error(self, message):
+        self.status_label.setText(f"Erro ao carregar dados: {message}")
+        StyleHelper.set_class(self.status_label, "erro")
+
+    def on_load_finished(self):
+        self.progress_bar.hide()
+        if self.status_label.text().startswith("Carregando"):
+            self.status_label.setText(f"{len(self.months)} meses carregados")
+        self.start_refresh()
+
+    def done(self, result):
+        # Interrompe o carregamento se o diálogo for fechado antes do fim
+        remove_data_change_listener(self.emit_change)
+        self.loader.cancel()
+        if self.refresher is not None:
+            self.refresher.cancel()
+        for worker in self.row_loaders.values():
+            worker.cancel()
+        super().done(result)
+
+    def on_data_changed(self, months):
+        """
+        Junta os meses alterados aos pendentes e os atualiza assim que não
+        houver outro carregamento de meses em andamento.
+        """
+        if months is None or self.pending_changes is None:
+            self.pending_changes = None
+        else:
+            self.pending_changes.extend(months)
+        if self.progress_bar.isHidden():
+            self.start_refresh()
 
-        for record in data:
-            _, _, valor, tipo, pessoa, pagamento, _, _ = record
+    @staticmethod
+    def load_changed_months(inicio):
+        """
+        Lê pelo cache de meses os totais a partir do primeiro mês alterado (de
+        todos, se None); os meses anteriores não mudam.
+        """
+        return list(month_cache.iter_monthly_totals(inicio))
 
-            if tipo in ["Recebimento", "Salário"]:
-                totals["Entradas"]["Total"] += valor
-                if pessoa in ["Yuri", "Marcos"]:
-                    totals["Entradas"][pessoa] += valor
-                totals["Total do Mês"] += valor
+    def start_refresh(self):
+        if self.refresher is not None or self.pending_changes == []:
+            return
+        changed = None if self.pending_changes is None else set(self.pending_changes)
+        self.pending_changes = []
 
-            elif tipo in ["Conta", "Compra"]:
-                totals["Saídas"]["Total"] += abs(valor)  # Valor absoluto para exibição
-                if pessoa in ["Yuri", "Marcos"]:
-                    totals["Saídas"][pessoa] += abs(valor)  # Valor absoluto para exibição
-                totals["Total do Mês"] += valor  # Mantém o sinal negativo para o total
+        self.refresher = Worker(self.load_changed_months, None if changed is None else min(changed))
+        self.refresher.signals.result.connect(lambda totals, changed=changed: self.apply_changes(changed, totals))
+        self.refresher.signals.error.connect(self.on_load_error)
+        self.refresher.signals.finished.connect(self.on_refresh_finished)
+        QThreadPool.globalInstance().start(self.refresher)
 
-            elif tipo == "Poupança":
-                totals["Poupança"]["Total"] += valor
-                totals["Total do Mês"] += valor
+    def on_refresh_finished(self):
+        self.refresher = None
+        self.start_refresh()
 
-            elif tipo == "Retirada":
-                totals["Poupança"]["Total"] -= abs(valor)
-                totals["Total do Mês"] -= abs(valor)
+    def apply_changes(self, changed, months_totals):
+        """
+        Atualiza no lugar os meses a partir do primeiro alterado: abas de
+        meses novos são inseridas e as de meses que ficaram vazios, removidas;
+        o resumo só é atualizado se os totais do mês atual mudaram, e as
+        tabelas desses meses são recarregadas. As abas anteriores, a aba
+        atual e a rolagem das tabelas ficam como estão.
+        """
+        inicio = None if changed is None else min(changed)
+        novos = {date(int(year), int(month), 1): (month, year, totals, previous_month_total)
+                 for month, year, totals, previous_month_total in months_totals}
+
+        for month_info in [info for info in self.months if inicio is None or info["key"] >= inicio]:
+            if month_info["key"] not in novos:
+                self.remove_month(month_info)
+
+        for key, (month, year, totals, previous_month_total) in novos.items():
+            month_info = self.months_by_key.get(key)
+            if month_info is None:
+                self.add_month(month, year, totals, previous_month_total)
+                continue
+
+            totals_changed = (month_info["totals"] != totals
+                              or month_info["previous_month_total"] != previous_month_total)
+            month_info["totals"] = totals
+            month_info["previous_month_total"] = previous_month_total
+            self.reload_rows(month_info)
+            if totals_changed and month_info is self.current_month():
+                self.summary_panel.set_totals(totals, previous_month_total)
+
+        self.status_label.setText(f"{len(self.months)} meses carregados")
+
+    def reload_rows(self, month_info):
+        """
+        Busca de novo as movimentações de um mês alterado. Se a aba estiver
+        construída, a tabela recebe as linhas novas sem ser recriada;
+        senão, o mês volta a ser carregado quando a aba for aberta.
+        """
+        key = month_info["key"]
+        worker = self.row_loaders.pop(key, None)
+        if worker is not None:
+            worker.cancel()
+
+        if month_info["model"] is None:
+            month_info["data"] = None
+            if month_info is self.current_month():
+                self.clear_tab(month_info)
+                self.request_rows(month_info)
+            return
+
+        worker = Worker(month_cache.month_rows, month_info["month"], month_info["year"])
+        worker.signals.result.connect(
+            lambda rows, month_info=month_info, worker=worker: self.on_rows_reloaded(month_info, worker, rows)
+        )
+        worker.signals.error.connect(self.on_load_error)
+        worker.signals.finished.connect(
+            lambda key=key, worker=worker: self.row_loaders.pop(key, None)
+            if self.row_loaders.get(key) is worker else None
+        )
+        self.row_loaders[key] = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def on_rows_reloaded(self, month_info, worker, rows):
+        if self.row_loaders.get(month_info["key"]) is not worker or month_info["model"] is None:
+            return
+        scroll_bar = month_info["table"].verticalScrollBar()
+        position = scroll_bar.value()
+        month_info["model"].replace_rows(rows)
+        month_info["data"] = month_info["model"].rows
+        scroll_bar.setValue(position)
+
+    def current_month(self):
+        index = self.tab_widget.currentIndex()
+        return self.months[index] if index >= 0 else None
+
+    def on_tab_changed(self, index):
+        """
+        Constrói a aba selecionada na primeira vez que ela é exibida e descarta
+        as abas construídas há mais tempo além do limite configurado.
+        """
+        if index < 0:
+            self.summary_panel.hide()
+            return
+
+        month_info = self.months[index]
+        self.summary_panel.set_totals(month_info["totals"], month_info["previous_month_total"])
+        self.summary_panel.show()
+
+        key = month_info["key"]
+        if key in self.built_tabs:
+            self.built_tabs.move_to_end(key)
+            return
+
+        if month_info["data"] is None:
+            self.request_rows(month_info)
+            return
+
+        self.build_tab(month_info)
+        self.built_tabs[key] = True
+
+        while len(self.built_tabs) > self.max_built_tabs:
+            oldest = next(iter(self.built_tabs))
+            if oldest == key:
+                break
+            del self.built_tabs[oldest]
+            oldest_info = self.months_by_key[oldest]
+            self.clear_tab(oldest_info)
+            worker = self.row_loaders.pop(oldest, None)
+            if worker is not None:
+                worker.cancel()
+            oldest_info["data"] = None
+
+    def request_rows(self, month_info):
+        """
+        Busca em segundo plano as movimentações do mês da aba, recebidas em
+        lotes: a aba é construída com o primeiro e os seguintes são
+        acrescentados à tabela.
+        """
+        key = month_info["key"]
+        if key in self.row_loaders:
+            return
+
+        month_info["tab"].layout().addWidget(QLabel("Carregando movimentações..."))
+        worker = Worker(month_cache.iter_row_batches, month_info["month"], month_info["year"])
+        worker.signals.progress.connect(
+            lambda rows, month_info=month_info, worker=worker: self.on_rows_loaded(month_info, worker, rows)
+        )
+        worker.signals.result.connect(
+            lambda _, month_info=month_info, worker=worker: self.on_rows_loaded(month_info, worker, [])
+        )
+        worker.signals.error.connect(self.on_load_error)
+        worker.signals.finished.connect(
+            lambda key=key, worker=worker: self.row_loaders.pop(key, None)
+            if self.row_loaders.get(key) is worker else None
+        )
+        self.row_loaders[key] = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def on_rows_loaded(self, month_info, worker, rows):
+        # Lotes de um carregamento já substituído ou cancelado são descartados
+        if self.row_loaders.get(month_info["key"]) is not worker:
+            return
+
+        if month_info["data"] is None:
+            month_info["data"] = list(rows)
+            self.clear_tab(month_info)
+            if month_info is self.current_month():
+                self.on_tab_changed(self.tab_widget.currentIndex())
+        elif month_info["model"] is not None:
+            month_info["model"].append_rows(rows)
+        else:
+            month_info["data"].extend(rows)
+
+    def clear_tab(self, month_info):
+        layout = month_info["tab"].layout()
+        while layout.count():
+            widget = layout.takeAt(0).widget()
+            if widget is not None:
+                widget.deleteLater()
+        month_info["model"] = None
+        month_info["table"] = None
+
+    def build_tab(self, month_info):
+        tab_layout = month_info["tab"].layout()
+
+        # Tabela de movimentações, formatada sob demanda pelo modelo
+        table = QTableView()
+        table.setAlternatingRowColors(True)
+        table.setShowGrid(True)
+        month_info["model"] = MovimentacoesTableModel(month_info["data"], table)
+        table.setModel(month_info["model"])
+
+        # Altura uniforme das linhas e largura das colunas a partir de uma amostra
+        vertical_header = table.verticalHeader()
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(MovimentacoesTableModel.ROW_HEIGHT)
+        table.model().resize_columns_from_sample(table)
+
+        tab_layout.addWidget(table)
+        month_info["table"] = table
 
-            if pagamento == "Crédito" and pessoa in ["Yuri", "Marcos"]:
-                totals["Crédito"][pessoa] += abs(valor)  # Valor absoluto para crédito
+    @staticmethod
+    def calculate_totals(data, previous_month_total, previous_savings, pessoas=None):
+        return ledger.calculate_totals(data, previous_month_total, previous_savings,
+                                       get_pessoas() if pessoas is None else pessoas)
 
-        return totals
+def check_totals(seed=0, meses=36, linhas_por_mes=200):
+    """
+    Confere, sem banco, que ledger.iter_totals_by_id (usado sobre as linhas
+    de ResumoMensal, com ids) chega aos mesmos totais de calculate_totals
+    (linha a linha, com nomes) em movimentações sintéticas, encadeando os
+    saldos de um mês para o seguinte. Retorna True se todos os meses coincidirem.
+    """
+    import random
+    gerador = random.Random(seed)
+    nomes = {
+        "Tipos": dict(enumerate(["Recebimento", "Salário", "Conta", "Compra", "Poupança", "Retirada"], 1)),
+        "Pessoas": dict(enumerate(["Yuri", "Marcos", "Outra"], 1)),
+        "Pagamentos": dict(enumerate(["Débito", "Crédito"], 1))
+    }
+    ids = {tabela: {nome: id_ for id_, nome in mapa.items()} for tabela, mapa in nomes.items()}
+    pessoas = list(nomes["Pessoas"].values())
+    # Lançamentos sem pessoa ou pagamento também entram
+    opcoes_pessoas = pessoas + [None]
+    opcoes_pagamentos = list(nomes["Pagamentos"].values()) + [None]
+
+    por_mes = []
+    resumo = {}  # (mes, pessoa_id, tipo_id, pagamento_id) -> (valor_total, valor_abs), como ResumoMensal
+    for i in range(meses):
+        inicio = date(2020 + i // 12, i % 12 + 1, 1)
+        data = []
+        for _ in range(linhas_por_mes):
+            tipo = gerador.choice(list(nomes["Tipos"].values()))
+            sinal = -1 if tipo in ("Conta", "Compra", "Retirada") else 1
+            # Alguns lançamentos com o sinal trocado, como estornos
+            if gerador.random() < 0.1:
+                sinal = -sinal
+            pessoa, pagamento = gerador.choice(opcoes_pessoas), gerador.choice(opcoes_pagamentos)
+            valor = sinal * gerador.randrange(1, 500000)
+            data.append((inicio.replace(day=gerador.randint(1, 28)), "Lançamento", valor, tipo, pessoa, pagamento, None, None))
+
+            chave = (inicio, ids["Pessoas"].get(pessoa, 0), ids["Tipos"][tipo], ids["Pagamentos"].get(pagamento, 0))
+            soma, soma_abs = resumo.get(chave, (0, 0))
+            resumo[chave] = (soma + valor, soma_abs + abs(valor))
+        por_mes.append((inicio, data))
+
+    summary = [(*chave, soma, soma_abs) for chave, (soma, soma_abs) in sorted(resumo.items())]
+    por_id = list(ledger.iter_totals_by_id(summary, nomes))
+
+    divergencias = abs(len(por_id) - meses)
+    if divergencias:
+        print(f"ERRO: {len(por_id)} meses calculados de {meses}")
+    previous = (0, 0)
+    for (inicio, data), (mes, obtido, _) in zip(por_mes, por_id):
+        esperado = VisualizationDialog.calculate_totals(data, *previous, pessoas)
+        if mes != inicio or esperado != obtido:
+            divergencias += 1
+            print(f"ERRO: {inicio:%m/%Y} diverge:\n  esperado {esperado}\n  obtido   {obtido}")
+        previous = esperado["Total do Mês"], esperado["Poupança"]["Total"]
+
+    if not divergencias:
+        print(f"OK: totais idênticos em {meses} meses ({meses * linhas_por_mes} movimentações).")
+    return not divergencias
+
+mark_startup("definir o aplicativo")
 
 if __name__ == "__main__":
+    # --check-totals confere o cálculo dos totais por resumo, sem abrir a janela
+    if "--check-totals" in sys.argv:
+        sys.exit(0 if check_totals() else 1)
+
+    # --profile-startup mostra o tempo de cada fase da inicialização
+    profile_startup = "--profile-startup" in sys.argv
+    if profile_startup:
+        sys.argv.remove("--profile-startup")
+
     app = QApplication(sys.argv)
     
     # Definindo o estilo global da aplicação
@@ -915,10 +2817,12 @@ if __name__ == "__main__":
     palette.setColor(QPalette.ColorRole.HighlightedText, QColor(255, 255, 255))
     
     app.setPalette(palette)
+    mark_startup("criar a QApplication")
     
-    window = MainWindow()
+    window = MainWindow(profile_startup=profile_startup)
     window.setMinimumSize(800, 600)
     window.show()
+    mark_startup("criar a janela principal")
     
     sys.exit(app.exec())
 
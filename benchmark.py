@@ -0,0 +1,420 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timezone
+
+# O diálogo de visualização roda sem janela; precisa ser definido antes de criar a QApplication
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import psycopg2
+from dateutil.relativedelta import relativedelta
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from PyQt6.QtCore import QEventLoop, QThreadPool, PYQT_VERSION_STR
+from PyQt6.QtWidgets import QApplication
+
+import Controle_Financeiro_Final as app
+import setup_database
+
+# Banco próprio do benchmark, apagado e recriado a cada execução
+BENCHMARK_DB_NAME = "finance_benchmark"
+
+# Tamanho padrão do livro-caixa sintético
+LEDGER_DEFAULTS = {
+    "ano_inicial": 2015,
+    "anos": 5,
+    "pessoas": 2,
+    "contas": 10,
+    "compras_parceladas": 200,
+    "lancamentos_por_mes": 500,
+    "seed": 0,
+}
+
+# Linhas acumuladas em memória antes de cada COPY do gerador
+GENERATOR_CHUNK_SIZE = 50000
+
+# Tempo máximo, em segundos, de espera pela tabela de uma aba
+TAB_LOAD_TIMEOUT = 60
+
+# (tipo, peso, sinal) dos lançamentos avulsos do gerador
+_LANCAMENTOS = (
+    ("Compra", 70, -1),
+    ("Recebimento", 15, 1),
+    ("Poupança", 8, 1),
+    ("Retirada", 7, -1),
+)
+_DESCRICOES = ("Supermercado", "Farmácia", "Posto", "Restaurante", "Padaria", "Transferência", "Livraria", "Cinema")
+_CONTAS = ("Aluguel", "Internet", "Academia", "Energia", "Água", "Telefone", "Condomínio", "Seguro", "Streaming", "Escola")
+
+def configure_database(host=None, port=None, user=None, password=None, name=BENCHMARK_DB_NAME):
+    """
+    Aponta o aplicativo e o setup_database para o banco do benchmark. Precisa
+    ser chamada antes da primeira conexão, pois o pool é criado no primeiro uso.
+    """
+    for modulo in (app, setup_database):
+        modulo.DB_NAME = name
+        if host is not None:
+            modulo.DB_HOST = host
+        if port is not None:
+            modulo.DB_PORT = str(port)
+        if user is not None:
+            modulo.DB_USER = user
+        if password is not None:
+            modulo.DB_PASSWORD = password
+
+def start_embedded_server(pasta):
+    """
+    Inicia um PostgreSQL embutido (pacote opcional pgserver) com os dados em
+    pasta, para rodar o benchmark sem um servidor instalado. Retorna o
+    servidor, que é parado quando o processo termina.
+    """
+    try:
+        import pgserver
+    except ImportError:
+        raise RuntimeError("o backend embutido precisa do pacote pgserver (pip install pgserver)")
+
+    servidor = pgserver.get_server(pasta, cleanup_mode="stop")
+    configure_database(host=str(pasta), user="postgres", password="", name=app.DB_NAME)
+    return servidor
+
+def _connect(dbname):
+    return psycopg2.connect(
+        dbname=dbname,
+        user=app.DB_USER,
+        password=app.DB_PASSWORD,
+        host=app.DB_HOST,
+        port=app.DB_PORT
+    )
+
+def prepare_database():
+    """
+    Apaga e recria o banco do benchmark com o esquema completo do
+    setup_database, sem os dados de exemplo.
+    """
+    if app.DB_NAME == "finance":
+        raise RuntimeError("o benchmark não roda no banco principal do aplicativo")
+
+    conn = _connect("postgres")
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP DATABASE IF EXISTS {app.DB_NAME}")
+    conn.close()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_database.create_database()
+        setup_database.migrate_dimensions()
+        setup_database.migrate_money_to_cents()
+        setup_database.setup_tables()
+        setup_database.migrate_recurrence_rules()
+        setup_database.upgrade_schema()
+
+    conn = _connect(app.DB_NAME)
+    with conn, conn.cursor() as cursor:
+        cursor.execute("TRUNCATE Movimentacoes, Recorrencias RESTART IDENTITY CASCADE")
+    conn.close()
+
+def _copy_rows(cursor, linhas):
+    buffer = io.StringIO()
+    for linha in linhas:
+        buffer.write("\t".join("\\N" if valor is None else str(valor) for valor in linha))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert("""
+        COPY Movimentacoes (data, descricao, valor, tipo_id, pessoa_id, pagamento_id, parcela_atual, total_parcelas)
+        FROM STDIN
+    """, buffer)
+
+def generate_ledger(config):
+    """
+    Gera o livro-caixa sintético descrito por config (chaves de
+    LEDGER_DEFAULTS): um salário por pessoa e as contas como regras de
+    recorrência materializadas em todos os meses, compras parceladas no
+    crédito e lançamentos avulsos por mês, gravados com COPY. A mesma seed
+    gera sempre os mesmos dados. Retorna a quantidade de movimentações.
+    """
+    gerador = random.Random(config["seed"])
+    inicio = date(config["ano_inicial"], 1, 1)
+    meses = config["anos"] * 12
+    fim = inicio + relativedelta(months=meses - 1)
+
+    pessoas = (["Yuri", "Marcos"] + [f"Pessoa {i}" for i in range(3, config["pessoas"] + 1)])[:config["pessoas"]]
+    pessoa_ids = [app.dimensions.get_id("Pessoas", pessoa) for pessoa in pessoas]
+    tipo_ids = {tipo: app.dimensions.get_id("Tipos", tipo) for tipo in ("Compra", "Conta", "Recebimento", "Poupança", "Retirada")}
+    debito = app.dimensions.get_id("Pagamentos", "Débito")
+    credito = app.dimensions.get_id("Pagamentos", "Crédito")
+
+    tipos = [tipo for tipo, _, _ in _LANCAMENTOS]
+    pesos = [peso for _, peso, _ in _LANCAMENTOS]
+    sinais = {tipo: sinal for tipo, _, sinal in _LANCAMENTOS}
+
+    with app.get_connection() as conn, conn.cursor() as cursor:
+        regras = [
+            ("Salário", gerador.randrange(300000, 1500000), gerador.randint(1, 28), tipo_ids["Recebimento"], pessoa_id, None)
+            for pessoa_id in pessoa_ids
+        ]
+        regras += [
+            (_CONTAS[i % len(_CONTAS)] + ("" if i < len(_CONTAS) else f" {i}"), -gerador.randrange(5000, 300000),
+             gerador.randint(1, 28), tipo_ids["Conta"], gerador.choice(pessoa_ids), debito)
+            for i in range(config["contas"])
+        ]
+        for descricao, valor, dia, tipo_id, pessoa_id, pagamento_id in regras:
+            cursor.execute("""
+                INSERT INTO Recorrencias (descricao, valor, dia, inicio, tipo_id, pessoa_id, pagamento_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (descricao, valor, dia, inicio, tipo_id, pessoa_id, pagamento_id))
+        total = app._replicate_recurring_range(cursor, inicio, fim)
+
+        linhas = []
+        for i in range(config["compras_parceladas"]):
+            parcelas = gerador.randint(2, 12)
+            primeira = inicio + relativedelta(months=gerador.randrange(meses), days=gerador.randrange(28))
+            valor = -gerador.randrange(2000, 200000)
+            pessoa_id = gerador.choice(pessoa_ids)
+            for parcela in range(1, parcelas + 1):
+                data = primeira + relativedelta(months=parcela - 1)
+                if data <= fim + relativedelta(months=1, days=-1):
+                    linhas.append((data, f"Parcelado {i}", valor, tipo_ids["Compra"], pessoa_id, credito, parcela, parcelas))
+
+        for mes in range(meses):
+            primeiro_dia = inicio + relativedelta(months=mes)
+            for tipo in gerador.choices(tipos, weights=pesos, k=config["lancamentos_por_mes"]):
+                linhas.append((
+                    primeiro_dia.replace(day=gerador.randint(1, 28)),
+                    f"{gerador.choice(_DESCRICOES)} {gerador.randrange(1000)}",
+                    sinais[tipo] * gerador.randrange(100, 100000),
+                    tipo_ids[tipo],
+                    gerador.choice(pessoa_ids) if tipo in ("Compra", "Recebimento") else None,
+                    gerador.choice((debito, credito)) if tipo == "Compra" else None,
+                    None,
+                    None,
+                ))
+            if len(linhas) >= GENERATOR_CHUNK_SIZE:
+                _copy_rows(cursor, linhas)
+                total += len(linhas)
+                linhas = []
+        if linhas:
+            _copy_rows(cursor, linhas)
+            total += len(linhas)
+
+    return total
+
+def finish_ledger():
+    """
+    Cria o resumo mensal a partir das movimentações geradas e os gatilhos de
+    notificação e atualiza as estatísticas do planejador, como num banco em uso.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_database.setup_monthly_summary()
+        setup_database.setup_change_notifications()
+    conn = _connect(app.DB_NAME)
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    with conn.cursor() as cursor:
+        cursor.execute("VACUUM ANALYZE")
+    conn.close()
+    app.dimensions.invalidate()
+    app.month_cache.invalidate(None)
+
+def _measure(fn, repeticoes):
+    """
+    Executa fn(i) repeticoes vezes e retorna as estatísticas dos tempos em ms.
+    """
+    tempos = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        fn(i)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        "repeticoes": repeticoes,
+        "min_ms": min(tempos),
+        "mediana_ms": statistics.median(tempos),
+        "media_ms": statistics.fmean(tempos),
+        "max_ms": max(tempos),
+    }
+
+def _cold(fn):
+    """
+    Envolve fn para que cada execução comece com o cache de meses vazio.
+    """
+    def cold(i):
+        app.month_cache.invalidate(None)
+        return fn(i)
+    return cold
+
+def _open_visualization():
+    """
+    Abre o diálogo de visualização sem janela e espera o carregamento em
+    segundo plano de todos os meses terminar.
+    """
+    dialog = app.VisualizationDialog()
+    loop = QEventLoop()
+    dialog.loader.signals.finished.connect(loop.quit)
+    # Com os meses em cache, o carregamento pode terminar antes da conexão
+    # acima; o aviso já enfileirado para on_load_finished esconde a barra
+    QApplication.processEvents()
+    if not dialog.progress_bar.isHidden():
+        loop.exec()
+    if not dialog.months:
+        dialog.done(0)
+        raise RuntimeError("o diálogo não carregou nenhum mês")
+    return dialog
+
+def _close_visualization(dialog):
+    dialog.done(0)
+    dialog.deleteLater()
+
+def _load_visualization(_):
+    _close_visualization(_open_visualization())
+
+def _visit_tabs(_):
+    """
+    Seleciona cada aba do diálogo de visualização em ordem, esperando a tabela
+    do mês ser construída antes de passar à próxima. Falha se o diálogo
+    mostrar erro de carregamento ou a tabela não ficar pronta em
+    TAB_LOAD_TIMEOUT segundos.
+    """
+    dialog = _open_visualization()
+    try:
+        for month_info in list(dialog.months):
+            dialog.tab_widget.setCurrentWidget(month_info["tab"])
+            limite = time.monotonic() + TAB_LOAD_TIMEOUT
+            while month_info["model"] is None:
+                QApplication.processEvents()
+                QThreadPool.globalInstance().waitForDone(1)
+                if dialog.status_label.text().startswith("Erro ao carregar"):
+                    raise RuntimeError(f"aba {month_info['key']}: {dialog.status_label.text()}")
+                if time.monotonic() > limite:
+                    raise RuntimeError(f"aba {month_info['key']} não carregou em {TAB_LOAD_TIMEOUT} s")
+    finally:
+        _close_visualization(dialog)
+
+def run_benchmarks(config, repeticoes):
+    """
+    Mede as operações do aplicativo sobre o livro-caixa gerado. As leituras
+    rodam antes das gravações, que acrescentam linhas e regras ao banco.
+    """
+    gerador = random.Random(config["seed"] + 1)
+    inicio = date(config["ano_inicial"], 1, 1)
+    meses = config["anos"] * 12
+    mes_aleatorio = [inicio + relativedelta(months=gerador.randrange(meses)) for _ in range(repeticoes)]
+    # Meses ainda sem lançamentos, para que cada replicação grave as ocorrências
+    meses_futuros = [inicio + relativedelta(months=meses + i) for i in range(repeticoes)]
+    qt = QApplication.instance() or QApplication(sys.argv[:1])
+
+    def check(resultado, nome):
+        if resultado is False:
+            raise RuntimeError(f"{nome} falhou")
+
+    operacoes = [
+        ("get_month_data", repeticoes,
+         _cold(lambda i: app.get_month_data(mes_aleatorio[i].month, mes_aleatorio[i].year))),
+        # Sempre o mesmo mês: a partir da segunda leitura, ele vem do cache
+        ("get_month_data (cache)", repeticoes,
+         lambda i: app.get_month_data(mes_aleatorio[0].month, mes_aleatorio[0].year)),
+        ("VisualizationDialog.load_data", max(1, repeticoes // 4), _cold(_load_visualization)),
+        ("VisualizationDialog.load_data (cache)", max(1, repeticoes // 4), _load_visualization),
+        ("VisualizationDialog (todas as abas)", max(1, repeticoes // 10), _visit_tabs),
+        ("replicate_recurring_entries", repeticoes,
+         lambda i: app.replicate_recurring_entries(meses_futuros[i].month, meses_futuros[i].year)),
+        ("save_compra", repeticoes,
+         lambda i: check(app.save_compra(f"Benchmark compra {i}", 25000, "Yuri", "Crédito", 12), "save_compra")),
+        ("save_conta", repeticoes,
+         lambda i: check(app.save_conta(f"Benchmark conta {i}", "Marcos", 10, 12000, 0, "Débito"), "save_conta")),
+        ("save_salario", repeticoes,
+         lambda i: check(app.save_salario(400000 + i, 5, "Yuri"), "save_salario")),
+    ]
+
+    resultados = {}
+    for nome, n, fn in operacoes:
+        resultados[nome] = _measure(fn, n)
+        print(f"  {nome:<38} mediana {resultados[nome]['mediana_ms']:9.2f} ms  "
+              f"(min {resultados[nome]['min_ms']:.2f}, max {resultados[nome]['max_ms']:.2f}, n={n})")
+    qt.processEvents()
+    return resultados
+
+def _environment(backend):
+    with app.get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SHOW server_version")
+        versao = cursor.fetchone()[0]
+    return {
+        "backend": backend,
+        "postgresql": versao,
+        "python": platform.python_version(),
+        "pyqt": PYQT_VERSION_STR,
+        "plataforma": platform.platform(),
+    }
+
+def run(config, repeticoes, saida, backend="postgresql"):
+    """
+    Recria o banco, gera o livro-caixa, mede as operações e grava o
+    resultado em JSON no arquivo saida. Retorna o dicionário gravado.
+    """
+    print(f"Gerando livro-caixa sintético: {config}")
+    inicio = time.perf_counter()
+    prepare_database()
+    linhas = generate_ledger(config)
+    finish_ledger()
+    segundos_geracao = time.perf_counter() - inicio
+    print(f"  {linhas} movimentações em {segundos_geracao:.1f} s")
+
+    print(f"Medindo operações ({repeticoes} repetições):")
+    resultado = {
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": config,
+        "ambiente": _environment(backend),
+        "geracao": {"movimentacoes": linhas, "segundos": segundos_geracao},
+        "resultados": run_benchmarks(config, repeticoes),
+    }
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {saida}")
+    return resultado
+
+def compare_results(anterior, atual):
+    """
+    Mostra a mediana de cada operação em dois arquivos de resultado e a razão
+    atual / anterior (abaixo de 1 é mais rápido).
+    """
+    with open(anterior, encoding="utf-8") as f:
+        base = json.load(f)["resultados"]
+    with open(atual, encoding="utf-8") as f:
+        novo = json.load(f)["resultados"]
+    print(f"{'operação':<38} {'anterior':>12} {'atual':>12} {'razão':>8}")
+    for nome in novo:
+        if nome in base:
+            a, b = base[nome]["mediana_ms"], novo[nome]["mediana_ms"]
+            print(f"{nome:<38} {a:10.2f}ms {b:10.2f}ms {b / a if a else float('nan'):8.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do Controle Financeiro sobre um livro-caixa sintético.")
+    for chave, padrao in LEDGER_DEFAULTS.items():
+        parser.add_argument(f"--{chave.replace('_', '-')}", type=int, default=padrao)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--saida", default="benchmark.json", help="arquivo JSON de resultados")
+    parser.add_argument("--host")
+    parser.add_argument("--port")
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    parser.add_argument("--banco", default=BENCHMARK_DB_NAME, help="banco do benchmark (apagado e recriado)")
+    parser.add_argument("--embutido", metavar="PASTA", help="usa um PostgreSQL embutido (pgserver) nesta pasta")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTERIOR", "ATUAL"),
+                        help="compara dois arquivos de resultado em vez de medir")
+    args = parser.parse_args()
+
+    if args.comparar:
+        compare_results(*args.comparar)
+        sys.exit(0)
+
+    configure_database(args.host, args.port, args.user, args.password, args.banco)
+    backend = "postgresql"
+    if args.embutido:
+        servidor = start_embedded_server(args.embutido)
+        backend = "postgresql-embutido"
+
+    config = {chave: getattr(args, chave) for chave in LEDGER_DEFAULTS}
+    run(config, args.repeticoes, args.saida, backend)
@@ -4,46 +4,215 @@ CREATE DATABASE finance;
 -- Conectar ao banco de dados
 \c finance;
 
+-- Tabelas de dimensão referenciadas por ids SMALLINT em Movimentacoes e Recorrencias
+CREATE TABLE IF NOT EXISTS Pessoas (
+    id SMALLSERIAL PRIMARY KEY,
+    nome VARCHAR(50) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS Pagamentos (
+    id SMALLSERIAL PRIMARY KEY,
+    nome VARCHAR(50) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS Tipos (
+    id SMALLSERIAL PRIMARY KEY,
+    nome VARCHAR(50) NOT NULL UNIQUE
+);
+
+INSERT INTO Tipos (nome)
+VALUES ('Compra'), ('Conta'), ('Recebimento'), ('Salário'), ('Poupança'), ('Retirada');
+
+INSERT INTO Pessoas (nome) VALUES ('Yuri'), ('Marcos');
+
+INSERT INTO Pagamentos (nome) VALUES ('Débito'), ('Crédito');
+
+-- Valores monetários (valor, valor_total, valor_abs) são guardados em centavos, como BIGINT
+
+-- Criar tabela de regras de recorrência (salários e contas mensais)
+CREATE TABLE IF NOT EXISTS Recorrencias (
+    id SERIAL PRIMARY KEY,
+    descricao VARCHAR(255) NOT NULL,
+    valor BIGINT NOT NULL,
+    dia INTEGER NOT NULL CHECK (dia BETWEEN 1 AND 31),
+    inicio DATE,
+    fim DATE,
+    tipo_id SMALLINT NOT NULL REFERENCES Tipos(id),
+    pessoa_id SMALLINT REFERENCES Pessoas(id),
+    pagamento_id SMALLINT REFERENCES Pagamentos(id)
+);
+
 -- Criar tabela de Movimentacoes
 CREATE TABLE IF NOT EXISTS Movimentacoes (
     id SERIAL PRIMARY KEY,
     data DATE NOT NULL,
     descricao VARCHAR(255) NOT NULL,
-    valor DECIMAL(10,2) NOT NULL,
-    tipo VARCHAR(50) NOT NULL CHECK (tipo IN ('Compra', 'Conta', 'Recebimento', 'Salário', 'Poupança', 'Retirada')),
-    pessoa VARCHAR(50),
-    pagamento VARCHAR(50),
+    valor BIGINT NOT NULL,
+    tipo_id SMALLINT NOT NULL REFERENCES Tipos(id),
+    pessoa_id SMALLINT REFERENCES Pessoas(id),
+    pagamento_id SMALLINT REFERENCES Pagamentos(id),
     parcela_atual INTEGER,
-    total_parcelas INTEGER
+    total_parcelas INTEGER,
+    recorrencia_id INTEGER REFERENCES Recorrencias(id)
+);
+
+-- Índices para as consultas por mês e para as verificações de existência das recorrências
+CREATE INDEX IF NOT EXISTS idx_movimentacoes_data ON Movimentacoes (data);
+CREATE INDEX IF NOT EXISTS idx_movimentacoes_descricao_pessoa_data ON Movimentacoes (descricao, pessoa_id, data);
+CREATE INDEX IF NOT EXISTS idx_movimentacoes_recorrencia_data ON Movimentacoes (recorrencia_id, data)
+    WHERE recorrencia_id IS NOT NULL;
+
+-- Totais mensais mantidos de forma incremental por gatilhos em Movimentacoes.
+-- Pessoa e pagamento ausentes são guardados como 0 para fazerem parte da chave.
+CREATE TABLE IF NOT EXISTS ResumoMensal (
+    mes DATE NOT NULL,
+    pessoa_id SMALLINT NOT NULL DEFAULT 0,
+    tipo_id SMALLINT NOT NULL,
+    pagamento_id SMALLINT NOT NULL DEFAULT 0,
+    valor_total BIGINT NOT NULL DEFAULT 0,
+    valor_abs BIGINT NOT NULL DEFAULT 0,
+    quantidade INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (mes, pessoa_id, tipo_id, pagamento_id)
 );
 
+CREATE OR REPLACE FUNCTION resumo_mensal_atualizar() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO ResumoMensal AS r (mes, pessoa_id, tipo_id, pagamento_id, valor_total, valor_abs, quantidade)
+        SELECT date_trunc('month', data)::date, COALESCE(pessoa_id, 0), tipo_id, COALESCE(pagamento_id, 0),
+               -SUM(valor), -SUM(ABS(valor)), -COUNT(*)
+        FROM antigas
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (mes, pessoa_id, tipo_id, pagamento_id) DO UPDATE
+        SET valor_total = r.valor_total + EXCLUDED.valor_total,
+            valor_abs = r.valor_abs + EXCLUDED.valor_abs,
+            quantidade = r.quantidade + EXCLUDED.quantidade;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO ResumoMensal AS r (mes, pessoa_id, tipo_id, pagamento_id, valor_total, valor_abs, quantidade)
+        SELECT date_trunc('month', data)::date, COALESCE(pessoa_id, 0), tipo_id, COALESCE(pagamento_id, 0),
+               SUM(valor), SUM(ABS(valor)), COUNT(*)
+        FROM novas
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (mes, pessoa_id, tipo_id, pagamento_id) DO UPDATE
+        SET valor_total = r.valor_total + EXCLUDED.valor_total,
+            valor_abs = r.valor_abs + EXCLUDED.valor_abs,
+            quantidade = r.quantidade + EXCLUDED.quantidade;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER resumo_mensal_insert AFTER INSERT ON Movimentacoes
+REFERENCING NEW TABLE AS novas
+FOR EACH STATEMENT EXECUTE FUNCTION resumo_mensal_atualizar();
+
+CREATE TRIGGER resumo_mensal_update AFTER UPDATE ON Movimentacoes
+REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+FOR EACH STATEMENT EXECUTE FUNCTION resumo_mensal_atualizar();
+
+CREATE TRIGGER resumo_mensal_delete AFTER DELETE ON Movimentacoes
+REFERENCING OLD TABLE AS antigas
+FOR EACH STATEMENT EXECUTE FUNCTION resumo_mensal_atualizar();
+
+-- Gatilhos que avisam (NOTIFY) os programas abertos de quais meses mudaram, para
+-- que descartem somente esses meses do cache. O aviso traz os meses como "AAAA-MM"
+-- separados por vírgula, ou "*" quando qualquer mês pode ter mudado (regras de
+-- recorrência, TRUNCATE ou meses demais para um aviso).
+CREATE OR REPLACE FUNCTION movimentacoes_notificar() RETURNS trigger AS $$
+DECLARE
+    meses TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT string_agg(to_char(mes, 'YYYY-MM'), ',') INTO meses
+        FROM (SELECT DISTINCT date_trunc('month', data) AS mes FROM novas) m;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT string_agg(to_char(mes, 'YYYY-MM'), ',') INTO meses
+        FROM (SELECT DISTINCT date_trunc('month', data) AS mes FROM antigas) m;
+    ELSE
+        SELECT string_agg(to_char(mes, 'YYYY-MM'), ',') INTO meses
+        FROM (
+            SELECT date_trunc('month', data) AS mes FROM antigas
+            UNION
+            SELECT date_trunc('month', data) FROM novas
+        ) m;
+    END IF;
+
+    IF meses IS NOT NULL THEN
+        PERFORM pg_notify('movimentacoes_alteradas', CASE WHEN length(meses) > 7000 THEN '*' ELSE meses END);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION movimentacoes_notificar_tudo() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('movimentacoes_alteradas', '*');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notificar_insert AFTER INSERT ON Movimentacoes
+REFERENCING NEW TABLE AS novas
+FOR EACH STATEMENT EXECUTE FUNCTION movimentacoes_notificar();
+
+CREATE TRIGGER notificar_update AFTER UPDATE ON Movimentacoes
+REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+FOR EACH STATEMENT EXECUTE FUNCTION movimentacoes_notificar();
+
+CREATE TRIGGER notificar_delete AFTER DELETE ON Movimentacoes
+REFERENCING OLD TABLE AS antigas
+FOR EACH STATEMENT EXECUTE FUNCTION movimentacoes_notificar();
+
+CREATE TRIGGER notificar_truncate AFTER TRUNCATE ON Movimentacoes
+FOR EACH STATEMENT EXECUTE FUNCTION movimentacoes_notificar_tudo();
+
+CREATE TRIGGER notificar_recorrencias AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Recorrencias
+FOR EACH STATEMENT EXECUTE FUNCTION movimentacoes_notificar_tudo();
+
 -- Criar tabela de Limites
 CREATE TABLE IF NOT EXISTS Limites (
     id SERIAL PRIMARY KEY,
     data DATE NOT NULL,
     pessoa VARCHAR(50) NOT NULL,
-    valor DECIMAL(10,2) NOT NULL,
+    valor BIGINT NOT NULL,
     UNIQUE (data, pessoa)
 );
 
--- Inserir alguns dados de exemplo
-INSERT INTO Movimentacoes (data, descricao, valor, tipo, pessoa, pagamento) 
+-- Chaves dos registros da fila local de gravações já aplicados, para que uma
+-- repetição após falha de conexão não os grave duas vezes
+CREATE TABLE IF NOT EXISTS GravacoesAplicadas (
+    chave UUID PRIMARY KEY,
+    aplicada TIMESTAMP NOT NULL DEFAULT now()
+);
+
+-- Inserir alguns dados de exemplo, em centavos (ids de Tipos, Pessoas e Pagamentos na ordem de cadastro acima:
+-- Compra 1, Conta 2, Salário 4, Poupança 5; Yuri 1, Marcos 2; Débito 1, Crédito 2)
+INSERT INTO Movimentacoes (data, descricao, valor, tipo_id, pessoa_id, pagamento_id) 
 VALUES 
-    ('2024-01-14', 'Salário', 5000.00, 'Salário', 'Yuri', NULL),
-    ('2024-01-26', 'Salário', 5000.00, 'Salário', 'Marcos', NULL);
+    ('2024-01-14', 'Salário', 500000, 4, 1, NULL),
+    ('2024-01-26', 'Salário', 500000, 4, 2, NULL);
+
+INSERT INTO Recorrencias (descricao, pessoa_id, valor, tipo_id, pagamento_id, dia, inicio)
+VALUES
+    ('Aluguel', 1, -150000, 2, 1, 5, '2024-01-01'),
+    ('Internet', 2, -15000, 2, 1, 10, '2024-01-01'),
+    ('Academia', 2, -10000, 2, 1, 20, '2024-01-01');
 
-INSERT INTO Movimentacoes (data, descricao, valor, tipo, pessoa, pagamento, parcela_atual, total_parcelas) 
+INSERT INTO Movimentacoes (data, descricao, valor, tipo_id, pessoa_id, pagamento_id, parcela_atual, total_parcelas, recorrencia_id) 
 VALUES 
-    ('2024-01-05', 'Aluguel', -1500.00, 'Conta', 'Yuri', 'Débito', NULL, 0),
-    ('2024-01-10', 'Internet', -150.00, 'Conta', 'Marcos', 'Débito', NULL, 0),
-    ('2024-01-15', 'Compra Supermercado', -500.00, 'Compra', 'Yuri', 'Crédito', 1, 1),
-    ('2024-01-20', 'Academia', -100.00, 'Conta', 'Marcos', 'Débito', NULL, 0);
+    ('2024-01-05', 'Aluguel', -150000, 2, 1, 1, NULL, 0, 1),
+    ('2024-01-10', 'Internet', -15000, 2, 2, 1, NULL, 0, 2),
+    ('2024-01-15', 'Compra Supermercado', -50000, 1, 1, 2, 1, 1, NULL),
+    ('2024-01-20', 'Academia', -10000, 2, 2, 1, NULL, 0, 3);
 
-INSERT INTO Movimentacoes (data, descricao, valor, tipo) 
+INSERT INTO Movimentacoes (data, descricao, valor, tipo_id) 
 VALUES 
-    ('2024-01-01', 'Depósito Inicial', 1000.00, 'Poupança');
+    ('2024-01-01', 'Depósito Inicial', 100000, 5);
 
 INSERT INTO Limites (data, pessoa, valor) 
 VALUES 
-    ('2024-01-01', 'Yuri', 2000.00),
-    ('2024-01-01', 'Marcos', 2000.00); 
\ No newline at end of file
+    ('2024-01-01', 'Yuri', 200000),
+    ('2024-01-01', 'Marcos', 200000); 
\ No newline at end of file
@@ -0,0 +1,336 @@
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from datetime import date
+
+import Controle_Financeiro_Final as app
+import ledger
+
+# Linhas por bloco do arquivo colunar (e por ida ao servidor no cursor nomeado)
+EXPORT_CHUNK_SIZE = 20000
+
+# Intervalo mínimo, em linhas, entre duas chamadas de progresso
+PROGRESS_EVERY = 50000
+
+# Arquivo colunar: assinatura, cabeçalho JSON e blocos de colunas em little-endian
+COLUMNAR_MAGIC = b"FINMOV1\0"
+COLUMNAR_EXTENSION = ".fmov"
+_EPOCH = date(1970, 1, 1).toordinal()
+_UINT32 = struct.Struct("<I")
+
+# Colunas de tamanho fixo do arquivo colunar: (nome, código do array)
+COLUMNAR_COLUMNS = (
+    ("id", "i"),
+    ("data", "i"),            # dias desde 1970-01-01
+    ("valor", "q"),           # centavos
+    ("tipo_id", "h"),
+    ("pessoa_id", "h"),       # 0 = sem pessoa
+    ("pagamento_id", "h"),    # 0 = sem pagamento
+    ("parcela_atual", "h"),   # -1 = sem parcela
+    ("total_parcelas", "h"),  # -1 = sem parcelas
+)
+
+def _range_filter(cursor, inicio=None, fim=None):
+    """
+    Monta o WHERE do intervalo [inicio, fim) já com os parâmetros
+    interpolados, pois o COPY não aceita parâmetros.
+    """
+    filtros = []
+    if inicio is not None:
+        filtros.append(cursor.mogrify("data >= %s", (inicio,)).decode())
+    if fim is not None:
+        filtros.append(cursor.mogrify("data < %s", (fim,)).decode())
+    return f"WHERE {' AND '.join(filtros)}" if filtros else ""
+
+def _count_rows(cursor, where):
+    cursor.execute(f"SELECT COUNT(*) FROM Movimentacoes {where}")
+    return cursor.fetchone()[0]
+
+class _ProgressWriter:
+    """
+    Arquivo binário que repassa os dados do COPY e estima as linhas escritas
+    pelas quebras de linha, sem contar o cabeçalho, chamando
+    progress(linhas, total) a cada PROGRESS_EVERY linhas. A contagem é
+    aproximada (descrições com quebra de linha contam a mais) e serve só
+    para o progresso; o número exato vem de cursor.rowcount ao fim do COPY.
+    """
+    def __init__(self, arquivo, total, progress=None):
+        self.arquivo = arquivo
+        self.total = total
+        self.progress = progress
+        self.linhas = -1
+        self.proximo = PROGRESS_EVERY
+
+    def write(self, dados):
+        self.arquivo.write(dados)
+        self.linhas += dados.count(b"\n")
+        if self.progress and self.linhas >= self.proximo:
+            self.progress(min(self.linhas, self.total), self.total)
+            self.proximo = self.linhas + PROGRESS_EVERY
+
+def export_csv(arquivo, inicio=None, fim=None, progress=None):
+    """
+    Exporta as movimentações do intervalo [inicio, fim), ou todas, para CSV
+    (separado por ';', valores em reais com ponto) com COPY TO STDOUT. Os
+    dados passam direto do servidor para o arquivo, com memória constante.
+    O cabeçalho é o aceito por import_statements.iter_csv. Retorna a
+    quantidade de linhas exportadas ou None em caso de erro.
+    """
+    try:
+        with app.get_connection() as conn, conn.cursor() as cursor:
+            where = _range_filter(cursor, inicio, fim)
+            total = _count_rows(cursor, where)
+            linhas = f"""
+                SELECT data, descricao, valor, tipo_id, pessoa_id, pagamento_id, parcela_atual, total_parcelas
+                FROM Movimentacoes
+                {where}
+            """
+            with open(arquivo, "wb") as f:
+                writer = _ProgressWriter(f, total, progress)
+                cursor.copy_expert(f"""
+                    COPY (
+                        SELECT data AS "Data", descricao AS "Descrição", (valor::numeric / 100)::numeric(18, 2) AS "Valor",
+                               tipo AS "Tipo", pessoa AS "Pessoa", pagamento AS "Pagamento",
+                               parcela_atual AS "Parcela", total_parcelas AS "Total Parcelas"
+                        FROM ({ledger.MOVIMENTACOES_NOMES_SQL.format(linhas=linhas)})
+                             AS m (data, descricao, valor, tipo, pessoa, pagamento, parcela_atual, total_parcelas)
+                    ) TO STDOUT WITH (FORMAT csv, HEADER, DELIMITER ';', ENCODING 'UTF8')
+                """, writer)
+                exportadas = cursor.rowcount
+        if progress:
+            progress(exportadas, exportadas)
+        return exportadas
+
+    except Exception as e:
+        print(f"Erro ao exportar CSV: {str(e)}")
+        return None
+
+def _write_array(f, valores):
+    if sys.byteorder == "big":
+        valores.byteswap()
+    f.write(_UINT32.pack(len(valores) * valores.itemsize))
+    valores.tofile(f)
+
+def _write_block(f, linhas):
+    """
+    Grava um bloco: quantidade de linhas, cada coluna fixa como array
+    contínuo e as descrições como deslocamentos (n + 1) e bytes UTF-8.
+    """
+    f.write(_UINT32.pack(len(linhas)))
+    id_, data, descricao, *fixas = zip(*linhas)
+    for (_, codigo), valores in zip(COLUMNAR_COLUMNS, [id_, data, *fixas]):
+        _write_array(f, array(codigo, valores))
+
+    textos = [texto.encode("utf-8") for texto in descricao]
+    deslocamentos = array("i", [0])
+    total = 0
+    for texto in textos:
+        total += len(texto)
+        deslocamentos.append(total)
+    _write_array(f, deslocamentos)
+    textos = b"".join(textos)
+    f.write(_UINT32.pack(len(textos)))
+    f.write(textos)
+
+def export_columnar(arquivo, inicio=None, fim=None, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """
+    Exporta as movimentações do intervalo [inicio, fim), ou todas, para o
+    arquivo colunar binário (COLUMNAR_MAGIC). As linhas vêm de um cursor
+    nomeado em blocos de chunk_size, e cada bloco é gravado e descartado,
+    com memória constante. Pessoas, pagamentos e tipos ficam como ids, com
+    os nomes no cabeçalho. Retorna a quantidade de linhas exportadas ou None
+    em caso de erro.
+    """
+    try:
+        with app.get_connection() as conn:
+            with conn.cursor() as cursor:
+                where = _range_filter(cursor, inicio, fim)
+                total = _count_rows(cursor, where)
+                dimensoes = {}
+                for tabela in ("Tipos", "Pessoas", "Pagamentos"):
+                    cursor.execute(f"SELECT id, nome FROM {tabela} ORDER BY id")
+                    dimensoes[tabela] = {str(id_): nome for id_, nome in cursor.fetchall()}
+
+            cabecalho = json.dumps({
+                "colunas": [nome for nome, _ in COLUMNAR_COLUMNS] + ["descricao"],
+                "dimensoes": dimensoes,
+                "linhas": total,
+            }, ensure_ascii=False).encode("utf-8")
+
+            exportadas = 0
+            with open(arquivo, "wb") as f, conn.cursor(name="exportacao_movimentacoes") as cursor:
+                f.write(COLUMNAR_MAGIC)
+                f.write(_UINT32.pack(len(cabecalho)))
+                f.write(cabecalho)
+
+                cursor.itersize = chunk_size
+                cursor.execute(f"""
+                    SELECT id, data - DATE '1970-01-01', descricao, valor, tipo_id,
+                           COALESCE(pessoa_id, 0), COALESCE(pagamento_id, 0),
+                           COALESCE(parcela_atual, -1), COALESCE(total_parcelas, -1)
+                    FROM Movimentacoes
+                    {where}
+                    ORDER BY data, id
+                """)
+                proximo = PROGRESS_EVERY
+                while True:
+                    linhas = cursor.fetchmany(chunk_size)
+                    if not linhas:
+                        break
+                    _write_block(f, linhas)
+                    exportadas += len(linhas)
+                    if progress and exportadas >= proximo:
+                        progress(exportadas, total)
+                        proximo = exportadas + PROGRESS_EVERY
+                f.write(_UINT32.pack(0))
+
+        if progress:
+            progress(exportadas, total)
+        return exportadas
+
+    except Exception as e:
+        print(f"Erro ao exportar arquivo colunar: {str(e)}")
+        return None
+
+def _read_exact(f, tamanho):
+    dados = f.read(tamanho)
+    if len(dados) != tamanho:
+        raise ValueError("arquivo colunar truncado")
+    return dados
+
+def _read_array(f, codigo):
+    valores = array(codigo)
+    valores.frombytes(_read_exact(f, _UINT32.unpack(_read_exact(f, 4))[0]))
+    if sys.byteorder == "big":
+        valores.byteswap()
+    return valores
+
+def read_columnar_header(f):
+    """
+    Lê e valida a assinatura e o cabeçalho JSON de um arquivo colunar aberto.
+    """
+    if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError("não é um arquivo colunar de movimentações")
+    return json.loads(_read_exact(f, _UINT32.unpack(_read_exact(f, 4))[0]).decode("utf-8"))
+
+def iter_columnar_blocks(arquivo):
+    """
+    Percorre um arquivo colunar bloco a bloco, gerando (cabeçalho, colunas),
+    em que colunas mapeia o nome de cada coluna fixa para seu array e
+    "descricao" para a lista de textos do bloco.
+    """
+    with open(arquivo, "rb") as f:
+        cabecalho = read_columnar_header(f)
+        while True:
+            n = _UINT32.unpack(_read_exact(f, 4))[0]
+            if n == 0:
+                return
+            colunas = {nome: _read_array(f, codigo) for nome, codigo in COLUMNAR_COLUMNS}
+            deslocamentos = _read_array(f, "i")
+            textos = _read_exact(f, _UINT32.unpack(_read_exact(f, 4))[0])
+            colunas["descricao"] = [
+                textos[deslocamentos[i]:deslocamentos[i + 1]].decode("utf-8") for i in range(n)
+            ]
+            yield cabecalho, colunas
+
+def iter_columnar_rows(arquivo):
+    """
+    Percorre um arquivo colunar linha a linha no formato de get_month_data:
+    (data, descricao, valor, tipo, pessoa, pagamento, parcela_atual, total_parcelas).
+    """
+    for cabecalho, colunas in iter_columnar_blocks(arquivo):
+        tipos, pessoas, pagamentos = (cabecalho["dimensoes"][t] for t in ("Tipos", "Pessoas", "Pagamentos"))
+        for i in range(len(colunas["id"])):
+            yield (
+                date.fromordinal(colunas["data"][i] + _EPOCH),
+                colunas["descricao"][i],
+                colunas["valor"][i],
+                tipos[str(colunas["tipo_id"][i])],
+                pessoas.get(str(colunas["pessoa_id"][i])),
+                pagamentos.get(str(colunas["pagamento_id"][i])),
+                colunas["parcela_atual"][i] if colunas["parcela_atual"][i] >= 0 else None,
+                colunas["total_parcelas"][i] if colunas["total_parcelas"][i] >= 0 else None,
+            )
+
+def check_columnar_roundtrip(arquivo, inicio=None, fim=None):
+    """
+    Compara, linha a linha e sem carregar nenhum dos lados inteiro, o arquivo
+    colunar com as movimentações do banco no mesmo intervalo.
+    """
+    with app.get_connection() as conn, conn.cursor(name="conferencia_exportacao") as cursor:
+        cursor.itersize = EXPORT_CHUNK_SIZE
+        where = _range_filter(cursor, inicio, fim)
+        linhas = f"SELECT * FROM Movimentacoes {where} ORDER BY data, id"
+        cursor.execute(f"""
+            SELECT m.data, m.descricao, m.valor, t.nome, p.nome, g.nome, m.parcela_atual, m.total_parcelas
+            FROM ({linhas}) m
+            JOIN Tipos t ON t.id = m.tipo_id
+            LEFT JOIN Pessoas p ON p.id = m.pessoa_id
+            LEFT JOIN Pagamentos g ON g.id = m.pagamento_id
+            ORDER BY m.data, m.id
+        """)
+        conferidas = 0
+        arquivo_linhas = iter_columnar_rows(arquivo)
+        for esperado in cursor:
+            obtido = next(arquivo_linhas, None)
+            if obtido != esperado:
+                print(f"ERRO: linha {conferidas + 1} diverge:\n  banco   {esperado}\n  arquivo {obtido}")
+                return False
+            conferidas += 1
+        if next(arquivo_linhas, None) is not None:
+            print(f"ERRO: o arquivo tem mais linhas que as {conferidas} do banco.")
+            return False
+    print(f"OK: {conferidas} linhas idênticas às do banco.")
+    return True
+
+def _print_progress(linhas, total):
+    percentual = 100 * linhas / total if total else 100
+    print(f"\r{linhas}/{total} linhas ({percentual:.0f}%)", end="", file=sys.stderr, flush=True)
+    if linhas >= total:
+        print(file=sys.stderr)
+
+def export_movimentacoes(arquivo, inicio=None, fim=None, progress=_print_progress):
+    """
+    Escolhe o formato pela extensão do arquivo: COLUMNAR_EXTENSION para o
+    colunar binário e CSV para qualquer outra.
+    """
+    if arquivo.lower().endswith(COLUMNAR_EXTENSION):
+        return export_columnar(arquivo, inicio, fim, progress=progress)
+    return export_csv(arquivo, inicio, fim, progress=progress)
+
+def check_export(inicio=None, fim=None):
+    """
+    Exporta para CSV e para o formato colunar em uma pasta temporária,
+    mostrando tempo e tamanho de cada um, e confere o colunar contra o banco.
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        for nome in ("movimentacoes.csv", "movimentacoes" + COLUMNAR_EXTENSION):
+            arquivo = os.path.join(pasta, nome)
+            inicio_exportacao = time.perf_counter()
+            linhas = export_movimentacoes(arquivo, inicio, fim)
+            if linhas is None:
+                return False
+            segundos = time.perf_counter() - inicio_exportacao
+            print(f"{nome}: {linhas} linhas, {os.path.getsize(arquivo) / 1e6:.1f} MB em {segundos:.1f} s "
+                  f"({linhas / max(segundos, 1e-9):,.0f} linhas/s)")
+        return check_columnar_roundtrip(arquivo, inicio, fim)
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--check":
+        sys.exit(0 if check_export(*sys.argv[2:4]) else 1)
+
+    if len(sys.argv) < 2:
+        print(f"Uso: python export_movimentacoes.py saida.csv|saida{COLUMNAR_EXTENSION} [inicio] [fim]")
+        print("     python export_movimentacoes.py --check [inicio] [fim]")
+        print("     Datas no formato aaaa-mm-dd; o intervalo inclui inicio e exclui fim.")
+        sys.exit(2)
+
+    arquivo = sys.argv[1]
+    linhas = export_movimentacoes(arquivo, *sys.argv[2:4])
+    if linhas is None:
+        sys.exit(1)
+    print(f"{linhas} movimentações exportadas para {arquivo}.")
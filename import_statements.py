@@ -0,0 +1,308 @@
+import csv
+import io
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+
+import Controle_Financeiro_Final as app
+from ledger import PENDING_OCCURRENCE_SQL, RULE_OCCURRENCES_SQL
+
+# Linhas acumuladas em memória antes de cada COPY
+IMPORT_CHUNK_SIZE = 20000
+
+# Nomes aceitos no cabeçalho do CSV para cada coluna (sem acento, minúsculos)
+CSV_COLUMNS = {
+    "data": ("data", "date", "data lancamento"),
+    "descricao": ("descricao", "historico", "description", "memo"),
+    "valor": ("valor", "value", "amount"),
+    "tipo": ("tipo", "type"),
+    "pessoa": ("pessoa", "person"),
+    "pagamento": ("pagamento", "payment"),
+}
+
+_ACENTOS = str.maketrans("áàâãéêíóôõúç", "aaaaeeiooouc")
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_COPY_NULL = "\\N"
+
+def _iso_date(texto):
+    """
+    Converte "dd/mm/aaaa", "aaaa-mm-dd" ou "aaaammdd" em "aaaa-mm-dd".
+    A validação final da data fica com o PostgreSQL.
+    """
+    texto = texto.strip()
+    if len(texto) == 10 and texto[2] == "/" and texto[5] == "/":
+        return f"{texto[6:10]}-{texto[3:5]}-{texto[0:2]}"
+    if len(texto) == 10 and texto[4] == "-" and texto[7] == "-":
+        return texto
+    if len(texto) >= 8 and texto[:8].isdigit():
+        return f"{texto[0:4]}-{texto[4:6]}-{texto[6:8]}"
+    raise ValueError(f"data inválida: {texto!r}")
+
+def _default_tipo(centavos):
+    return "Recebimento" if centavos > 0 else "Compra"
+
+def iter_csv(arquivo, pessoa=None, pagamento=None, delimitador=None, encoding="utf-8-sig"):
+    """
+    Lê um extrato CSV com cabeçalho linha a linha, gerando tuplas
+    (data ISO, descricao, valor em centavos, tipo, pessoa, pagamento). As
+    colunas tipo, pessoa e pagamento são opcionais; sem tipo, o sinal do
+    valor decide entre Recebimento e Compra.
+    """
+    with open(arquivo, newline="", encoding=encoding) as f:
+        if delimitador is None:
+            amostra = f.readline()
+            delimitador = ";" if amostra.count(";") > amostra.count(",") else ","
+            f.seek(0)
+
+        reader = csv.reader(f, delimiter=delimitador)
+        cabecalho = [nome.strip().lower().translate(_ACENTOS) for nome in next(reader)]
+        posicoes = {}
+        for coluna, nomes in CSV_COLUMNS.items():
+            for nome in nomes:
+                if nome in cabecalho:
+                    posicoes[coluna] = cabecalho.index(nome)
+                    break
+        faltando = [coluna for coluna in ("data", "descricao", "valor") if coluna not in posicoes]
+        if faltando:
+            raise ValueError(f"{arquivo}: colunas obrigatórias ausentes: {', '.join(faltando)}")
+
+        i_data, i_descricao, i_valor = posicoes["data"], posicoes["descricao"], posicoes["valor"]
+        i_tipo, i_pessoa, i_pagamento = posicoes.get("tipo"), posicoes.get("pessoa"), posicoes.get("pagamento")
+
+        for numero, linha in enumerate(reader, start=2):
+            if not linha:
+                continue
+            try:
+                centavos = app.Centavos.from_reais(linha[i_valor])
+                yield (
+                    _iso_date(linha[i_data]),
+                    linha[i_descricao].strip(),
+                    centavos,
+                    (linha[i_tipo].strip() if i_tipo is not None else "") or _default_tipo(centavos),
+                    (linha[i_pessoa].strip() if i_pessoa is not None else "") or pessoa,
+                    (linha[i_pagamento].strip() if i_pagamento is not None else "") or pagamento,
+                )
+            except Exception as e:
+                raise ValueError(f"{arquivo}, linha {numero}: {e}") from e
+
+def iter_ofx(arquivo, pessoa=None, pagamento=None, encoding=None):
+    """
+    Lê as transações (<STMTTRN>) de um extrato OFX 1.x (SGML) ou 2.x (XML)
+    linha a linha, no mesmo formato de tupla de iter_csv. Sem encoding, usa
+    UTF-8 se o cabeçalho o declarar e cp1252 caso contrário.
+    """
+    if encoding is None:
+        with open(arquivo, "rb") as f:
+            encoding = "utf-8" if b"UTF-8" in f.read(1024).upper() else "cp1252"
+
+    with open(arquivo, encoding=encoding, errors="replace") as f:
+        transacao = None
+        for numero, linha in enumerate(f, start=1):
+            for fechamento, tag, valor in _OFX_TAG.findall(linha):
+                tag = tag.upper()
+                if tag == "STMTTRN":
+                    if not fechamento:
+                        transacao = {}
+                        continue
+                    try:
+                        # TRNAMT não tem separador de milhar e pode ter mais de duas casas
+                        centavos = app.Centavos.from_reais(Decimal(transacao["TRNAMT"].replace(",", ".")))
+                        descricao = transacao.get("MEMO") or transacao.get("NAME") or ""
+                        yield (_iso_date(transacao["DTPOSTED"]), descricao, centavos,
+                               _default_tipo(centavos), pessoa, pagamento)
+                    except Exception as e:
+                        raise ValueError(f"{arquivo}, transação terminada na linha {numero}: {e}") from e
+                    transacao = None
+                elif transacao is not None and not fechamento:
+                    transacao[tag] = valor.strip()
+
+def iter_statement(arquivo, pessoa=None, pagamento=None):
+    """
+    Escolhe o leitor pelo formato do arquivo (.ofx ou CSV).
+    """
+    if arquivo.lower().endswith(".ofx"):
+        return iter_ofx(arquivo, pessoa, pagamento)
+    return iter_csv(arquivo, pessoa, pagamento)
+
+def _id_resolver(cursor):
+    """
+    Retorna uma função (tabela, nome) -> id já no formato do COPY, memorizando
+    as consultas ao cache de dimensões durante a importação. Nomes novos são
+    cadastrados no cursor da importação.
+    """
+    memo = {}
+
+    def resolver(tabela, nome):
+        chave = (tabela, nome)
+        if chave not in memo:
+            id_ = app.dimensions.get_id(tabela, nome, cursor)
+            memo[chave] = _COPY_NULL if id_ is None else str(id_)
+        return memo[chave]
+
+    return resolver
+
+def _copy_line(registro, ids):
+    data, descricao, centavos, tipo, pessoa, pagamento = registro
+    return (f"{data}\t{descricao.translate(_COPY_ESCAPES)}\t{int(centavos)}\t"
+            f"{ids('Tipos', tipo)}\t{ids('Pessoas', pessoa)}\t{ids('Pagamentos', pagamento)}\n")
+
+def import_statement(registros, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Importa movimentações em massa. Os registros (tuplas de iter_csv/iter_ofx)
+    são enviados em blocos de chunk_size por COPY FROM STDIN para uma tabela
+    temporária, com memória constante no cliente. Um único INSERT ... SELECT
+    grava depois apenas as linhas sem equivalente (data, descricao, valor,
+    pessoa) em Movimentacoes, comparadas por um hash anti-join no servidor;
+    as que correspondem a uma ocorrência de recorrência ainda pendente ficam
+    ligadas à regra. Tudo roda em uma transação. Retorna um dicionário com
+    lidas, inseridas, duplicadas, recorrentes e segundos, ou None em caso de erro.
+    """
+    try:
+        inicio = time.perf_counter()
+        lidas = 0
+        with app.get_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TEMP TABLE importacao (
+                    data DATE NOT NULL,
+                    descricao VARCHAR(255) NOT NULL,
+                    valor BIGINT NOT NULL,
+                    tipo_id SMALLINT NOT NULL,
+                    pessoa_id SMALLINT,
+                    pagamento_id SMALLINT
+                ) ON COMMIT DROP
+            """)
+
+            ids = _id_resolver(cursor)
+            buffer = io.StringIO()
+            no_bloco = 0
+            for registro in registros:
+                buffer.write(_copy_line(registro, ids))
+                no_bloco += 1
+                if no_bloco == chunk_size:
+                    buffer.seek(0)
+                    cursor.copy_expert("COPY importacao FROM STDIN", buffer)
+                    lidas += no_bloco
+                    buffer = io.StringIO()
+                    no_bloco = 0
+                    if progress:
+                        progress(lidas)
+            if no_bloco:
+                buffer.seek(0)
+                cursor.copy_expert("COPY importacao FROM STDIN", buffer)
+                lidas += no_bloco
+                if progress:
+                    progress(lidas)
+
+            cursor.execute("ANALYZE importacao")
+            cursor.execute("SELECT DISTINCT date_trunc('month', data)::date FROM importacao")
+            meses = [mes for (mes,) in cursor.fetchall()]
+
+            # Pessoa ausente vira 0 para que a comparação seja uma igualdade simples e
+            # o planejador possa usar Hash Anti Join; só lê Movimentacoes no intervalo importado.
+            # Uma linha que toma o lugar de uma ocorrência pendente de recorrência (mesma
+            # data, descrição e pessoa) é gravada com o recorrencia_id da regra.
+            cursor.execute(f"""
+                WITH intervalo AS (SELECT MIN(data) AS inicio, MAX(data) AS fim FROM importacao),
+                existentes AS (
+                    SELECT m.data, m.descricao, m.valor, COALESCE(m.pessoa_id, 0) AS pessoa_id
+                    FROM Movimentacoes m, intervalo
+                    WHERE m.data BETWEEN intervalo.inicio AND intervalo.fim
+                ),
+                meses (mes) AS (SELECT unnest(%(meses)s::date[])),
+                ocorrencias AS ({RULE_OCCURRENCES_SQL}),
+                pendentes AS (
+                    SELECT o.data, o.descricao, COALESCE(o.pessoa_id, 0) AS pessoa_id, o.recorrencia_id
+                    FROM ocorrencias o
+                    WHERE {PENDING_OCCURRENCE_SQL}
+                ),
+                inseridas AS (
+                    INSERT INTO Movimentacoes (data, descricao, valor, tipo_id, pessoa_id, pagamento_id, recorrencia_id)
+                    SELECT i.data, i.descricao, i.valor, i.tipo_id, i.pessoa_id, i.pagamento_id, p.recorrencia_id
+                    FROM importacao i
+                    LEFT JOIN pendentes p
+                      ON p.data = i.data AND p.descricao = i.descricao AND p.pessoa_id = COALESCE(i.pessoa_id, 0)
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM existentes e
+                        WHERE e.data = i.data AND e.descricao = i.descricao AND e.valor = i.valor
+                          AND e.pessoa_id = COALESCE(i.pessoa_id, 0)
+                    )
+                    RETURNING recorrencia_id
+                )
+                SELECT COUNT(*), COUNT(recorrencia_id) FROM inseridas
+            """, {"meses": meses})
+            inseridas, recorrentes = cursor.fetchone()
+
+        if inseridas:
+            app._notify_data_changed(meses)
+
+        segundos = time.perf_counter() - inicio
+        return {"lidas": lidas, "inseridas": inseridas, "duplicadas": lidas - inseridas,
+                "recorrentes": recorrentes, "segundos": segundos}
+
+    except Exception as e:
+        print(f"Erro ao importar extrato: {str(e)}")
+        return None
+
+def write_sample_csv(arquivo, linhas=1_000_000, seed=0):
+    """
+    Gera um extrato CSV sintético (formato brasileiro) para medir a importação.
+    """
+    gerador = random.Random(seed)
+    descricoes = ["Supermercado", "Farmácia", "Posto", "Restaurante", "Transferência", "Padaria", "Livraria"]
+    primeiro_dia = date(2015, 1, 1).toordinal()
+    with open(arquivo, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["Data", "Descrição", "Valor", "Pessoa", "Pagamento"])
+        for i in range(linhas):
+            dia = date.fromordinal(primeiro_dia + gerador.randrange(3650))
+            centavos = gerador.randrange(-500000, 800000)
+            writer.writerow([
+                dia.strftime("%d/%m/%Y"),
+                f"{gerador.choice(descricoes)} {i % 997}",
+                f"{centavos // 100},{centavos % 100:02d}" if centavos >= 0 else f"-{-centavos // 100},{-centavos % 100:02d}",
+                gerador.choice(["Yuri", "Marcos"]),
+                gerador.choice(["Débito", "Crédito"]),
+            ])
+
+def benchmark_import(linhas=1_000_000):
+    """
+    Mede a vazão da importação (linhas por segundo) em um CSV sintético,
+    importando-o duas vezes: a segunda mede o caminho só de duplicatas.
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, "extrato.csv")
+        write_sample_csv(arquivo, linhas)
+        for rodada in ("primeira importação", "reimportação (duplicatas)"):
+            resultado = import_statement(iter_csv(arquivo))
+            if resultado is None:
+                return False
+            print(f"{rodada}: {resultado['lidas']} lidas, {resultado['inseridas']} inseridas, "
+                  f"{resultado['duplicadas']} duplicadas em {resultado['segundos']:.1f} s "
+                  f"({resultado['lidas'] / resultado['segundos']:,.0f} linhas/s)")
+    return True
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--benchmark":
+        sys.exit(0 if benchmark_import(int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000) else 1)
+
+    if len(sys.argv) < 2:
+        print("Uso: python import_statements.py extrato.csv|extrato.ofx [pessoa] [pagamento]")
+        print("     python import_statements.py --benchmark [linhas]")
+        sys.exit(2)
+
+    arquivo = sys.argv[1]
+    resultado = import_statement(
+        iter_statement(arquivo, *sys.argv[2:4]),
+        progress=lambda lidas: print(f"{lidas} linhas lidas...")
+    )
+    if resultado is None:
+        sys.exit(1)
+    print(f"{resultado['inseridas']} movimentações importadas ({resultado['recorrentes']} ligadas a recorrências), "
+          f"{resultado['duplicadas']} duplicadas ignoradas "
+          f"({resultado['lidas'] / max(resultado['segundos'], 1e-9):,.0f} linhas/s).")
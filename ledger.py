@@ -0,0 +1,217 @@
+from datetime import date
+
+# SQL das consultas de mês e das regras de recorrência e cálculo dos totais,
+# compartilhados pelo aplicativo, pelos repositórios e pelo setup_database.
+# Não importa o PyQt6 nem o psycopg2.
+
+# Ocorrências das regras de Recorrencias em cada mês do CTE "meses". O dia da
+# regra é limitado ao último dia do mês e, se duas regras caem na mesma
+# (data, descricao, pessoa), vale a mais antiga.
+RULE_OCCURRENCES_SQL = """
+    SELECT DISTINCT ON (data, r.descricao, r.pessoa_id)
+           (meses.mes + LEAST(r.dia, EXTRACT(DAY FROM meses.mes + interval '1 month - 1 day')::integer) - 1) AS data,
+           r.descricao, r.valor, r.tipo_id, r.pessoa_id, r.pagamento_id,
+           CASE WHEN r.tipo_id = (SELECT id FROM Tipos WHERE nome = 'Conta') THEN 0 END AS total_parcelas,
+           r.id AS recorrencia_id, meses.mes
+    FROM meses
+    JOIN Recorrencias r
+      ON (r.inicio IS NULL OR r.inicio < meses.mes + interval '1 month')
+     AND (r.fim IS NULL OR r.fim >= meses.mes)
+    ORDER BY data, r.descricao, r.pessoa_id, r.id
+"""
+
+# Ocorrência "o" ainda não gravada em Movimentacoes, seja pela própria regra
+# naquele mês, seja por um lançamento equivalente na mesma data (regras sem
+# pessoa casam com lançamentos sem pessoa)
+PENDING_OCCURRENCE_SQL = """
+    NOT EXISTS (
+        SELECT 1 FROM Movimentacoes x
+        WHERE x.recorrencia_id = o.recorrencia_id
+          AND x.data >= o.mes AND x.data < (o.mes + interval '1 month')::date
+    )
+    AND NOT EXISTS (
+        SELECT 1 FROM Movimentacoes x
+        WHERE x.data = o.data AND x.descricao = o.descricao AND x.pessoa_id IS NOT DISTINCT FROM o.pessoa_id
+    )
+"""
+
+# Linhas "m" com os ids de dimensão trocados pelos nomes, no formato
+# (data, descricao, valor, tipo, pessoa, pagamento, parcela_atual, total_parcelas)
+MOVIMENTACOES_NOMES_SQL = """
+    SELECT m.data, m.descricao, m.valor, t.nome, p.nome, g.nome, m.parcela_atual, m.total_parcelas
+    FROM ({linhas}) m
+    JOIN Tipos t ON t.id = m.tipo_id
+    LEFT JOIN Pessoas p ON p.id = m.pessoa_id
+    LEFT JOIN Pagamentos g ON g.id = m.pagamento_id
+    ORDER BY m.data
+"""
+
+# Intervalo contínuo de meses entre %(inicio)s e %(fim)s
+MONTH_RANGE_SQL = """
+    SELECT generate_series(date_trunc('month', %(inicio)s::date), date_trunc('month', %(fim)s::date),
+                           interval '1 month')::date
+"""
+
+# Movimentações gravadas no mês [%(inicio)s, %(fim)s) junto com as ocorrências
+# virtuais das regras de recorrência que ainda não foram materializadas
+MONTH_ROWS_SQL = f"""
+    WITH meses (mes) AS (SELECT %(inicio)s::date),
+    ocorrencias AS ({RULE_OCCURRENCES_SQL})
+    {MOVIMENTACOES_NOMES_SQL.format(linhas=f'''
+        SELECT data, descricao, valor, tipo_id, pessoa_id, pagamento_id, parcela_atual, total_parcelas
+        FROM Movimentacoes
+        WHERE data >= %(inicio)s AND data < %(fim)s
+        UNION ALL
+        SELECT o.data, o.descricao, o.valor, o.tipo_id, o.pessoa_id, o.pagamento_id, NULL, o.total_parcelas
+        FROM ocorrencias o
+        WHERE {PENDING_OCCURRENCE_SQL}
+    ''')}
+"""
+
+def add_months(data, meses):
+    """
+    Soma meses a uma data, ajustando o dia ao fim do mês quando necessário.
+    """
+    from dateutil.relativedelta import relativedelta
+    return data + relativedelta(months=meses)
+
+def month_bounds(month, year):
+    """
+    Retorna o intervalo semiaberto [início, fim) de datas de um mês.
+    """
+    inicio = date(int(year), int(month), 1)
+    return inicio, date(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+
+def empty_totals(previous_month_total=0, previous_savings=0, pessoas=()):
+    """
+    Retorna a estrutura de totais de um mês zerada, com uma entrada para
+    cada pessoa informada.
+    """
+    return {
+        "Poupança": {"Total": previous_savings},
+        "Entradas": {**dict.fromkeys(pessoas, 0), "Total": 0},
+        "Saídas": {**dict.fromkeys(pessoas, 0), "Total": 0},
+        "Crédito": dict.fromkeys(pessoas, 0),
+        "Total do Mês": previous_month_total
+    }
+
+def add_to_person(group, pessoa, valor):
+    # Pessoas ainda não cadastradas entram no resumo em vez de serem descartadas
+    if pessoa is not None:
+        group[pessoa] = group.get(pessoa, 0) + valor
+
+def calculate_totals(data, previous_month_total, previous_savings, pessoas=()):
+    """
+    Calcula os totais de um mês linha a linha, a partir das movimentações no
+    formato de get_month_data.
+    """
+    totals = empty_totals(previous_month_total, previous_savings, pessoas)
+
+    for record in data:
+        _, _, valor, tipo, pessoa, pagamento, _, _ = record
+
+        if tipo in ["Recebimento", "Salário"]:
+            totals["Entradas"]["Total"] += valor
+            add_to_person(totals["Entradas"], pessoa, valor)
+            totals["Total do Mês"] += valor
+
+        elif tipo in ["Conta", "Compra"]:
+            totals["Saídas"]["Total"] += abs(valor)  # Valor absoluto para exibição
+            add_to_person(totals["Saídas"], pessoa, abs(valor))  # Valor absoluto para exibição
+            totals["Total do Mês"] += valor  # Mantém o sinal negativo para o total
+
+        elif tipo == "Poupança":
+            totals["Poupança"]["Total"] += valor
+            totals["Total do Mês"] += valor
+
+        elif tipo == "Retirada":
+            totals["Poupança"]["Total"] -= abs(valor)
+            totals["Total do Mês"] -= abs(valor)
+
+        if pagamento == "Crédito":
+            add_to_person(totals["Crédito"], pessoa, abs(valor))  # Valor absoluto para crédito
+
+    return totals
+
+# Categoria de cada tipo de movimentação no cálculo dos totais
+ENTRADAS, SAIDAS, POUPANCA, RETIRADA, CREDITO = range(5)
+CATEGORIAS_TIPOS = {
+    "Recebimento": ENTRADAS,
+    "Salário": ENTRADAS,
+    "Conta": SAIDAS,
+    "Compra": SAIDAS,
+    "Poupança": POUPANCA,
+    "Retirada": RETIRADA
+}
+
+def iter_totals_by_id(summary, nomes, previous_month_total=0, previous_savings=0):
+    """
+    Calcula de uma vez os totais de vários meses a partir de linhas agregadas
+    com os ids das dimensões (mes, pessoa_id, tipo_id, pagamento_id,
+    valor_total, valor_abs), como as de ResumoMensal, em ordem de mês.
+    nomes traz {id: nome} de "Tipos", "Pessoas" e "Pagamentos".
+
+    Cada tipo é classificado uma única vez e as linhas são somadas por
+    mês x categoria x pessoa comparando apenas ids; os nomes das pessoas só
+    entram na montagem dos totais de cada mês. Gera (mes, totais, total do
+    mês anterior), com os mesmos totais de calculate_totals, encadeando os
+    saldos de um mês para o seguinte.
+    """
+    categorias = {id_: CATEGORIAS_TIPOS.get(nome) for id_, nome in nomes["Tipos"].items()}
+    credito = {id_ for id_, nome in nomes["Pagamentos"].items() if nome == "Crédito"}
+
+    grupos = {}  # mes -> {(categoria, pessoa_id): [valor_total, valor_abs]}
+    for mes, pessoa_id, tipo_id, pagamento_id, valor_total, valor_abs in summary:
+        somas = grupos.get(mes)
+        if somas is None:
+            somas = grupos[mes] = {}
+
+        categoria = categorias.get(tipo_id)
+        if categoria is not None:
+            soma = somas.get((categoria, pessoa_id))
+            if soma is None:
+                somas[(categoria, pessoa_id)] = [valor_total, valor_abs]
+            else:
+                soma[0] += valor_total
+                soma[1] += valor_abs
+
+        if pagamento_id in credito:
+            soma = somas.get((CREDITO, pessoa_id))
+            if soma is None:
+                somas[(CREDITO, pessoa_id)] = [valor_total, valor_abs]
+            else:
+                soma[1] += valor_abs
+
+    pessoas = nomes["Pessoas"]
+    cadastradas = list(pessoas.values())
+    for mes in sorted(grupos):
+        totals = empty_totals(previous_month_total, previous_savings, cadastradas)
+
+        for (categoria, pessoa_id), (valor_total, valor_abs) in grupos[mes].items():
+            pessoa = pessoas.get(pessoa_id)
+
+            if categoria == ENTRADAS:
+                totals["Entradas"]["Total"] += valor_total
+                add_to_person(totals["Entradas"], pessoa, valor_total)
+                totals["Total do Mês"] += valor_total
+
+            elif categoria == SAIDAS:
+                totals["Saídas"]["Total"] += valor_abs
+                add_to_person(totals["Saídas"], pessoa, valor_abs)
+                totals["Total do Mês"] += valor_total
+
+            elif categoria == POUPANCA:
+                totals["Poupança"]["Total"] += valor_total
+                totals["Total do Mês"] += valor_total
+
+            elif categoria == RETIRADA:
+                totals["Poupança"]["Total"] -= valor_abs
+                totals["Total do Mês"] -= valor_abs
+
+            else:
+                add_to_person(totals["Crédito"], pessoa, valor_abs)
+
+        yield mes, totals, previous_month_total
+
+        previous_month_total = totals["Total do Mês"]
+        previous_savings = totals["Poupança"]["Total"]
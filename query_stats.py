@@ -0,0 +1,221 @@
+import atexit
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Variáveis de ambiente: ativação, limite da consulta lenta (ms), arquivo do
+# log de consultas lentas e arquivo do resumo (os dois últimos, stderr por padrão)
+ENV_ENABLED = "FINANCE_QUERY_STATS"
+ENV_SLOW_MS = "FINANCE_SLOW_QUERY_MS"
+ENV_SLOW_LOG = "FINANCE_SLOW_QUERY_LOG"
+ENV_SUMMARY_FILE = "FINANCE_QUERY_STATS_FILE"
+
+DEFAULT_SLOW_MS = 200
+
+# Funções públicas do aplicativo usadas para agrupar as consultas, da mais interna para fora
+GROUP_DEPTH = 2
+
+# Infraestrutura que nunca é o "chamador" de uma consulta
+_IGNORED_FUNCTIONS = {"get_connection", "get_pool", "connect_to_database", "Worker.run"}
+_IGNORED_PREFIXES = ("ConnectionPool.",)
+
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+_WHITESPACE = re.compile(r"\s+")
+
+def _slow_ms_from_env():
+    """
+    Lê o limite da consulta lenta do ambiente. Um valor inválido não impede o
+    aplicativo de abrir: gera um aviso e o padrão é usado.
+    """
+    texto = os.environ.get(ENV_SLOW_MS, "").strip()
+    if not texto:
+        return DEFAULT_SLOW_MS
+    try:
+        valor = float(texto)
+    except ValueError:
+        valor = None
+    if valor is None or not 0 <= valor < float("inf"):
+        sys.stderr.write(f"Aviso: {ENV_SLOW_MS}={texto!r} inválido; usando {DEFAULT_SLOW_MS} ms.\n")
+        return DEFAULT_SLOW_MS
+    return valor
+
+enabled = os.environ.get(ENV_ENABLED, "") not in ("", "0")
+slow_ms = _slow_ms_from_env()
+
+_lock = threading.Lock()
+_cursor_class = None
+_stats = {}  # grupo -> {comando: [chamadas, segundos, maior tempo, linhas]}
+
+def _caller_group():
+    """
+    Identifica quem fez a consulta pelas funções públicas dos módulos do
+    projeto na pilha, por exemplo "WriteQueue.drain_batch" ou
+    "VisualizationDialog.load_months > iter_monthly_totals".
+    """
+    nomes = []
+    frame = sys._getframe(2)
+    while frame is not None and len(nomes) < GROUP_DEPTH:
+        code = frame.f_code
+        nome = getattr(code, "co_qualname", code.co_name)
+        if (code.co_filename.startswith(_PROJECT_DIR) and code.co_filename != __file__
+                and not nome.rsplit(".", 1)[-1].startswith(("_", "<"))
+                and nome not in _IGNORED_FUNCTIONS and not nome.startswith(_IGNORED_PREFIXES)):
+            nomes.append(nome)
+        frame = frame.f_back
+    return " > ".join(reversed(nomes)) or "<fora do aplicativo>"
+
+def statement_label(sql, tamanho=120):
+    """
+    Resume um comando SQL em uma linha, para agrupar e registrar.
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    elif not isinstance(sql, str):
+        sql = str(sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    return sql if len(sql) <= tamanho else sql[:tamanho - 3] + "..."
+
+def _write(variavel, texto):
+    caminho = os.environ.get(variavel)
+    if caminho:
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        sys.stderr.write(texto)
+
+def record(comando, segundos, linhas=-1, sql=None):
+    """
+    Registra uma execução de comando (ou evento como a abertura de conexão e
+    o empréstimo do pool, que inclui a espera) no grupo da função chamadora. Não faz nada se a
+    instrumentação estiver desligada.
+    """
+    if not enabled:
+        return
+    grupo = _caller_group()
+    with _lock:
+        entrada = _stats.setdefault(grupo, {}).setdefault(comando, [0, 0.0, 0.0, 0])
+        entrada[0] += 1
+        entrada[1] += segundos
+        entrada[2] = max(entrada[2], segundos)
+        entrada[3] += max(linhas, 0)
+
+    if segundos * 1000 >= slow_ms:
+        _write(ENV_SLOW_LOG, (
+            f"[{datetime.now().isoformat(timespec='milliseconds')}] consulta lenta {segundos * 1000:.1f} ms, "
+            f"{linhas} linhas, em {grupo}: {statement_label(sql if sql is not None else comando, 2000)}\n"
+        ))
+
+def _instrumented_cursor():
+    """
+    Define, na primeira chamada, a classe do cursor instrumentado. O psycopg2
+    só é importado aqui, para não pesar na abertura do aplicativo.
+    """
+    global _cursor_class
+    if _cursor_class is None:
+        from psycopg2 import extensions
+
+        class InstrumentedCursor(extensions.cursor):
+            """
+            Cursor que mede o tempo, as linhas e as chamadas de cada comando. Em
+            cursores nomeados, as buscas (incluindo a iteração) também são medidas,
+            pois é nelas que as linhas trafegam.
+            """
+            def execute(self, query, vars=None):
+                inicio = time.perf_counter()
+                try:
+                    return super().execute(query, vars)
+                finally:
+                    self._label = statement_label(query)
+                    record(self._label, time.perf_counter() - inicio, self.rowcount, self.query or query)
+
+            def executemany(self, query, vars_list):
+                inicio = time.perf_counter()
+                try:
+                    return super().executemany(query, vars_list)
+                finally:
+                    self._label = statement_label(query)
+                    record(self._label, time.perf_counter() - inicio, self.rowcount, query)
+
+            def copy_expert(self, sql, file, size=8192):
+                inicio = time.perf_counter()
+                try:
+                    return super().copy_expert(sql, file, size)
+                finally:
+                    record(statement_label(sql), time.perf_counter() - inicio, self.rowcount, sql)
+
+            def _fetch(self, fetch, *args):
+                if self.name is None:
+                    return fetch(*args)
+                inicio = time.perf_counter()
+                rows = fetch(*args)
+                record(f"FETCH {getattr(self, '_label', '')}", time.perf_counter() - inicio, len(rows) if rows else 0)
+                return rows
+
+            def fetchmany(self, size=None):
+                return self._fetch(super().fetchmany, self.arraysize if size is None else size)
+
+            def fetchall(self):
+                return self._fetch(super().fetchall)
+
+            def __iter__(self):
+                if self.name is None:
+                    return super().__iter__()
+                return self._iter_named()
+
+            def _iter_named(self):
+                while True:
+                    rows = self.fetchmany(self.itersize)
+                    if not rows:
+                        return
+                    yield from rows
+
+        _cursor_class = InstrumentedCursor
+    return _cursor_class
+
+def cursor_factory():
+    """
+    Retorna a classe de cursor a usar nas conexões (None para a padrão).
+    """
+    return _instrumented_cursor() if enabled else None
+
+def snapshot():
+    """
+    Retorna uma cópia das estatísticas: {grupo: {comando: (chamadas, segundos, maior tempo, linhas)}}.
+    """
+    with _lock:
+        return {grupo: {comando: tuple(valores) for comando, valores in comandos.items()}
+                for grupo, comandos in _stats.items()}
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+def summary():
+    """
+    Formata as estatísticas agrupadas por função chamadora, com os grupos e
+    os comandos em ordem decrescente de tempo total.
+    """
+    dados = snapshot()
+    if not dados:
+        return "Nenhuma consulta registrada.\n"
+
+    def total(comandos):
+        return sum(valores[1] for valores in comandos.values())
+
+    linhas = ["Resumo das consultas (tempo total, chamadas, média, máximo, linhas):"]
+    for grupo, comandos in sorted(dados.items(), key=lambda item: -total(item[1])):
+        chamadas = sum(valores[0] for valores in comandos.values())
+        linhas.append(f"{grupo}: {total(comandos) * 1000:.1f} ms em {chamadas} chamadas")
+        for comando, (n, segundos, maior, registros) in sorted(comandos.items(), key=lambda item: -item[1][1]):
+            linhas.append(f"  {segundos * 1000:10.1f} ms {n:6d}x {segundos * 1000 / n:9.2f} ms "
+                          f"{maior * 1000:9.2f} ms {registros:8d}  {comando}")
+    return "\n".join(linhas) + "\n"
+
+def _dump_summary():
+    _write(ENV_SUMMARY_FILE, summary())
+
+if enabled:
+    atexit.register(_dump_summary)
@@ -0,0 +1,518 @@
+import random
+import sqlite3
+import sys
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta
+
+import ledger
+
+# Dimensões pré-cadastradas, as mesmas de setup_database.DIMENSOES_SQL
+TIPOS = ("Compra", "Conta", "Recebimento", "Salário", "Poupança", "Retirada")
+PESSOAS = ("Yuri", "Marcos")
+PAGAMENTOS = ("Débito", "Crédito")
+
+def _as_date(valor):
+    """
+    Converte datetime ou texto ISO em date.
+    """
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, str):
+        return date.fromisoformat(valor[:10])
+    return valor
+
+def _row_key(row):
+    # Ordem total, com None antes dos demais valores de cada coluna
+    return [(valor is not None, valor if valor is not None else 0) for valor in row]
+
+def _normalize_row(linha):
+    """
+    Completa uma linha (data, descricao, valor, tipo, pessoa, pagamento[,
+    parcela_atual, total_parcelas]) com as parcelas ausentes.
+    """
+    data, descricao, valor, tipo, pessoa, pagamento, parcela_atual, total_parcelas = (*linha, None, None)[:8]
+    return _as_date(data), descricao, int(valor), tipo, pessoa, pagamento, parcela_atual, total_parcelas
+
+class MovimentacoesRepository(ABC):
+    """
+    Interface de armazenamento das movimentações, limites e regras de
+    recorrência. Datas são date, valores são centavos e as linhas de um mês
+    seguem o formato de get_month_data, em ordem total para que backends
+    diferentes possam ser comparados linha a linha.
+    """
+    @abstractmethod
+    def add_movimentacoes(self, linhas):
+        """
+        Grava as linhas em uma transação e retorna quantas foram gravadas.
+        """
+
+    @abstractmethod
+    def add_recorrencia(self, descricao, valor, dia, tipo, pessoa=None, pagamento=None, inicio=None, fim=None):
+        """
+        Cadastra uma regra de recorrência mensal e retorna seu id.
+        """
+
+    @abstractmethod
+    def end_recorrencia(self, recorrencia_id, fim):
+        """
+        Encerra a regra: ela deixa de gerar ocorrências após fim.
+        """
+
+    @abstractmethod
+    def replicate_recurring(self, inicio, fim):
+        """
+        Materializa as ocorrências pendentes das regras em todos os meses entre
+        inicio e fim (inclusive). Retorna a quantidade de linhas inseridas.
+        """
+
+    @abstractmethod
+    def upsert_limite(self, pessoa, month, year, valor):
+        """
+        Define o limite da pessoa no mês, substituindo o anterior.
+        """
+
+    @abstractmethod
+    def get_limite(self, pessoa, month, year):
+        """
+        Retorna o limite da pessoa no mês, ou None.
+        """
+
+    @abstractmethod
+    def pessoas(self):
+        """
+        Retorna as pessoas cadastradas, em ordem de cadastro.
+        """
+
+    @abstractmethod
+    def months(self, inicio=None, fim=None):
+        """
+        Retorna, em ordem, o primeiro dia de cada mês com lançamentos gravados
+        entre o mês de inicio e fim (exclusive).
+        """
+
+    @abstractmethod
+    def _month_rows(self, month, year):
+        """
+        Retorna as linhas do mês, em qualquer ordem.
+        """
+
+    def month_rows(self, month, year):
+        """
+        Retorna as movimentações do mês com as ocorrências de recorrência
+        ainda não materializadas.
+        """
+        return sorted(self._month_rows(month, year), key=_row_key)
+
+    def monthly_totals(self, inicio=None, fim=None, previous_month_total=0, previous_savings=0):
+        """
+        Retorna (mês, ano, totais, total do mês anterior) de cada mês com
+        lançamentos, como iter_monthly_totals, calculados a partir das linhas.
+        """
+        pessoas = self.pessoas()
+        resultado = []
+        for mes in self.months(inicio, fim):
+            totals = ledger.calculate_totals(
+                self.month_rows(mes.month, mes.year), previous_month_total, previous_savings, pessoas
+            )
+            resultado.append((mes.month, mes.year, totals, previous_month_total))
+            previous_month_total = totals["Total do Mês"]
+            previous_savings = totals["Poupança"]["Total"]
+        return resultado
+
+    def close(self):
+        pass
+
+class PostgresRepository(MovimentacoesRepository):
+    """
+    Repositório sobre o banco PostgreSQL do aplicativo, com o pool, o cache
+    de dimensões e as consultas de Controle_Financeiro_Final. As gravações
+    avisam os ouvintes de alteração, como as funções save_*.
+    """
+    def __init__(self):
+        # Importado só aqui, com o PyQt6 e o psycopg2 que ele carrega: o
+        # SQLiteRepository não depende de nenhum dos dois
+        import Controle_Financeiro_Final as app
+        self._app = app
+    def add_movimentacoes(self, linhas):
+        ids = self._app.dimensions.get_id
+        valores = [
+            (data, descricao, valor, ids("Tipos", tipo), ids("Pessoas", pessoa), ids("Pagamentos", pagamento),
+             parcela_atual, total_parcelas)
+            for data, descricao, valor, tipo, pessoa, pagamento, parcela_atual, total_parcelas in map(_normalize_row, linhas)
+        ]
+        if not valores:
+            return 0
+        from psycopg2.extras import execute_values
+        with self._app.get_connection() as conn, conn.cursor() as cursor:
+            execute_values(cursor, """
+                INSERT INTO Movimentacoes (data, descricao, valor, tipo_id, pessoa_id, pagamento_id, parcela_atual, total_parcelas)
+                VALUES %s
+            """, valores, page_size=1000)
+        self._app._notify_data_changed([valor[0] for valor in valores])
+        return len(valores)
+
+    def add_recorrencia(self, descricao, valor, dia, tipo, pessoa=None, pagamento=None, inicio=None, fim=None):
+        with self._app.get_connection() as conn, conn.cursor() as cursor:
+            def ids(tabela, nome):
+                return self._app.dimensions.get_id(tabela, nome, cursor)
+            cursor.execute("""
+                INSERT INTO Recorrencias (descricao, valor, dia, inicio, fim, tipo_id, pessoa_id, pagamento_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (descricao, valor, dia, _as_date(inicio), _as_date(fim),
+                  ids("Tipos", tipo), ids("Pessoas", pessoa), ids("Pagamentos", pagamento)))
+            recorrencia_id = cursor.fetchone()[0]
+        self._app._notify_data_changed(None if inicio is None else [_as_date(inicio)])
+        return recorrencia_id
+
+    def end_recorrencia(self, recorrencia_id, fim):
+        with self._app.get_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("UPDATE Recorrencias SET fim = %s WHERE id = %s", (_as_date(fim), recorrencia_id))
+        self._app._notify_data_changed([_as_date(fim)])
+
+    def replicate_recurring(self, inicio, fim):
+        with self._app.get_connection() as conn, conn.cursor() as cursor:
+            inseridas = self._app._replicate_recurring_range(cursor, _as_date(inicio), _as_date(fim))
+        if inseridas:
+            self._app._notify_data_changed([_as_date(inicio)])
+        return inseridas
+
+    def upsert_limite(self, pessoa, month, year, valor):
+        with self._app.get_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO Limites (data, pessoa, valor)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (data, pessoa) DO UPDATE SET valor = EXCLUDED.valor
+            """, (date(year, month, 1), pessoa, valor))
+
+    def get_limite(self, pessoa, month, year):
+        with self._app.get_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT valor FROM Limites WHERE data = %s AND pessoa = %s", (date(year, month, 1), pessoa))
+            row = cursor.fetchone()
+        return None if row is None else row[0]
+
+    def pessoas(self):
+        return self._app.get_pessoas()
+
+    def months(self, inicio=None, fim=None):
+        with self._app.get_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT DISTINCT date_trunc('month', data)::date AS mes
+                FROM Movimentacoes
+                WHERE (%(inicio)s::date IS NULL OR data >= date_trunc('month', %(inicio)s::date))
+                  AND (%(fim)s::date IS NULL OR date_trunc('month', data) < %(fim)s::date)
+                ORDER BY mes
+            """, {"inicio": _as_date(inicio), "fim": _as_date(fim)})
+            return [mes for (mes,) in cursor.fetchall()]
+
+    def _month_rows(self, month, year):
+        return self._app.load_month_rows(month, year)
+
+    def monthly_totals(self, inicio=None, fim=None, previous_month_total=0, previous_savings=0):
+        # Lidos de ResumoMensal, sem percorrer as linhas
+        return list(self._app.iter_monthly_totals(_as_date(inicio), _as_date(fim), previous_month_total, previous_savings))
+
+# Esquema do SQLite equivalente ao de setup_database, com datas em texto ISO
+SQLITE_SCHEMA_SQL = [
+    "CREATE TABLE IF NOT EXISTS Pessoas (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS Pagamentos (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS Tipos (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE)",
+    """
+    CREATE TABLE IF NOT EXISTS Recorrencias (
+        id INTEGER PRIMARY KEY,
+        descricao TEXT NOT NULL,
+        valor INTEGER NOT NULL,
+        dia INTEGER NOT NULL CHECK (dia BETWEEN 1 AND 31),
+        inicio TEXT,
+        fim TEXT,
+        tipo_id INTEGER NOT NULL REFERENCES Tipos(id),
+        pessoa_id INTEGER REFERENCES Pessoas(id),
+        pagamento_id INTEGER REFERENCES Pagamentos(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Movimentacoes (
+        id INTEGER PRIMARY KEY,
+        data TEXT NOT NULL,
+        descricao TEXT NOT NULL,
+        valor INTEGER NOT NULL,
+        tipo_id INTEGER NOT NULL REFERENCES Tipos(id),
+        pessoa_id INTEGER REFERENCES Pessoas(id),
+        pagamento_id INTEGER REFERENCES Pagamentos(id),
+        parcela_atual INTEGER,
+        total_parcelas INTEGER,
+        recorrencia_id INTEGER REFERENCES Recorrencias(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Limites (
+        id INTEGER PRIMARY KEY,
+        data TEXT NOT NULL,
+        pessoa TEXT NOT NULL,
+        valor INTEGER NOT NULL,
+        UNIQUE (data, pessoa)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_movimentacoes_data ON Movimentacoes (data)",
+    "CREATE INDEX IF NOT EXISTS idx_movimentacoes_descricao_pessoa_data ON Movimentacoes (descricao, pessoa_id, data)",
+    """CREATE INDEX IF NOT EXISTS idx_movimentacoes_recorrencia_data ON Movimentacoes (recorrencia_id, data)
+       WHERE recorrencia_id IS NOT NULL""",
+]
+
+# Tradução de ledger.RULE_OCCURRENCES_SQL para o SQLite: ROW_NUMBER no lugar de DISTINCT ON
+_SQLITE_RULE_OCCURRENCES_SQL = """
+    SELECT data, descricao, valor, tipo_id, pessoa_id, pagamento_id, total_parcelas, recorrencia_id, mes
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY data, descricao, pessoa_id ORDER BY recorrencia_id) AS ordem
+        FROM (
+            SELECT date(meses.mes, '+' || (MIN(r.dia, CAST(strftime('%d', meses.mes, '+1 month', '-1 day') AS INTEGER)) - 1)
+                        || ' days') AS data,
+                   r.descricao, r.valor, r.tipo_id, r.pessoa_id, r.pagamento_id,
+                   CASE WHEN r.tipo_id = (SELECT id FROM Tipos WHERE nome = 'Conta') THEN 0 END AS total_parcelas,
+                   r.id AS recorrencia_id, meses.mes
+            FROM meses
+            JOIN Recorrencias r
+              ON (r.inicio IS NULL OR r.inicio < date(meses.mes, '+1 month'))
+             AND (r.fim IS NULL OR r.fim >= meses.mes)
+        )
+    )
+    WHERE ordem = 1
+"""
+
+# Tradução de ledger.PENDING_OCCURRENCE_SQL para o SQLite
+_SQLITE_PENDING_OCCURRENCE_SQL = """
+    NOT EXISTS (
+        SELECT 1 FROM Movimentacoes x
+        WHERE x.recorrencia_id = o.recorrencia_id
+          AND x.data >= o.mes AND x.data < date(o.mes, '+1 month')
+    )
+    AND NOT EXISTS (
+        SELECT 1 FROM Movimentacoes x
+        WHERE x.data = o.data AND x.descricao = o.descricao AND x.pessoa_id IS o.pessoa_id
+    )
+"""
+
+class SQLiteRepository(MovimentacoesRepository):
+    """
+    Repositório embutido em SQLite, em arquivo ou em memória (":memory:"),
+    sem servidor nem ida e volta pela rede. Aplica as mesmas regras de
+    recorrência do PostgreSQL, traduzidas para o SQL do SQLite.
+    """
+    def __init__(self, caminho=":memory:"):
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if caminho != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        self._ids = {}
+        with self._lock, self._conn:
+            for sql in SQLITE_SCHEMA_SQL:
+                self._conn.execute(sql)
+            for tabela, nomes in (("Tipos", TIPOS), ("Pessoas", PESSOAS), ("Pagamentos", PAGAMENTOS)):
+                self._conn.executemany(f"INSERT OR IGNORE INTO {tabela} (nome) VALUES (?)", [(nome,) for nome in nomes])
+
+    def _id(self, tabela, nome):
+        """
+        Retorna o id de um nome na dimensão, cadastrando pessoas e pagamentos
+        novos como o DimensionCache; um tipo desconhecido é um erro.
+        """
+        if not nome:
+            return None
+        chave = (tabela, nome)
+        if chave not in self._ids:
+            if tabela != "Tipos":
+                self._conn.execute(f"INSERT OR IGNORE INTO {tabela} (nome) VALUES (?)", (nome,))
+            row = self._conn.execute(f"SELECT id FROM {tabela} WHERE nome = ?", (nome,)).fetchone()
+            if row is None:
+                raise ValueError(f"Valor desconhecido em {tabela}: {nome}")
+            self._ids[chave] = row[0]
+        return self._ids[chave]
+
+    def add_movimentacoes(self, linhas):
+        with self._lock, self._conn:
+            valores = [
+                (data.isoformat(), descricao, valor, self._id("Tipos", tipo), self._id("Pessoas", pessoa),
+                 self._id("Pagamentos", pagamento), parcela_atual, total_parcelas)
+                for data, descricao, valor, tipo, pessoa, pagamento, parcela_atual, total_parcelas in map(_normalize_row, linhas)
+            ]
+            self._conn.executemany("""
+                INSERT INTO Movimentacoes (data, descricao, valor, tipo_id, pessoa_id, pagamento_id, parcela_atual, total_parcelas)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, valores)
+        return len(valores)
+
+    def add_recorrencia(self, descricao, valor, dia, tipo, pessoa=None, pagamento=None, inicio=None, fim=None):
+        with self._lock, self._conn:
+            cursor = self._conn.execute("""
+                INSERT INTO Recorrencias (descricao, valor, dia, inicio, fim, tipo_id, pessoa_id, pagamento_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (descricao, valor, dia,
+                  None if inicio is None else _as_date(inicio).isoformat(),
+                  None if fim is None else _as_date(fim).isoformat(),
+                  self._id("Tipos", tipo), self._id("Pessoas", pessoa), self._id("Pagamentos", pagamento)))
+            return cursor.lastrowid
+
+    def end_recorrencia(self, recorrencia_id, fim):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE Recorrencias SET fim = ? WHERE id = ?", (_as_date(fim).isoformat(), recorrencia_id))
+
+    def replicate_recurring(self, inicio, fim):
+        with self._lock, self._conn:
+            # rowcount não é informado para comandos iniciados por WITH
+            antes = self._conn.total_changes
+            self._conn.execute(f"""
+                WITH RECURSIVE meses (mes) AS (
+                    SELECT date(:inicio, 'start of month')
+                    UNION ALL
+                    SELECT date(mes, '+1 month') FROM meses WHERE mes < date(:fim, 'start of month')
+                ),
+                ocorrencias AS ({_SQLITE_RULE_OCCURRENCES_SQL})
+                INSERT INTO Movimentacoes (data, descricao, valor, tipo_id, pessoa_id, pagamento_id, total_parcelas, recorrencia_id)
+                SELECT o.data, o.descricao, o.valor, o.tipo_id, o.pessoa_id, o.pagamento_id, o.total_parcelas, o.recorrencia_id
+                FROM ocorrencias o
+                WHERE {_SQLITE_PENDING_OCCURRENCE_SQL}
+            """, {"inicio": _as_date(inicio).isoformat(), "fim": _as_date(fim).isoformat()})
+            return self._conn.total_changes - antes
+
+    def upsert_limite(self, pessoa, month, year, valor):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO Limites (data, pessoa, valor)
+                VALUES (?, ?, ?)
+                ON CONFLICT (data, pessoa) DO UPDATE SET valor = excluded.valor
+            """, (date(year, month, 1).isoformat(), pessoa, valor))
+
+    def get_limite(self, pessoa, month, year):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT valor FROM Limites WHERE data = ? AND pessoa = ?", (date(year, month, 1).isoformat(), pessoa)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def pessoas(self):
+        with self._lock:
+            return [nome for (nome,) in self._conn.execute("SELECT nome FROM Pessoas ORDER BY id")]
+
+    def months(self, inicio=None, fim=None):
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT DISTINCT date(data, 'start of month') AS mes
+                FROM Movimentacoes
+                WHERE (:inicio IS NULL OR data >= date(:inicio, 'start of month'))
+                  AND (:fim IS NULL OR date(data, 'start of month') < :fim)
+                ORDER BY mes
+            """, {
+                "inicio": None if inicio is None else _as_date(inicio).isoformat(),
+                "fim": None if fim is None else _as_date(fim).isoformat(),
+            }).fetchall()
+        return [date.fromisoformat(mes) for (mes,) in rows]
+
+    def _month_rows(self, month, year):
+        inicio, fim = ledger.month_bounds(month, year)
+        with self._lock:
+            rows = self._conn.execute(f"""
+                WITH meses (mes) AS (SELECT :inicio),
+                ocorrencias AS ({_SQLITE_RULE_OCCURRENCES_SQL})
+                SELECT m.data, m.descricao, m.valor, t.nome, p.nome, g.nome, m.parcela_atual, m.total_parcelas
+                FROM (
+                    SELECT data, descricao, valor, tipo_id, pessoa_id, pagamento_id, parcela_atual, total_parcelas
+                    FROM Movimentacoes
+                    WHERE data >= :inicio AND data < :fim
+                    UNION ALL
+                    SELECT o.data, o.descricao, o.valor, o.tipo_id, o.pessoa_id, o.pagamento_id, NULL, o.total_parcelas
+                    FROM ocorrencias o
+                    WHERE {_SQLITE_PENDING_OCCURRENCE_SQL}
+                ) m
+                JOIN Tipos t ON t.id = m.tipo_id
+                LEFT JOIN Pessoas p ON p.id = m.pessoa_id
+                LEFT JOIN Pagamentos g ON g.id = m.pagamento_id
+            """, {"inicio": inicio.isoformat(), "fim": fim.isoformat()}).fetchall()
+        return [(date.fromisoformat(data), *resto) for data, *resto in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def _scenario(repositorio, seed=0):
+    """
+    Aplica ao repositório uma sequência determinística de operações que
+    exercita todos os métodos e os casos de borda das recorrências (dia 31,
+    regras duplicadas, pessoa ausente, início e fim no meio do período).
+    Retorna os resultados de cada operação.
+    """
+    gerador = random.Random(seed)
+    resultados = []
+    resultados.append(repositorio.add_recorrencia("Salário", 500000, 31, "Recebimento", "Yuri"))
+    resultados.append(repositorio.add_recorrencia("Aluguel", -150000, 5, "Conta", "Marcos", "Débito"))
+    resultados.append(repositorio.add_recorrencia("Aluguel", -140000, 5, "Conta", "Marcos", "Débito"))
+    resultados.append(repositorio.add_recorrencia("Internet", -15000, 10, "Conta", None, "Débito"))
+    academia = repositorio.add_recorrencia("Academia", -10000, 20, "Conta", "Ana", "Crédito",
+                                           inicio=date(2024, 3, 15), fim=date(2024, 9, 30))
+    resultados.append(academia)
+
+    tipos = ["Compra", "Recebimento", "Poupança", "Retirada", "Conta", "Salário"]
+    linhas = []
+    for i in range(3000):
+        tipo = gerador.choice(tipos)
+        linhas.append((
+            date(2024, 1, 1) + timedelta(days=gerador.randrange(366)),
+            f"{gerador.choice(['Mercado', 'Posto', 'Farmácia'])} {gerador.randrange(50)}",
+            gerador.randrange(-100000, 100000),
+            tipo,
+            gerador.choice(["Yuri", "Marcos", "Ana", None]),
+            gerador.choice(["Débito", "Crédito", "Pix", None]),
+            *((parcela, 12) if (parcela := gerador.randrange(-8, 13)) > 0 else (None, None)),
+        ))
+    # Lançamento equivalente a uma ocorrência, que deixa de ser virtual
+    linhas.append((date(2024, 2, 5), "Aluguel", -150000, "Conta", "Marcos", "Débito", None, 0))
+    resultados.append(repositorio.add_movimentacoes(linhas))
+
+    resultados.append(repositorio.replicate_recurring(date(2024, 1, 1), date(2024, 6, 1)))
+    repositorio.end_recorrencia(academia, date(2024, 7, 31))
+    resultados.append(repositorio.replicate_recurring(date(2024, 5, 1), date(2024, 10, 1)))
+
+    repositorio.upsert_limite("Yuri", 3, 2024, 200000)
+    repositorio.upsert_limite("Yuri", 3, 2024, 250000)
+    repositorio.upsert_limite("Marcos", 3, 2024, 100000)
+    resultados.append([repositorio.get_limite(pessoa, 3, 2024) for pessoa in ("Yuri", "Marcos", "Ana")])
+
+    for month in range(1, 13):
+        resultados.append(repositorio.month_rows(month, 2024))
+    resultados.append(repositorio.month_rows(2, 2025))
+    resultados.append(repositorio.months())
+    resultados.append(repositorio.monthly_totals())
+    resultados.append(repositorio.monthly_totals(date(2024, 4, 10), date(2024, 9, 1), 1000, 500))
+    return resultados
+
+def check_backends(banco="finance_repository_check"):
+    """
+    Roda o mesmo cenário no SQLite em memória e em um banco PostgreSQL
+    descartável e compara os resultados de cada operação.
+    """
+    import benchmark
+
+    benchmark.configure_database(name=banco)
+    benchmark.prepare_database()
+    benchmark.finish_ledger()
+
+    sqlite = SQLiteRepository()
+    postgres = PostgresRepository()
+    esperado = _scenario(postgres)
+    obtido = _scenario(sqlite)
+    sqlite.close()
+
+    divergencias = [i for i, (e, o) in enumerate(zip(esperado, obtido)) if e != o]
+    for i in divergencias:
+        print(f"ERRO: operação {i} diverge:\n  postgresql {str(esperado[i])[:300]}\n  sqlite     {str(obtido[i])[:300]}")
+    if not divergencias:
+        linhas = sum(len(r) for r in esperado if isinstance(r, list) and r and isinstance(r[0], tuple) and len(r[0]) == 8)
+        print(f"OK: PostgreSQL e SQLite idênticos em {len(esperado)} operações ({linhas} linhas de meses comparadas).")
+    return not divergencias
+
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        sys.exit(0 if check_backends() else 1)
+
+    print("Uso: python repository.py --check")
+    sys.exit(2)
@@ -1,5 +1,7 @@
+import sys
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+import ledger
 
 # Configurações do banco PostgreSQL
 DB_NAME = "finance"
@@ -8,6 +10,228 @@ DB_PASSWORD = "senha"
 DB_HOST = "localhost"
 DB_PORT = "5432"
 
+# Tabelas de dimensão referenciadas por ids SMALLINT em Movimentacoes e Recorrencias
+DIMENSOES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS Pessoas (
+        id SMALLSERIAL PRIMARY KEY,
+        nome VARCHAR(50) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Pagamentos (
+        id SMALLSERIAL PRIMARY KEY,
+        nome VARCHAR(50) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Tipos (
+        id SMALLSERIAL PRIMARY KEY,
+        nome VARCHAR(50) NOT NULL UNIQUE
+    )
+    """,
+    """
+    INSERT INTO Tipos (nome)
+    VALUES ('Compra'), ('Conta'), ('Recebimento'), ('Salário'), ('Poupança'), ('Retirada')
+    ON CONFLICT (nome) DO NOTHING
+    """,
+    "INSERT INTO Pessoas (nome) VALUES ('Yuri'), ('Marcos') ON CONFLICT (nome) DO NOTHING",
+    "INSERT INTO Pagamentos (nome) VALUES ('Débito'), ('Crédito') ON CONFLICT (nome) DO NOTHING"
+]
+
+# Valores monetários (valor, valor_total, valor_abs) são guardados em centavos, como BIGINT
+RECORRENCIAS_SQL = """
+    CREATE TABLE IF NOT EXISTS Recorrencias (
+        id SERIAL PRIMARY KEY,
+        descricao VARCHAR(255) NOT NULL,
+        valor BIGINT NOT NULL,
+        dia INTEGER NOT NULL CHECK (dia BETWEEN 1 AND 31),
+        inicio DATE,
+        fim DATE,
+        tipo_id SMALLINT NOT NULL REFERENCES Tipos(id),
+        pessoa_id SMALLINT REFERENCES Pessoas(id),
+        pagamento_id SMALLINT REFERENCES Pagamentos(id)
+    )
+"""
+
+MOVIMENTACOES_SQL = """
+    CREATE TABLE IF NOT EXISTS Movimentacoes (
+        id SERIAL PRIMARY KEY,
+        data DATE NOT NULL,
+        descricao VARCHAR(255) NOT NULL,
+        valor BIGINT NOT NULL,
+        tipo_id SMALLINT NOT NULL REFERENCES Tipos(id),
+        pessoa_id SMALLINT REFERENCES Pessoas(id),
+        pagamento_id SMALLINT REFERENCES Pagamentos(id),
+        parcela_atual INTEGER,
+        total_parcelas INTEGER,
+        recorrencia_id INTEGER REFERENCES Recorrencias(id)
+    )
+"""
+
+# Índices para as consultas por mês e para as verificações de existência das recorrências
+INDICES_SQL = [
+    "CREATE INDEX IF NOT EXISTS idx_movimentacoes_data ON Movimentacoes (data)",
+    "CREATE INDEX IF NOT EXISTS idx_movimentacoes_descricao_pessoa_data ON Movimentacoes (descricao, pessoa_id, data)",
+    """CREATE INDEX IF NOT EXISTS idx_movimentacoes_recorrencia_data ON Movimentacoes (recorrencia_id, data)
+       WHERE recorrencia_id IS NOT NULL"""
+]
+
+# Totais mensais mantidos de forma incremental por gatilhos em Movimentacoes.
+# Pessoa e pagamento ausentes são guardados como 0 para fazerem parte da chave.
+RESUMO_MENSAL_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS ResumoMensal (
+        mes DATE NOT NULL,
+        pessoa_id SMALLINT NOT NULL DEFAULT 0,
+        tipo_id SMALLINT NOT NULL,
+        pagamento_id SMALLINT NOT NULL DEFAULT 0,
+        valor_total BIGINT NOT NULL DEFAULT 0,
+        valor_abs BIGINT NOT NULL DEFAULT 0,
+        quantidade INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (mes, pessoa_id, tipo_id, pagamento_id)
+    )
+    """,
+    """
+    CREATE OR REPLACE FUNCTION resumo_mensal_atualizar() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO ResumoMensal AS r (mes, pessoa_id, tipo_id, pagamento_id, valor_total, valor_abs, quantidade)
+            SELECT date_trunc('month', data)::date, COALESCE(pessoa_id, 0), tipo_id, COALESCE(pagamento_id, 0),
+                   -SUM(valor), -SUM(ABS(valor)), -COUNT(*)
+            FROM antigas
+            GROUP BY 1, 2, 3, 4
+            ON CONFLICT (mes, pessoa_id, tipo_id, pagamento_id) DO UPDATE
+            SET valor_total = r.valor_total + EXCLUDED.valor_total,
+                valor_abs = r.valor_abs + EXCLUDED.valor_abs,
+                quantidade = r.quantidade + EXCLUDED.quantidade;
+        END IF;
+
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO ResumoMensal AS r (mes, pessoa_id, tipo_id, pagamento_id, valor_total, valor_abs, quantidade)
+            SELECT date_trunc('month', data)::date, COALESCE(pessoa_id, 0), tipo_id, COALESCE(pagamento_id, 0),
+                   SUM(valor), SUM(ABS(valor)), COUNT(*)
+            FROM novas
+            GROUP BY 1, 2, 3, 4
+            ON CONFLICT (mes, pessoa_id, tipo_id, pagamento_id) DO UPDATE
+            SET valor_total = r.valor_total + EXCLUDED.valor_total,
+                valor_abs = r.valor_abs + EXCLUDED.valor_abs,
+                quantidade = r.quantidade + EXCLUDED.quantidade;
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS resumo_mensal_insert ON Movimentacoes",
+    "DROP TRIGGER IF EXISTS resumo_mensal_update ON Movimentacoes",
+    "DROP TRIGGER IF EXISTS resumo_mensal_delete ON Movimentacoes",
+    """
+    CREATE TRIGGER resumo_mensal_insert AFTER INSERT ON Movimentacoes
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION resumo_mensal_atualizar()
+    """,
+    """
+    CREATE TRIGGER resumo_mensal_update AFTER UPDATE ON Movimentacoes
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION resumo_mensal_atualizar()
+    """,
+    """
+    CREATE TRIGGER resumo_mensal_delete AFTER DELETE ON Movimentacoes
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION resumo_mensal_atualizar()
+    """
+]
+
+# Colunas monetárias que eram DECIMAL em reais antes do armazenamento em centavos
+COLUNAS_MONETARIAS = [
+    ("Movimentacoes", "valor"),
+    ("Recorrencias", "valor"),
+    ("Limites", "valor"),
+    ("ResumoMensal", "valor_total"),
+    ("ResumoMensal", "valor_abs"),
+]
+
+def _convert_money_to_cents(cursor):
+    """
+    Converte as colunas monetárias ainda em DECIMAL (reais) para BIGINT em
+    centavos. Retorna as colunas convertidas.
+    """
+    convertidas = []
+    for tabela, coluna in COLUNAS_MONETARIAS:
+        cursor.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s AND column_name = %s
+              AND data_type = 'numeric'
+        """, (tabela.lower(), coluna))
+        if cursor.fetchone() is None:
+            continue
+
+        cursor.execute(f"ALTER TABLE {tabela} ALTER COLUMN {coluna} TYPE BIGINT USING round({coluna} * 100)::bigint")
+        convertidas.append(f"{tabela}.{coluna}")
+
+    return convertidas
+
+def _normalize_dimensions(cursor):
+    """
+    Cria as tabelas de dimensão e converte as colunas texto tipo, pessoa e
+    pagamento de Movimentacoes e Recorrencias em ids SMALLINT, se o banco
+    ainda estiver no formato antigo. Retorna as tabelas convertidas.
+    """
+    for sql in DIMENSOES_SQL:
+        cursor.execute(sql)
+
+    convertidas = []
+    for tabela in ("Movimentacoes", "Recorrencias"):
+        cursor.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s AND column_name = 'pessoa'
+        """, (tabela.lower(),))
+        if cursor.fetchone() is None:
+            continue
+
+        if tabela == "Movimentacoes":
+            # O resumo antigo é chaveado por texto; setup_monthly_summary o recria por ids
+            cursor.execute("DROP FUNCTION IF EXISTS resumo_mensal_atualizar() CASCADE")
+            cursor.execute("DROP TABLE IF EXISTS ResumoMensal")
+
+        cursor.execute(f"""
+            INSERT INTO Pessoas (nome)
+            SELECT DISTINCT pessoa FROM {tabela} WHERE pessoa <> ''
+            ON CONFLICT (nome) DO NOTHING
+        """)
+        cursor.execute(f"""
+            INSERT INTO Pagamentos (nome)
+            SELECT DISTINCT pagamento FROM {tabela} WHERE pagamento <> ''
+            ON CONFLICT (nome) DO NOTHING
+        """)
+        cursor.execute(f"""
+            ALTER TABLE {tabela}
+            ADD COLUMN IF NOT EXISTS tipo_id SMALLINT REFERENCES Tipos(id),
+            ADD COLUMN IF NOT EXISTS pessoa_id SMALLINT REFERENCES Pessoas(id),
+            ADD COLUMN IF NOT EXISTS pagamento_id SMALLINT REFERENCES Pagamentos(id)
+        """)
+        cursor.execute(f"""
+            UPDATE {tabela} m
+            SET tipo_id = t.id, pessoa_id = p.id, pagamento_id = g.id
+            FROM {tabela} o
+            JOIN Tipos t ON t.nome = o.tipo
+            LEFT JOIN Pessoas p ON p.nome = o.pessoa
+            LEFT JOIN Pagamentos g ON g.nome = o.pagamento
+            WHERE o.id = m.id
+        """)
+        # Remover a coluna pessoa também remove o índice antigo (descricao, pessoa, data)
+        cursor.execute(f"""
+            ALTER TABLE {tabela}
+            ALTER COLUMN tipo_id SET NOT NULL,
+            DROP COLUMN tipo,
+            DROP COLUMN pessoa,
+            DROP COLUMN pagamento
+        """)
+        convertidas.append(tabela)
+
+    return convertidas
+
 def create_database():
     """Cria o banco de dados se ele não existir"""
     try:
@@ -51,20 +275,17 @@ def setup_tables():
         )
         cursor = conn.cursor()
 
+        # Criar as tabelas de dimensão (convertendo um banco no formato antigo)
+        _normalize_dimensions(cursor)
+
+        # Converter valores de um banco antigo para centavos antes dos dados de exemplo
+        _convert_money_to_cents(cursor)
+
+        # Criar tabela de regras de recorrência (salários e contas mensais)
+        cursor.execute(RECORRENCIAS_SQL)
+
         # Criar tabela de Movimentacoes
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS Movimentacoes (
-                id SERIAL PRIMARY KEY,
-                data DATE NOT NULL,
-                descricao VARCHAR(255) NOT NULL,
-                valor DECIMAL(10,2) NOT NULL,
-                tipo VARCHAR(50) NOT NULL CHECK (tipo IN ('Compra', 'Conta', 'Recebimento', 'Salário', 'Poupança', 'Retirada')),
-                pessoa VARCHAR(50),
-                pagamento VARCHAR(50),
-                parcela_atual INTEGER,
-                total_parcelas INTEGER
-            )
-        """)
+        cursor.execute(MOVIMENTACOES_SQL)
 
         # Criar tabela de Limites
         cursor.execute("""
@@ -72,42 +293,46 @@ def setup_tables():
                 id SERIAL PRIMARY KEY,
                 data DATE NOT NULL,
                 pessoa VARCHAR(50) NOT NULL,
-                valor DECIMAL(10,2) NOT NULL,
+                valor BIGINT NOT NULL,
                 UNIQUE (data, pessoa)
             )
         """)
 
-        # Inserir dados de exemplo
-        cursor.execute("""
-            INSERT INTO Movimentacoes (data, descricao, valor, tipo, pessoa, pagamento) 
-            VALUES 
-                ('2024-01-14', 'Salário', 5000.00, 'Salário', 'Yuri', NULL),
-                ('2024-01-26', 'Salário', 5000.00, 'Salário', 'Marcos', NULL)
-            ON CONFLICT DO NOTHING
-        """)
-
+        # Chaves dos registros da fila local de gravações já aplicados, para
+        # que uma repetição após falha de conexão não os grave duas vezes
         cursor.execute("""
-            INSERT INTO Movimentacoes (data, descricao, valor, tipo, pessoa, pagamento, parcela_atual, total_parcelas) 
-            VALUES 
-                ('2024-01-05', 'Aluguel', -1500.00, 'Conta', 'Yuri', 'Débito', NULL, 0),
-                ('2024-01-10', 'Internet', -150.00, 'Conta', 'Marcos', 'Débito', NULL, 0),
-                ('2024-01-15', 'Compra Supermercado', -500.00, 'Compra', 'Yuri', 'Crédito', 1, 1),
-                ('2024-01-20', 'Academia', -100.00, 'Conta', 'Marcos', 'Débito', NULL, 0)
-            ON CONFLICT DO NOTHING
+            CREATE TABLE IF NOT EXISTS GravacoesAplicadas (
+                chave UUID PRIMARY KEY,
+                aplicada TIMESTAMP NOT NULL DEFAULT now()
+            )
         """)
 
+        # Inserir dados de exemplo, trocando os nomes pelos ids das dimensões
         cursor.execute("""
-            INSERT INTO Movimentacoes (data, descricao, valor, tipo) 
-            VALUES 
-                ('2024-01-01', 'Depósito Inicial', 1000.00, 'Poupança')
+            INSERT INTO Movimentacoes (data, descricao, valor, tipo_id, pessoa_id, pagamento_id, parcela_atual, total_parcelas)
+            SELECT v.data::date, v.descricao, v.valor::bigint, t.id, p.id, g.id,
+                   v.parcela_atual::integer, v.total_parcelas::integer
+            FROM (
+                VALUES 
+                    ('2024-01-14', 'Salário', 500000, 'Salário', 'Yuri', NULL, NULL, NULL),
+                    ('2024-01-26', 'Salário', 500000, 'Salário', 'Marcos', NULL, NULL, NULL),
+                    ('2024-01-05', 'Aluguel', -150000, 'Conta', 'Yuri', 'Débito', NULL, 0),
+                    ('2024-01-10', 'Internet', -15000, 'Conta', 'Marcos', 'Débito', NULL, 0),
+                    ('2024-01-15', 'Compra Supermercado', -50000, 'Compra', 'Yuri', 'Crédito', 1, 1),
+                    ('2024-01-20', 'Academia', -10000, 'Conta', 'Marcos', 'Débito', NULL, 0),
+                    ('2024-01-01', 'Depósito Inicial', 100000, 'Poupança', NULL, NULL, NULL, NULL)
+            ) AS v (data, descricao, valor, tipo, pessoa, pagamento, parcela_atual, total_parcelas)
+            JOIN Tipos t ON t.nome = v.tipo
+            LEFT JOIN Pessoas p ON p.nome = v.pessoa
+            LEFT JOIN Pagamentos g ON g.nome = v.pagamento
             ON CONFLICT DO NOTHING
         """)
 
         cursor.execute("""
             INSERT INTO Limites (data, pessoa, valor) 
             VALUES 
-                ('2024-01-01', 'Yuri', 2000.00),
-                ('2024-01-01', 'Marcos', 2000.00)
+                ('2024-01-01', 'Yuri', 200000),
+                ('2024-01-01', 'Marcos', 200000)
             ON CONFLICT DO NOTHING
         """)
 
@@ -121,8 +346,394 @@ def setup_tables():
         print(f"Erro ao configurar tabelas: {e}")
         raise
 
+def migrate_dimensions():
+    """
+    Converte um banco existente para as tabelas de dimensão Pessoas,
+    Pagamentos e Tipos e regrava Movimentacoes para liberar o espaço das
+    colunas texto removidas, mostrando o tamanho da tabela antes e depois.
+    """
+    try:
+        conn = psycopg2.connect(
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT
+        )
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT pg_total_relation_size(to_regclass('movimentacoes'))")
+        tamanho_antes = cursor.fetchone()[0]
+
+        convertidas = _normalize_dimensions(cursor)
+        conn.commit()
+
+        if "Movimentacoes" in convertidas:
+            # VACUUM FULL não roda dentro de transação
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            cursor.execute("VACUUM FULL ANALYZE Movimentacoes")
+            cursor.execute("SELECT pg_total_relation_size('movimentacoes')")
+            tamanho_depois = cursor.fetchone()[0]
+            print(f"Dimensões migradas em {', '.join(convertidas)}: "
+                  f"Movimentacoes passou de {tamanho_antes} para {tamanho_depois} bytes.")
+        elif convertidas:
+            print(f"Dimensões migradas em {', '.join(convertidas)}.")
+        else:
+            print("Tabelas de dimensão criadas/verificadas com sucesso!")
+
+        cursor.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Erro ao migrar as dimensões: {e}")
+        raise
+
+def migrate_money_to_cents():
+    """
+    Converte os valores monetários de um banco existente de DECIMAL(10,2) em
+    reais para BIGINT em centavos, removendo o teto de 99.999.999,99.
+    """
+    try:
+        conn = psycopg2.connect(
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT
+        )
+        cursor = conn.cursor()
+
+        convertidas = _convert_money_to_cents(cursor)
+        conn.commit()
+        if convertidas:
+            print(f"Valores convertidos para centavos: {', '.join(convertidas)}.")
+        else:
+            print("Valores já armazenados em centavos.")
+
+        cursor.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Erro ao converter valores para centavos: {e}")
+        raise
+
+def migrate_recurrence_rules():
+    """
+    Converte os lançamentos recorrentes copiados mês a mês em regras da tabela
+    Recorrencias. As linhas existentes são mantidas e ligadas à sua regra.
+    """
+    try:
+        conn = psycopg2.connect(
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT
+        )
+        cursor = conn.cursor()
+
+        cursor.execute(RECORRENCIAS_SQL)
+        cursor.execute("""
+            ALTER TABLE Movimentacoes
+            ADD COLUMN IF NOT EXISTS recorrencia_id INTEGER REFERENCES Recorrencias(id)
+        """)
+
+        # Uma regra por modelo ainda não convertido (salários e contas com frequência zero)
+        cursor.execute("""
+            INSERT INTO Recorrencias (descricao, pessoa_id, valor, tipo_id, pagamento_id, dia, inicio)
+            SELECT m.descricao, m.pessoa_id, m.valor, m.tipo_id, NULL::smallint, EXTRACT(DAY FROM m.data) AS dia,
+                   MIN(date_trunc('month', m.data))::date
+            FROM Movimentacoes m
+            JOIN Tipos t ON t.id = m.tipo_id
+            WHERE t.nome = 'Recebimento' AND m.descricao = 'Salário' AND m.recorrencia_id IS NULL
+            GROUP BY m.descricao, m.pessoa_id, m.valor, m.tipo_id, dia
+            UNION ALL
+            SELECT m.descricao, m.pessoa_id, -ABS(m.valor), m.tipo_id, m.pagamento_id, EXTRACT(DAY FROM m.data) AS dia,
+                   MIN(date_trunc('month', m.data))::date
+            FROM Movimentacoes m
+            JOIN Tipos t ON t.id = m.tipo_id
+            WHERE t.nome = 'Conta' AND m.total_parcelas = 0 AND m.recorrencia_id IS NULL
+            GROUP BY m.descricao, m.pessoa_id, -ABS(m.valor), m.tipo_id, m.pagamento_id, dia
+        """)
+        regras = cursor.rowcount
+
+        # Liga as cópias existentes à regra correspondente
+        cursor.execute("""
+            UPDATE Movimentacoes m
+            SET recorrencia_id = r.id
+            FROM Recorrencias r
+            JOIN Tipos t ON t.id = r.tipo_id
+            WHERE m.recorrencia_id IS NULL
+              AND m.tipo_id = r.tipo_id
+              AND m.descricao = r.descricao
+              AND m.pessoa_id IS NOT DISTINCT FROM r.pessoa_id
+              AND m.pagamento_id IS NOT DISTINCT FROM r.pagamento_id
+              AND EXTRACT(DAY FROM m.data) = r.dia
+              AND ((t.nome = 'Conta' AND m.total_parcelas = 0 AND -ABS(m.valor) = r.valor)
+                   OR (t.nome = 'Recebimento' AND m.descricao = 'Salário' AND m.valor = r.valor))
+        """)
+        ligadas = cursor.rowcount
+
+        conn.commit()
+        print(f"Recorrências migradas: {regras} regras criadas, {ligadas} lançamentos ligados.")
+
+        cursor.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Erro ao migrar recorrências: {e}")
+        raise
+
+def upgrade_schema():
+    """
+    Atualiza o esquema de um banco existente, criando os índices que faltam.
+    """
+    try:
+        conn = psycopg2.connect(
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT
+        )
+        cursor = conn.cursor()
+
+        for sql in INDICES_SQL:
+            cursor.execute(sql)
+        cursor.execute("ANALYZE Movimentacoes")
+
+        conn.commit()
+        print("Índices criados/verificados com sucesso!")
+
+        cursor.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Erro ao atualizar o esquema: {e}")
+        raise
+
+# Gatilhos que avisam (NOTIFY) os programas abertos de quais meses mudaram,
+# para que descartem somente esses meses do cache. O aviso traz os meses como
+# "AAAA-MM" separados por vírgula, ou "*" quando qualquer mês pode ter mudado
+# (regras de recorrência, TRUNCATE ou meses demais para um aviso).
+NOTIFICACOES_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION movimentacoes_notificar() RETURNS trigger AS $$
+    DECLARE
+        meses TEXT;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT string_agg(to_char(mes, 'YYYY-MM'), ',') INTO meses
+            FROM (SELECT DISTINCT date_trunc('month', data) AS mes FROM novas) m;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT string_agg(to_char(mes, 'YYYY-MM'), ',') INTO meses
+            FROM (SELECT DISTINCT date_trunc('month', data) AS mes FROM antigas) m;
+        ELSE
+            SELECT string_agg(to_char(mes, 'YYYY-MM'), ',') INTO meses
+            FROM (
+                SELECT date_trunc('month', data) AS mes FROM antigas
+                UNION
+                SELECT date_trunc('month', data) FROM novas
+            ) m;
+        END IF;
+
+        IF meses IS NOT NULL THEN
+            PERFORM pg_notify('movimentacoes_alteradas', CASE WHEN length(meses) > 7000 THEN '*' ELSE meses END);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION movimentacoes_notificar_tudo() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('movimentacoes_alteradas', '*');
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS notificar_insert ON Movimentacoes",
+    "DROP TRIGGER IF EXISTS notificar_update ON Movimentacoes",
+    "DROP TRIGGER IF EXISTS notificar_delete ON Movimentacoes",
+    "DROP TRIGGER IF EXISTS notificar_truncate ON Movimentacoes",
+    "DROP TRIGGER IF EXISTS notificar_recorrencias ON Recorrencias",
+    """
+    CREATE TRIGGER notificar_insert AFTER INSERT ON Movimentacoes
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION movimentacoes_notificar()
+    """,
+    """
+    CREATE TRIGGER notificar_update AFTER UPDATE ON Movimentacoes
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION movimentacoes_notificar()
+    """,
+    """
+    CREATE TRIGGER notificar_delete AFTER DELETE ON Movimentacoes
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION movimentacoes_notificar()
+    """,
+    """
+    CREATE TRIGGER notificar_truncate AFTER TRUNCATE ON Movimentacoes
+    FOR EACH STATEMENT EXECUTE FUNCTION movimentacoes_notificar_tudo()
+    """,
+    """
+    CREATE TRIGGER notificar_recorrencias AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Recorrencias
+    FOR EACH STATEMENT EXECUTE FUNCTION movimentacoes_notificar_tudo()
+    """
+]
+
+def setup_change_notifications():
+    """
+    Cria os gatilhos que avisam os programas abertos das alterações em
+    Movimentacoes e Recorrencias.
+    """
+    try:
+        conn = psycopg2.connect(
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT
+        )
+        cursor = conn.cursor()
+
+        for sql in NOTIFICACOES_SQL:
+            cursor.execute(sql)
+
+        conn.commit()
+        print("Gatilhos de notificação criados/verificados com sucesso!")
+
+        cursor.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Erro ao criar os gatilhos de notificação: {e}")
+        raise
+
+def setup_monthly_summary():
+    """
+    Cria a tabela ResumoMensal e os gatilhos que a mantêm, recalculando-a a
+    partir das movimentações existentes.
+    """
+    try:
+        conn = psycopg2.connect(
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT
+        )
+        cursor = conn.cursor()
+
+        # Impede gravações enquanto os gatilhos são criados e o resumo é recalculado
+        cursor.execute("LOCK TABLE Movimentacoes IN SHARE ROW EXCLUSIVE MODE")
+        for sql in RESUMO_MENSAL_SQL:
+            cursor.execute(sql)
+
+        cursor.execute("TRUNCATE ResumoMensal")
+        cursor.execute("""
+            INSERT INTO ResumoMensal (mes, pessoa_id, tipo_id, pagamento_id, valor_total, valor_abs, quantidade)
+            SELECT date_trunc('month', data)::date, COALESCE(pessoa_id, 0), tipo_id, COALESCE(pagamento_id, 0),
+                   SUM(valor), SUM(ABS(valor)), COUNT(*)
+            FROM Movimentacoes
+            GROUP BY 1, 2, 3, 4
+        """)
+
+        conn.commit()
+        print(f"Resumo mensal recalculado: {cursor.rowcount} linhas.")
+
+        cursor.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Erro ao configurar o resumo mensal: {e}")
+        raise
+
+def check_month_query_plan(rows=1_000_000, regras=200):
+    """
+    Verifica com EXPLAIN que a consulta de um mês da aplicação (movimentações
+    gravadas mais as ocorrências pendentes das recorrências) usa os índices em
+    uma tabela com o número de linhas informado: o índice por data na busca
+    do mês e os índices de (descricao, pessoa_id, data) e de
+    (recorrencia_id, data) nas verificações de existência. Movimentacoes e
+    Recorrencias são cópias temporárias (com os mesmos índices) descartadas
+    ao final.
+    """
+    try:
+        conn = psycopg2.connect(
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT
+        )
+        cursor = conn.cursor()
+
+        # As tabelas temporárias têm precedência sobre as de public nesta sessão.
+        # Sem INCLUDING DEFAULTS, para não consumir as sequências das tabelas reais.
+        cursor.execute("CREATE TEMP TABLE Movimentacoes (LIKE public.Movimentacoes) ON COMMIT DROP")
+        cursor.execute("CREATE TEMP TABLE Recorrencias (LIKE public.Recorrencias) ON COMMIT DROP")
+        for sql in INDICES_SQL:
+            cursor.execute(sql)
+        cursor.execute("""
+            INSERT INTO Recorrencias (id, descricao, valor, dia, tipo_id, pessoa_id, pagamento_id)
+            SELECT i, 'Lançamento ' || i, -100000, 1 + i %% 28, 1 + i %% 4, 1 + i %% 2, 1 + i %% 2
+            FROM generate_series(1, %s) AS i
+        """, (regras,))
+        # Um a cada dez lançamentos veio de uma regra, como na materialização das recorrências
+        cursor.execute("""
+            INSERT INTO Movimentacoes (id, data, descricao, valor, tipo_id, pessoa_id, pagamento_id, recorrencia_id)
+            SELECT i,
+                   DATE '2016-01-01' + (i %% 3650),
+                   'Lançamento ' || (i %% 500),
+                   ((i %% 2000) - 1000) * 100,
+                   1 + i %% 4,
+                   1 + i %% 2,
+                   1 + i %% 2,
+                   CASE WHEN i %% 10 = 0 THEN 1 + i %% %s END
+            FROM generate_series(1, %s) AS i
+        """, (regras, rows))
+        cursor.execute("ANALYZE Movimentacoes")
+        cursor.execute("ANALYZE Recorrencias")
+
+        inicio, fim = ledger.month_bounds(3, 2020)
+        cursor.execute("EXPLAIN " + ledger.MONTH_ROWS_SQL, {"inicio": inicio, "fim": fim})
+        plano = "\n".join(linha for (linha,) in cursor.fetchall())
+        print(plano)
+
+        # As junções com as dimensões sempre usam as chaves primárias; o que importa
+        # são os índices da busca do mês e das duas verificações de existência
+        indices = [
+            "idx_movimentacoes_data",
+            "idx_movimentacoes_descricao_pessoa_data",
+            "idx_movimentacoes_recorrencia_data"
+        ]
+        ausentes = [indice for indice in indices if indice not in plano]
+        if ausentes:
+            print(f"ATENÇÃO: a consulta do mês não usa {', '.join(ausentes)} em {rows} linhas.")
+        else:
+            print(f"OK: a consulta do mês usa os índices em {rows} linhas.")
+
+        conn.rollback()
+        cursor.close()
+        conn.close()
+        return not ausentes
+
+    except Exception as e:
+        print(f"Erro ao verificar o plano da consulta: {e}")
+        raise
+
 if __name__ == "__main__":
+    if "--explain" in sys.argv:
+        sys.exit(0 if check_month_query_plan() else 1)
+
     print("Iniciando configuração do banco de dados...")
     create_database()
+    migrate_dimensions()
+    migrate_money_to_cents()
     setup_tables()
+    migrate_recurrence_rules()
+    upgrade_schema()
+    setup_monthly_summary()
+    setup_change_notifications()
     print("Configuração do banco de dados concluída!") 
\ No newline at end of file